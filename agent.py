@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Time-stamp: <2025-06-17 19:05:38 krylon>
+# Time-stamp: <2026-10-19 09:27:48 krylon>
 #
 # /data/code/python/medusa/agent.py
 # created on 18. 03. 2025
@@ -26,11 +26,11 @@ import socket
 import time
 from datetime import datetime, timedelta
 from threading import Lock, Thread
-from typing import Final, Optional, Union
+from typing import Any, Final, Optional, Union
 
 import requests
 
-from medusa import common
+from medusa import common, data, metrics
 from medusa.config import Config
 from medusa.data import Record
 from medusa.probe import osdetect
@@ -40,6 +40,21 @@ from medusa.proto import MsgType
 # The maximum number of errors we tolerate before we bail.
 MAX_ERR: Final[int] = 10
 
+probe_seconds: Final[metrics.Histogram] = metrics.registry.histogram(
+    "medusa_agent_probe_seconds",
+    "Time spent running Probes",
+    ("probe", ))
+spool_depth: Final[metrics.Gauge] = metrics.registry.gauge(
+    "medusa_agent_spool_depth",
+    "Reports waiting in the spool directory to be submitted")
+reports_submitted: Final[metrics.Counter] = metrics.registry.counter(
+    "medusa_agent_reports_submitted_total",
+    "Reports successfully submitted to the Server")
+submit_failures: Final[metrics.Counter] = metrics.registry.counter(
+    "medusa_agent_submit_failures_total",
+    "Failed attempts to submit a report to the Server",
+    ("reason", ))
+
 
 class TooManyErrorsError(common.MedusaError):
     """Indicates that too many errors have occured and we should just bail."""
@@ -51,6 +66,7 @@ class Agent:
     __slots__ = [
         "name",
         "os",
+        "tags",
         "probes",
         "log",
         "lock",
@@ -66,6 +82,7 @@ class Agent:
 
     name: str
     os: str
+    tags: dict[str, str]
     probes: set[Probe]
     log: logging.Logger
     lock: Lock
@@ -122,6 +139,24 @@ class Agent:
 
         platform = osdetect.guess_os()
         self.os = platform.name
+        # Labels from the configuration file cannot override what we know
+        # about the platform. The Server would drop invalid tags, so we
+        # complain about them here, where they can be fixed.
+        tags: dict[str, Any] = {
+            "os": platform.name,
+            "version": platform.version,
+            "arch": platform.arch if platform.arch != "unknown" else os.uname().machine,
+        }
+        labels = cfg.get("Agent", "Labels", {})
+        if isinstance(labels, dict):
+            for k, v in labels.items():
+                if k not in tags:
+                    tags[k] = v
+        else:
+            self.log.error("Agent.Labels must be a table, not %s", type(labels).__name__)
+        self.tags, problems = data.filter_tags(tags)
+        for problem in problems:
+            self.log.error("Ignoring invalid label: %s", problem)
 
         plist: list[str] = cfg.get("Agent", "Probes")
         self.collect_interval = cfg.get("Probe", "Interval")
@@ -142,7 +177,7 @@ class Agent:
     def register(self) -> bool:
         """Attempt to register with the Server."""
         endpoint: Final[str] = f"http://{self.srv}:{self.port}/ajax/register"
-        body = {"name": self.name, "os": self.os}
+        body = {"name": self.name, "os": self.os, "tags": self.tags}
         xfr = json.dumps(body)
         try:
             res = requests.request("POST",
@@ -173,7 +208,8 @@ class Agent:
         with self.lock:
             for p in self.probes:
                 if force or p.is_due():
-                    res: Optional[Record] = p.get_data()
+                    with probe_seconds.time((p.__class__.__name__, )):
+                        res: Optional[Record] = p.get_data()
                     if res is not None:
                         results.append(res)
         return results
@@ -193,7 +229,7 @@ class Agent:
         with self.lock:
             self.active = True
 
-        collect_thr = Thread(target=self.collect_data, daemon=True)
+        collect_thr = Thread(target=self.collect_data, name="Collect", daemon=True)
         collect_thr.start()
 
         while self.is_active():
@@ -201,19 +237,31 @@ class Agent:
                 if not self.process_data():
                     time.sleep(random.randint(1, min(self.errcnt**2, 2)))
             finally:
+                self.write_stats()
                 time.sleep(5)
 
+    def write_stats(self) -> None:
+        """Write our metrics to a file in the base directory, for whoever is curious."""
+        try:
+            metrics.registry.dump(common.path.stats())
+        except OSError as err:
+            self.log.error("Failed to write metrics to %s: %s",
+                           common.path.stats(),
+                           err)
+
     def process_data(self) -> bool:
         """Attempt to submit collected data to the Server."""
         with os.scandir(common.path.spool()) as spool:
-            for entry in spool:
-                if entry.is_file() and not entry.name.startswith("tmp."):
-                    with open(entry.path, "rb") as fh:
-                        xfr = fh.read()
-                    if self.submit_data(xfr):
-                        os.remove(entry.path)
-                    else:
-                        return False
+            pending = [e for e in spool if e.is_file() and not e.name.startswith("tmp.")]
+        spool_depth.set(len(pending))
+        for entry in pending:
+            with open(entry.path, "rb") as fh:
+                xfr = fh.read()
+            if self.submit_data(xfr):
+                os.remove(entry.path)
+                spool_depth.inc(amount=-1)
+            else:
+                return False
         return True
 
     def submit_data(self, xfr: Union[str, bytes]) -> bool:
@@ -229,6 +277,7 @@ class Agent:
                                    })
         except requests.exceptions.ConnectionError:
             self.errcnt += 1
+            submit_failures.inc(("connection", ))
             return False
 
         self.errcnt = 0
@@ -237,11 +286,13 @@ class Agent:
             self.log.error("Unexpected content type in response from %s: %s",
                            self.srv,
                            res.headers["content-type"])
+            submit_failures.inc(("content-type", ))
             return False
         if res.status_code != 200:
             self.log.error("Unexpected HTTP status code from %s: %s",
                            self.srv,
                            res.status_code)
+            submit_failures.inc(("status", ))
             return False
 
         body = res.json()
@@ -256,10 +307,12 @@ class Agent:
                 return self.submit_data(xfr)
             case MsgType.Success:
                 self.log.debug("Data successfully sent to Server.")
+                reports_submitted.inc()
                 status = True
             case _:
                 self.log.error("Server replied with unexpected/invalid message type %s",
                                body["status"])
+                submit_failures.inc(("message", ))
 
         return status
 
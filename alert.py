@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 09:29:29 krylon>
+#
+# /data/code/python/medusa/alert.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.alert
+
+(c) 2026 Benjamin Walkenhorst
+
+Alert rules, checked as Records arrive from the Agents.
+
+Rules are read from the [[Alert]] tables in the configuration file. Each
+rule keeps a small, fixed amount of state per Host - the previous value, how
+many samples in a row disagreed with the current state - so checking a
+Record costs the same no matter how much history there is, and we never go
+back to the database for it.
+
+Alerts are stored in the database, so they survive a restart. The active
+ones are kept in memory as well, for the web interface.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Final, Iterable, Optional
+
+from medusa import common, metrics
+from medusa.config import Config
+from medusa.data import Alert, Host, Record
+from medusa.database import Database, DatabaseError, Pool
+
+alerts_raised: Final[metrics.Counter] = metrics.registry.counter(
+    "medusa_alerts_raised_total",
+    "Alerts raised, per rule",
+    ("rule", ))
+alerts_active: Final[metrics.Gauge] = metrics.registry.gauge(
+    "medusa_alerts_active",
+    "Alerts currently active")
+
+
+class RuleError(common.MedusaError):
+    """RuleError indicates an invalid alert rule in the configuration file."""
+
+
+class Kind(Enum):
+    """Kind determines what a rule looks at."""
+
+    Threshold = "threshold"
+    Rate = "rate"
+    NoData = "nodata"
+
+
+# The keys an [[Alert]] table may contain, mapped to the names of the Rule's fields.
+_rule_keys: Final[dict[str, str]] = {
+    "Name": "name",
+    "Kind": "kind",
+    "Source": "source",
+    "Value": "value",
+    "Above": "above",
+    "Below": "below",
+    "For": "count",
+    "Intervals": "intervals",
+    "Hosts": "hosts",
+}
+
+
+@dataclass(slots=True, frozen=True, kw_only=True)
+class Rule:
+    """Rule describes a condition that should raise an Alert."""
+
+    name: str
+    kind: Kind
+    source: str
+    value: str = "score"
+    above: Optional[float] = None
+    below: Optional[float] = None
+    count: int = 1
+    intervals: int = 5
+    hosts: Optional[frozenset[str]] = None
+
+    @classmethod
+    def parse(cls, tbl: dict[str, Any]) -> "Rule":
+        """Create a Rule from one of the [[Alert]] tables in the configuration file."""
+        unknown = tbl.keys() - _rule_keys.keys()
+        if len(unknown) > 0:
+            raise RuleError(f"Unknown key(s) in alert rule {tbl.get('Name')}: "
+                            f"{', '.join(sorted(unknown))}")
+        args = {_rule_keys[k]: v for k, v in tbl.items()}
+        for key in ("name", "kind", "source"):
+            if not args.get(key):
+                raise RuleError(f"Alert rule {tbl} lacks a {key.capitalize()}")
+        try:
+            args["kind"] = Kind(args["kind"])
+        except ValueError as err:
+            raise RuleError(f"Invalid Kind for alert rule {args['name']}: {args['kind']}") \
+                from err
+        if "hosts" in args:
+            args["hosts"] = frozenset(args["hosts"])
+        rule = cls(**args)
+
+        if rule.kind != Kind.NoData and rule.above is None and rule.below is None:
+            raise RuleError(f"Alert rule {rule.name} needs Above, Below, or both")
+        if rule.count < 1 or rule.intervals < 1:
+            raise RuleError(f"For and Intervals must be positive in alert rule {rule.name}")
+        return rule
+
+    def applies(self, host: Host) -> bool:
+        """Return True if the Rule is meant for the given Host."""
+        return self.hosts is None or host.name in self.hosts
+
+    def violated(self, x: float) -> bool:
+        """Return True if the value is out of bounds."""
+        return (self.above is not None and x > self.above) or \
+            (self.below is not None and x < self.below)
+
+    def describe(self, x: float) -> str:
+        """Return a message explaining why the Rule was violated."""
+        bound: Final[str] = f"above {self.above}" \
+            if self.above is not None and x > self.above else f"below {self.below}"
+        match self.kind:
+            case Kind.Threshold:
+                return f"{self.value} ({self.source}) is {x:.2f}, {bound}"
+            case Kind.Rate:
+                return f"{self.value} ({self.source}) changes by {x:.2f} per minute, {bound}"
+            case Kind.NoData:
+                return f"No {self.source} data for {x:.0f} seconds"
+        return ""
+
+
+def load_rules(cfg: Optional[Config] = None) -> list[Rule]:
+    """Read the alert rules from the configuration file."""
+    if cfg is None:
+        cfg = Config()
+    try:
+        rules = [Rule.parse(t) for t in cfg.tables("Alert")]
+    except (TypeError, ValueError) as err:
+        raise RuleError(f"Invalid alert rules in {cfg.path}: {err}") from err
+    names: Final[set[str]] = set()
+    for r in rules:
+        if r.name in names:
+            raise RuleError(f"Duplicate alert rule {r.name}")
+        names.add(r.name)
+    return rules
+
+
+class State:  # pylint: disable-msg=R0903
+    """State is what one Rule remembers about one Host."""
+
+    __slots__ = [
+        "active",
+        "streak",
+        "stamp",
+        "value",
+    ]
+
+    active: bool
+    streak: int
+    stamp: int
+    value: float
+
+    def __init__(self) -> None:
+        self.active = False
+        self.streak = 0
+        self.stamp = 0
+        self.value = 0.0
+
+
+class Engine:
+    """Engine checks incoming Records against the alert rules.
+
+    For NoData rules, the timestamp in the State is the time we last received
+    data from the Host, and a background thread checks regularly which Hosts
+    have been silent for too long.
+
+    Besides the rules, other parts of the application may raise Alerts for
+    conditions they detect themselves, see notify.
+    """
+
+    __slots__ = [
+        "log",
+        "lock",
+        "rules",
+        "by_source",
+        "interval",
+        "external",
+        "states",
+        "alerts",
+        "stop_ev",
+        "sweeper",
+    ]
+
+    log: logging.Logger
+    lock: threading.Lock
+    rules: list[Rule]
+    by_source: dict[str, list[Rule]]
+    interval: int
+    external: frozenset[str]
+    states: dict[tuple[str, int], State]
+    alerts: dict[tuple[str, int], Alert]
+    stop_ev: threading.Event
+    sweeper: Optional[threading.Thread]
+
+    def __init__(self, rules: Iterable[Rule], interval: int = 60,
+                 external: Iterable[str] = ()) -> None:
+        self.log = common.get_logger("Alert")
+        self.lock = threading.Lock()
+        self.rules = list(rules)
+        self.by_source = {}
+        for r in self.rules:
+            self.by_source.setdefault(r.source, []).append(r)
+        self.interval = interval
+        self.external = frozenset(external)
+        clash: Final[set[str]] = {r.name for r in self.rules} & self.external
+        if len(clash) > 0:
+            raise RuleError(f"Alert rule name(s) reserved for internal use: {', '.join(clash)}")
+        self.states = {}
+        self.alerts = {}
+        self.stop_ev = threading.Event()
+        self.sweeper = None
+
+    def load(self, db: Database, latest: Iterable[Record]) -> None:
+        """Restore the active Alerts from the database.
+
+        Alerts for rules that are no longer configured are ended. The most
+        recent Records are used as a starting point for the NoData rules.
+        """
+        now: Final[int] = int(time.time())
+        known: Final[set[str]] = {r.name for r in self.rules} | self.external
+        hosts: Final[dict[int, Host]] = {h.host_id: h for h in db.host_get_all()}
+        with self.lock:
+            for a in db.alert_get_active():
+                if a.rule not in known:
+                    self.log.info("End Alert %s for Host %d, the rule is gone",
+                                  a.rule,
+                                  a.host_id)
+                    db.alert_close(a.host_id, a.rule, now)
+                    continue
+                self._state(a.rule, a.host_id).active = True
+                self.alerts[(a.rule, a.host_id)] = a
+
+            for rec in latest:
+                host = hosts.get(rec.host_id)
+                if host is None:
+                    continue
+                for r in self.by_source.get(rec.source(), ()):
+                    if r.kind == Kind.NoData and r.applies(host):
+                        st = self._state(r.name, rec.host_id)
+                        st.stamp = max(st.stamp, rec.timestamp)
+            alerts_active.set(len(self.alerts))
+
+    def notify(self, db: Database, name: str, host_id: int, active: bool,
+               stamp: int, *, message: str = "", value: float = 0.0) -> Optional[Alert]:
+        """Raise or end an Alert for a condition detected elsewhere, e.g. a Host going down.
+
+        The name must be one of the external conditions the Engine was created with.
+        Returns the Alert if anything changed.
+        """
+        assert name in self.external
+        with self.lock:
+            st = self._state(name, host_id)
+            if st.active == active:
+                return None
+            a = self._switch(db, name, host_id, st, active, value, stamp, message)
+            alerts_active.set(len(self.alerts))
+            return a
+
+    def active_alerts(self) -> list[Alert]:
+        """Return the active Alerts, oldest first."""
+        with self.lock:
+            return sorted(self.alerts.values(), key=lambda a: (a.started, a.rule))
+
+    def evaluate(self, db: Database, host: Host, records: Iterable[Record]) -> list[Alert]:
+        """Check freshly stored Records against the rules.
+
+        Returns the Alerts that were raised or ended.
+        """
+        now: Final[int] = int(time.time())
+        changes: list[Alert] = []
+        with self.lock:
+            for rec in records:
+                rules = self.by_source.get(rec.source())
+                if rules is None:
+                    continue
+                vals = rec.values()
+                for r in rules:
+                    if not r.applies(host):
+                        continue
+                    st = self._state(r.name, host.host_id)
+                    if r.kind == Kind.NoData:
+                        st.stamp = now
+                        a = self._step(db, r, host.host_id, st, False, 0, now)
+                    else:
+                        a = self._check(db, r, host.host_id, st, rec, vals)
+                    if a is not None:
+                        changes.append(a)
+            if len(changes) > 0:
+                alerts_active.set(len(self.alerts))
+        return changes
+
+    def sweep(self, db: Database, now: int = 0) -> list[Alert]:
+        """Raise Alerts for Hosts that have been silent for too long."""
+        if now == 0:
+            now = int(time.time())
+        changes: list[Alert] = []
+        with self.lock:
+            for r in self.rules:
+                if r.kind != Kind.NoData:
+                    continue
+                limit = r.intervals * self.interval
+                for (name, hid), st in self.states.items():
+                    if name != r.name or st.active or st.stamp == 0:
+                        continue
+                    if now - st.stamp > limit:
+                        a = self._step(db, r, hid, st, True, now - st.stamp, now)
+                        if a is not None:
+                            changes.append(a)
+            if len(changes) > 0:
+                alerts_active.set(len(self.alerts))
+        return changes
+
+    def start(self, pool: Pool) -> None:
+        """Start checking for silent Hosts in the background.
+
+        Raising Alerts goes through the writer of the Pool.
+        """
+        if not any(r.kind == Kind.NoData for r in self.rules):
+            return
+        self.sweeper = threading.Thread(target=self._sweep_loop,
+                                        args=(pool, ),
+                                        name="AlertSweep",
+                                        daemon=True)
+        self.sweeper.start()
+
+    def stop(self) -> None:
+        """Stop the background thread."""
+        self.stop_ev.set()
+        if self.sweeper is not None:
+            self.sweeper.join()
+            self.sweeper = None
+
+    def _sweep_loop(self, pool: Pool) -> None:
+        """Call sweep once per probe interval until we are told to stop."""
+        while not self.stop_ev.wait(self.interval):
+            try:
+                db = pool.writer()
+                try:
+                    self.sweep(db)
+                finally:
+                    db.close()
+            except DatabaseError as err:
+                self.log.error("Failed to check for silent Hosts: %s", err)
+
+    def _state(self, rule: str, host_id: int) -> State:
+        """Return the State of a Rule for a Host. The caller must hold the lock."""
+        key: Final[tuple[str, int]] = (rule, host_id)
+        st = self.states.get(key)
+        if st is None:
+            st = State()
+            self.states[key] = st
+        return st
+
+    def _check(self,  # pylint: disable-msg=R0917
+               db: Database, rule: Rule, host_id: int, st: State,
+               rec: Record, vals: dict[str, Any]) -> Optional[Alert]:
+        """Feed a Record to a Threshold or Rate rule. The caller must hold the lock."""
+        x = rec.score() if rule.value == "score" else vals.get(rule.value)
+        if x is None or rec.timestamp <= st.stamp:
+            # Nothing to look at, or we have seen more recent data already.
+            return None
+
+        prev_stamp: Final[int] = st.stamp
+        prev_value: Final[float] = st.value
+        st.stamp = rec.timestamp
+        st.value = x
+        if rule.kind == Kind.Rate:
+            if prev_stamp == 0:
+                return None
+            x = (x - prev_value) * 60 / (rec.timestamp - prev_stamp)
+        return self._step(db, rule, host_id, st, rule.violated(x), x, rec.timestamp)
+
+    def _step(self,  # pylint: disable-msg=R0917
+              db: Database, rule: Rule, host_id: int, st: State,
+              hit: bool, x: float, stamp: int) -> Optional[Alert]:
+        """Raise or end an Alert once enough samples in a row call for it.
+
+        The caller must hold the lock.
+        """
+        if hit == st.active:
+            st.streak = 0
+            return None
+        st.streak += 1
+        if st.streak < rule.count and rule.kind != Kind.NoData:
+            return None
+        return self._switch(db, rule.name, host_id, st, hit, x, stamp,
+                            rule.describe(x) if hit else "")
+
+    def _switch(self,  # pylint: disable-msg=R0913,R0917
+                db: Database, name: str, host_id: int, st: State,
+                hit: bool, x: float, stamp: int, message: str) -> Alert:
+        """Raise or end an Alert. The caller must hold the lock."""
+        key: Final[tuple[str, int]] = (name, host_id)
+        if hit:
+            a = Alert(host_id=host_id,
+                      rule=name,
+                      started=stamp,
+                      value=x,
+                      message=message)
+            db.alert_add(a)
+            self.alerts[key] = a
+            alerts_raised.inc((name, ))
+            self.log.info("Alert %s for Host %d: %s", name, host_id, a.message)
+        else:
+            db.alert_close(host_id, name, stamp)
+            a = self.alerts.pop(key) if key in self.alerts \
+                else Alert(host_id=host_id, rule=name, started=stamp)
+            a.ended = stamp
+            self.log.info("Alert %s for Host %d has ended", name, host_id)
+        st.active = hit
+        st.streak = 0
+        return a
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
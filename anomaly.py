@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 08:30:29 krylon>
+#
+# /data/code/python/medusa/anomaly.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.anomaly
+
+(c) 2026 Benjamin Walkenhorst
+
+Online detection of unusual values, per Host, source and value.
+
+For each value we keep an exponentially weighted moving average and
+variance, which take constant memory and are updated with every sample. A
+sample that is more than a few standard deviations away from the average is
+considered an anomaly. What counts as normal thus adapts to each Host, so a
+load of 4 may be alarming on one machine and business as usual on another.
+
+The statistics only live in memory. After a restart, each value needs a
+number of samples to warm up before anything is reported.
+"""
+
+import math
+from collections import deque
+from threading import Lock
+from typing import Final, Iterable, NamedTuple
+
+from medusa import metrics
+from medusa.data import AnyRecord
+
+# The sources we watch. The CPU frequency jumps around too much to be useful.
+SOURCES: Final[frozenset[str]] = frozenset(("sysload", "sensors", "disk"))
+
+ALPHA: Final[float] = 0.05
+THRESHOLD: Final[float] = 4.0
+WARMUP: Final[int] = 30
+# How many anomalies we remember per Host and source, for charts.
+HISTORY: Final[int] = 256
+# Values that barely ever change would otherwise have a standard deviation
+# of next to nothing, making every little wiggle an anomaly.
+MIN_REL_STD: Final[float] = 0.01
+
+anomalies_detected: Final[metrics.Counter] = metrics.registry.counter(
+    "medusa_anomalies_total",
+    "Unusual values detected in incoming Records, per source",
+    ("source", ))
+
+
+class Anomaly(NamedTuple):
+    """Anomaly is a sample that deviates a lot from what we are used to."""
+
+    stamp: int
+    name: str
+    value: float
+    mean: float
+    score: float
+
+    def describe(self) -> str:
+        """Return a textual description of the Anomaly."""
+        return f"{self.name} = {self.value:.2f}, usually {self.mean:.2f} ({self.score:+.1f} σ)"
+
+
+class Stats:  # pylint: disable-msg=R0903
+    """Stats holds the moving average and variance of one value."""
+
+    __slots__ = [
+        "mean",
+        "var",
+        "count",
+        "stamp",
+    ]
+
+    mean: float
+    var: float
+    count: int
+    stamp: int
+
+    def __init__(self) -> None:
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+        self.stamp = 0
+
+    def update(self, x: float, alpha: float) -> None:
+        """Add a sample."""
+        if self.count == 0:
+            self.mean = x
+        else:
+            diff = x - self.mean
+            incr = alpha * diff
+            self.mean += incr
+            self.var = (1 - alpha) * (self.var + diff * incr)
+        self.count += 1
+
+    def score(self, x: float) -> float:
+        """Return how many standard deviations x is away from the average."""
+        std: Final[float] = max(math.sqrt(self.var), MIN_REL_STD * abs(self.mean), 1e-9)
+        return (x - self.mean) / std
+
+
+class Detector:
+    """Detector watches the values of incoming Records for anomalies."""
+
+    __slots__ = [
+        "lock",
+        "alpha",
+        "threshold",
+        "warmup",
+        "stats",
+        "found",
+    ]
+
+    lock: Lock
+    alpha: float
+    threshold: float
+    warmup: int
+    stats: dict[tuple[int, str, str], Stats]
+    found: dict[tuple[int, str], deque[Anomaly]]
+
+    def __init__(self,
+                 alpha: float = ALPHA,
+                 threshold: float = THRESHOLD,
+                 warmup: int = WARMUP) -> None:
+        assert 0 < alpha < 1
+        self.lock = Lock()
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.stats = {}
+        self.found = {}
+
+    def update(self, host_id: int, records: Iterable[AnyRecord]) -> list[Anomaly]:
+        """Feed freshly ingested Records to the Detector, return the anomalies among them.
+
+        Samples older than the most recent one we have seen for the same value
+        are ignored.
+        """
+        result: list[Anomaly] = []
+        with self.lock:
+            for rec in records:
+                src = rec.source()
+                if src not in SOURCES:
+                    continue
+                for name, x in rec.values().items():
+                    key = (host_id, src, name)
+                    st = self.stats.get(key)
+                    if st is None:
+                        st = Stats()
+                        self.stats[key] = st
+                    elif rec.timestamp <= st.stamp:
+                        continue
+                    st.stamp = rec.timestamp
+                    if st.count >= self.warmup:
+                        z = st.score(x)
+                        if abs(z) > self.threshold:
+                            a = Anomaly(rec.timestamp, name, x, st.mean, z)
+                            self._remember(host_id, src, a)
+                            anomalies_detected.inc((src, ))
+                            result.append(a)
+                    st.update(x, self.alpha)
+        return result
+
+    def _remember(self, host_id: int, source: str, a: Anomaly) -> None:
+        """Add an Anomaly to the history. The caller must hold the lock."""
+        q = self.found.get((host_id, source))
+        if q is None:
+            q = deque(maxlen=HISTORY)
+            self.found[(host_id, source)] = q
+        q.append(a)
+
+    def get(self, host_id: int, source: str, since: int = 0) -> list[Anomaly]:
+        """Return the anomalies found for a Host and source, oldest first."""
+        with self.lock:
+            q = self.found.get((host_id, source))
+            if q is None:
+                return []
+            return [a for a in q if a.stamp >= since]
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 09:30:45 krylon>
+#
+# /data/code/python/medusa/assets.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.assets
+
+(c) 2026 Benjamin Walkenhorst
+
+Static files for the web interface, kept in memory along with compressed
+variants and their ETags, so we only touch the disk once per file.
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Final, Optional
+
+from medusa import common
+
+try:
+    import brotli  # type: ignore
+except ImportError:
+    brotli = None  # pylint: disable-msg=C0103
+
+mime_types: Final[dict[str, str]] = {
+    ".css":  "text/css",
+    ".map":  "application/json",
+    ".js":   "text/javascript",
+    ".png":  "image/png",
+    ".jpg":  "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+    ".gif":  "image/gif",
+    ".json": "application/json",
+    ".html": "text/html",
+    ".svg":  "image/svg+xml",
+    ".ico":  "image/vnd.microsoft.icon",
+}
+
+# Compressing images that are compressed already is a waste of time.
+compressible: Final[set[str]] = {
+    "text/css",
+    "text/javascript",
+    "text/html",
+    "application/json",
+    "image/svg+xml",
+}
+
+suffix_pat: Final[re.Pattern] = re.compile("([.][^.]+)$")
+
+# Files smaller than this are not worth compressing.
+MIN_COMPRESS: Final[int] = 1024
+
+etag_pat: Final[re.Pattern] = re.compile(r'(?:W/)?("[^"]*")|(\*)')
+
+
+def find_mime_type(path: str) -> str:
+    """Attempt to determine the MIME type for a file."""
+    m = suffix_pat.search(path)
+    if m is None:
+        return "application/octet-stream"
+    suffix = m[1]
+    if suffix in mime_types:
+        return mime_types[suffix]
+    return "application/octet-stream"
+
+
+def etag_match(header: str, etag: str) -> bool:
+    """Return True if an If-None-Match header matches the given ETag.
+
+    If-None-Match uses the weak comparison, so a W/ prefix is ignored.
+    """
+    for m in etag_pat.finditer(header):
+        if m[2] is not None or m[1] == etag:
+            return True
+    return False
+
+
+def parse_accept(header: str) -> dict[str, float]:
+    """Parse an Accept-Encoding header into a dict of codings and their weights.
+
+    Coding names are lowercased, a missing q counts as 1, an invalid one as 0.
+    """
+    weights: dict[str, float] = {}
+    for item in header.split(","):
+        name, *params = item.split(";")
+        name = name.strip().lower()
+        if name == "":
+            continue
+        q: float = 1.0
+        for p in params:
+            key, _, val = p.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = min(max(float(val), 0.0), 1.0)
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+    return weights
+
+
+@dataclass(slots=True, kw_only=True)
+class Asset:
+    """Asset is a static file, along with compressed variants of its content."""
+
+    name: str
+    mtype: str
+    mtime: float
+    body: bytes
+    variants: dict[str, bytes]
+    etag: str
+
+    def size(self) -> int:
+        """Return the amount of memory used by the content, in bytes."""
+        return len(self.body) + sum(len(v) for v in self.variants.values())
+
+    def select(self, accept: str) -> tuple[str, bytes]:
+        """Pick the best encoding the client accepts, given an Accept-Encoding header.
+
+        Codings the client ranks higher are preferred, those with q=0 are
+        never used. Returns the encoding (the empty string meaning none) and
+        the content.
+        """
+        weights: Final[dict[str, float]] = parse_accept(accept)
+        best: str = ""
+        best_q: float = 0.0
+        for enc in ("br", "gzip"):
+            q = weights.get(enc, weights.get("*", 0.0))
+            if q > best_q and enc in self.variants:
+                best, best_q = enc, q
+        if best == "":
+            return "", self.body
+        return best, self.variants[best]
+
+    def tag(self, encoding: str) -> str:
+        """Return the ETag for the given encoding of the Asset.
+
+        Strong ETags must differ between representations, so compressed
+        variants get a suffix.
+        """
+        if encoding == "":
+            return f'"{self.etag}"'
+        return f'"{self.etag}-{encoding}"'
+
+
+class AssetCache:
+    """AssetCache keeps static files in memory, up to a given total size.
+
+    When the limit is exceeded, the least recently used files are evicted.
+    Files larger than a quarter of the limit are not cached at all.
+    """
+
+    __slots__ = [
+        "log",
+        "lock",
+        "root",
+        "limit",
+        "used",
+        "assets",
+    ]
+
+    log: logging.Logger
+    lock: Lock
+    root: str
+    limit: int
+    used: int
+    assets: OrderedDict[str, Asset]
+
+    def __init__(self, root: str, limit: int) -> None:
+        self.log = common.get_logger("AssetCache")
+        self.lock = Lock()
+        self.root = os.path.realpath(root)
+        self.limit = limit
+        self.used = 0
+        self.assets = OrderedDict()
+
+    def path(self, name: str) -> Optional[str]:
+        """Return the full path of a static file, or None if it is outside our root."""
+        full: Final[str] = os.path.realpath(os.path.join(self.root, name))
+        if not full.startswith(self.root + os.sep):
+            return None
+        return full
+
+    def cacheable(self, name: str) -> bool:
+        """Return True if the file is small enough to be cached."""
+        full = self.path(name)
+        if full is None or not os.path.isfile(full):
+            return False
+        return os.path.getsize(full) <= self.limit // 4
+
+    def get(self, name: str) -> Optional[Asset]:
+        """Return the Asset for the given file name, loading it if necessary.
+
+        Returns None if the file does not exist or is too big to be cached.
+        """
+        with self.lock:
+            asset = self.assets.get(name)
+            if asset is not None:
+                if not common.DEBUG or not self._stale(asset):
+                    self.assets.move_to_end(name)
+                    return asset
+                self._evict(name)
+
+        if not self.cacheable(name):
+            return None
+
+        asset = self._load(name)
+        with self.lock:
+            if name in self.assets:
+                self._evict(name)
+            self.assets[name] = asset
+            self.used += asset.size()
+            while self.used > self.limit and len(self.assets) > 1:
+                oldest = next(iter(self.assets))
+                self.log.debug("Evict %s from cache", oldest)
+                self._evict(oldest)
+        return asset
+
+    def _evict(self, name: str) -> None:
+        """Remove an Asset from the cache. The caller must hold the lock."""
+        asset = self.assets.pop(name)
+        self.used -= asset.size()
+
+    def _stale(self, asset: Asset) -> bool:
+        """Return True if the file has been modified since we loaded it."""
+        full = self.path(asset.name)
+        try:
+            return full is None or os.path.getmtime(full) != asset.mtime
+        except OSError:
+            return True
+
+    def _load(self, name: str) -> Asset:
+        """Read a file from disk and prepare compressed variants of it.
+
+        If precompressed files (e.g. foo.js.gz, foo.js.br) exist next to the
+        original, we use those instead of compressing it ourselves.
+        """
+        full = self.path(name)
+        assert full is not None
+        mtime: Final[float] = os.path.getmtime(full)
+        with open(full, "rb") as fh:
+            body: Final[bytes] = fh.read()
+
+        mtype: Final[str] = find_mime_type(name)
+        variants: dict[str, bytes] = {}
+        for enc, ext in (("gzip", ".gz"), ("br", ".br")):
+            pre = full + ext
+            if os.path.isfile(pre) and os.path.getmtime(pre) >= mtime:
+                with open(pre, "rb") as fh:
+                    variants[enc] = fh.read()
+
+        if mtype in compressible and len(body) >= MIN_COMPRESS:
+            if "gzip" not in variants:
+                variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if "br" not in variants and brotli is not None:
+                variants["br"] = brotli.compress(body)
+
+        # Only keep variants that actually save something.
+        variants = {k: v for k, v in variants.items() if len(v) < len(body)}
+
+        return Asset(
+            name=name,
+            mtype=mtype,
+            mtime=mtime,
+            body=body,
+            variants=variants,
+            etag=hashlib.blake2b(body, digest_size=16).hexdigest(),
+        )
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
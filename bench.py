@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 09:31:56 krylon>
+#
+# /data/code/python/medusa/bench.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.bench
+
+(c) 2026 Benjamin Walkenhorst
+
+Benchmarks for the parts of Medusa where performance matters. Run it as
+
+    python3 -m medusa.bench [suite ...]
+
+It uses a scratch base directory, so your real data is left alone.
+Use --save to store the results as a baseline, and --compare to check a
+later run against that baseline for regressions.
+"""
+
+import argparse
+import json
+import os
+import pickle
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Final, NamedTuple, Optional
+
+from bottle import response
+
+from medusa import codec, common
+from medusa.data import DiskRecord, Host, LoadRecord, Record
+from medusa.database import (Database, Partition, QueryID, StorageSettings,
+                             db_queries)
+from medusa.proto import Message, MsgType
+from medusa.simulator import SimulatedHost
+from medusa.web import WebUI
+
+WEB_ROOT: Final[str] = os.path.join(os.path.dirname(os.path.abspath(__file__)), "web")
+
+# The storage settings the storage suite compares, see [Database] in the
+# configuration file.
+PROFILES: Final[dict[str, StorageSettings]] = {
+    "default": StorageSettings(),
+    "normal": StorageSettings(synchronous="normal"),
+    "cache": StorageSettings(synchronous="normal",
+                             cache_size=64 * 2**20,
+                             temp_store="memory"),
+    "mmap": StorageSettings(synchronous="normal",
+                            cache_size=64 * 2**20,
+                            temp_store="memory",
+                            mmap_size=256 * 2**20),
+    "pages": StorageSettings(synchronous="normal", page_size=16384),
+}
+
+
+class Result(NamedTuple):
+    """Result holds the timings of one benchmark, in seconds."""
+
+    name: str
+    runs: int
+    mean: float
+    p50: float
+    p99: float
+
+    def __str__(self) -> str:
+        return f"{self.name:<40} {self.runs:>7} {self.mean * 1000:>10.3f} " + \
+            f"{self.p50 * 1000:>10.3f} {self.p99 * 1000:>10.3f}"
+
+
+def measure(name: str,
+            fn: Callable[[], Any],
+            runs: int = 100,
+            warmup: int = 3,
+            setup: Optional[Callable[[], Any]] = None) -> Result:
+    """Call fn repeatedly and record how long it takes.
+
+    If setup is given, it is called before each run, outside of the measurement.
+    """
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        fn()
+
+    timings: list[float] = []
+    for _ in range(runs):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+
+    timings.sort()
+    return Result(
+        name=name,
+        runs=runs,
+        mean=statistics.fmean(timings),
+        p50=timings[len(timings) // 2],
+        p99=timings[min(int(len(timings) * 0.99), len(timings) - 1)],
+    )
+
+
+class Options(NamedTuple):
+    """Options holds the settings that apply to all suites."""
+
+    runs: int
+    rows: int
+
+
+Suite = Callable[[Options], list[Result]]
+suites: dict[str, Suite] = {}
+
+
+def suite(name: str) -> Callable[[Suite], Suite]:
+    """Register a function as a benchmark suite."""
+    def register(fn: Suite) -> Suite:
+        suites[name] = fn
+        return fn
+    return register
+
+
+def populate(db: Database, hosts: int, rows: int) -> list[Host]:
+    """Fill the database with simulated Hosts and about rows Records.
+
+    Rows are inserted in bulk with the query Database.record_add uses, because
+    this is the setup, not the thing we want to measure. The samples are
+    spaced one minute apart and end at the current time, so they span a few
+    partitions.
+    """
+    samples: Final[int] = max(rows // (hosts * 4), 1)
+    start: Final[int] = int(time.time()) - samples * 60
+    hlist: list[Host] = []
+    with db:
+        for i in range(hosts):
+            sim = SimulatedHost(i, interval=60, start=start)
+            h = Host(name=sim.name, os=sim.os, last_contact=datetime.now())
+            db.host_add(h)
+            hlist.append(h)
+
+            by_part: dict[Partition, list[tuple]] = {}
+            for r in sim.report(samples):
+                part = db.record_partition(r.timestamp)
+                by_part.setdefault(part, []).append(
+                    (part.base_id, h.host_id, r.timestamp, r.source(), r.payload()))
+
+            cur = db.db.cursor()
+            cur.execute("BEGIN")
+            for part, params in by_part.items():
+                cur.executemany(db_queries[QueryID.RecordAdd].format(table=part.name), params)
+            cur.execute("COMMIT")
+    return hlist
+
+
+@suite("render")
+def bench_render(opt: Options) -> list[Result]:
+    """Measure how long it takes to render the main pages of the web interface."""
+    runs: Final[int] = opt.runs
+    db = Database()
+    try:
+        hosts = populate(db, 20, 20 * 4 * 1440)
+    finally:
+        db.close()
+
+    ui = WebUI(WEB_ROOT)
+    response.bind()
+    results: list[Result] = [
+        measure("render main", ui.main, runs),
+        measure("render host details",
+                lambda: "".join(ui.host_details(hosts[0].host_id)),
+                runs),
+        measure("render probes", lambda: "".join(ui.handle_probe_view()), runs),
+    ]
+
+    def clear_cache() -> None:
+        shutil.rmtree(common.path.cache())
+        os.mkdir(common.path.cache())
+
+    # pylint: disable-msg=W0212
+    results.append(measure("compile templates (cold)",
+                           ui._make_env,
+                           max(runs // 10, 3),
+                           setup=clear_cache))
+    results.append(measure("compile templates (bytecode cache)",
+                           ui._make_env,
+                           max(runs // 10, 3)))
+    return results
+
+
+@suite("data")
+def bench_data(opt: Options) -> list[Result]:
+    """Measure (de-)serialization of Records."""
+    sample: Final[list[Record]] = SimulatedHost(0).sample()
+    results: list[Result] = []
+    for rec in sample:
+        src = rec.source()
+        payload = rec.payload()
+        stamp = rec.timestamp
+        results.append(measure(f"Record.payload ({src})", rec.payload, opt.runs * 100))
+
+        def decode(s: str = src, p: str = payload, t: int = stamp) -> None:
+            Record.get_instance(1, 1, t, s, p)
+
+        results.append(measure(f"Record.get_instance ({src})", decode, opt.runs * 100))
+    return results
+
+
+@suite("codec")
+def bench_codec(opt: Options) -> list[Result]:
+    """Compare our JSON encoding and decoding to plain json.dumps/json.loads."""
+    sample: Final[dict[str, Record]] = {r.source(): r for r in SimulatedHost(0).sample()}
+    load: Final[Record] = sample["sysload"]
+    disk: Final[Record] = sample["disk"]
+    assert isinstance(load, LoadRecord) and isinstance(disk, DiskRecord)
+    dpayload: Final[str] = json.dumps(disk.disks)
+    msg: Final[Message] = Message(status=MsgType.Success, msg="Data was processed successfully.")
+    points: Final[list[tuple[int, float]]] = [(i * 60000, i / 7) for i in range(500)]
+    chart: Final[dict[str, Any]] = {
+        "status": True,
+        "series": {"a": points, "b": points, "c": points},
+    }
+    runs: Final[int] = opt.runs * 100
+    print(f"JSON backend: {codec.BACKEND}", file=sys.stderr)
+
+    return [
+        measure("payload sysload (json.dumps)", lambda: json.dumps(load.load), runs),
+        measure("payload sysload (LoadRecord)", load.payload, runs),
+        measure("payload disk (json.dumps)", lambda: json.dumps(disk.disks), runs),
+        measure("payload disk (codec)", disk.payload, runs),
+        measure("decode disk (json.loads)", lambda: json.loads(dpayload), runs),
+        measure("decode disk (codec)", lambda: codec.loads(dpayload), runs),
+        measure("Message (json.dumps)",
+                lambda: json.dumps({"status": msg.status,
+                                    "timestamp": msg.timestamp,
+                                    "msg": msg.msg}),
+                runs),
+        measure("Message (Message.json)", msg.json, runs),
+        measure("series 3x500 (json.dumps)", lambda: json.dumps(chart), opt.runs),
+        measure("series 3x500 (codec)", lambda: codec.dumps(chart), opt.runs),
+    ]
+
+
+@suite("database")
+def bench_database(opt: Options) -> list[Result]:
+    """Measure the hot paths in the Database on a large database."""
+    db = Database()
+    try:
+        t0 = time.perf_counter()
+        hosts = populate(db, 50, opt.rows)
+        print(f"Populated database with {opt.rows} records in {time.perf_counter() - t0:.1f} s",
+              file=sys.stderr)
+
+        sim = SimulatedHost(len(hosts) + 1)
+        host = Host(name=sim.name, os=sim.os, last_contact=datetime.now())
+        with db:
+            db.host_add(host)
+
+        def add_report() -> None:
+            with db:
+                for r in sim.report(1):
+                    r.host_id = host.host_id
+                    db.record_add(r)
+
+        return [
+            measure("Database.record_add (4 records)", add_report, opt.runs),
+            measure("Database.record_get_by_host_probe (24h)",
+                    lambda: db.record_get_by_host_probe(hosts[0], "sysload"),
+                    opt.runs),
+            measure("Database.record_get_by_host (1440)",
+                    lambda: db.record_get_by_host(hosts[0], 1440),
+                    opt.runs),
+            measure("Database.record_get_by_host (1440, lazy)",
+                    lambda: db.record_get_by_host(hosts[0], 1440, lazy=True),
+                    opt.runs),
+            measure("Database.record_get_by_probe (24h)",
+                    lambda: db.record_get_by_probe("sysload"),
+                    max(opt.runs // 10, 3)),
+        ]
+    finally:
+        db.close()
+
+
+@suite("storage")
+def bench_storage(opt: Options) -> list[Result]:
+    """Compare ingest and queries with each of the storage PROFILES.
+
+    Each profile gets a database of its own, with a fifth of the rows of
+    the database suite.
+    """
+    rows: Final[int] = max(opt.rows // 5, 1000)
+    results: list[Result] = []
+    for name, storage in PROFILES.items():
+        path = os.path.join(os.path.dirname(common.path.db()), f"storage_{name}.db")
+        db = Database(path, storage=storage)
+        try:
+            t0 = time.perf_counter()
+            hosts = populate(db, 50, rows)
+            elapsed: float = time.perf_counter() - t0
+            # The profiles checkpoint at different intervals, so we move everything
+            # into the database file itself before comparing the sizes.
+            db.db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            size: float = sum(os.path.getsize(f) for f in (path, f"{path}-wal")
+                              if os.path.exists(f)) / 2**20
+            print(f"Populated database for {name} with {rows} records in "
+                  f"{elapsed:.1f} s, {size:.1f} MiB",
+                  file=sys.stderr)
+            results.extend(measure_profile(name, db, hosts, opt.runs))
+        finally:
+            db.close()
+    return results
+
+
+def measure_profile(name: str, db: Database, hosts: list[Host], runs: int) -> list[Result]:
+    """Measure ingest and queries on a database populated for one of the storage PROFILES."""
+    sim = SimulatedHost(len(hosts) + 1)
+    host = Host(name=sim.name, os=sim.os, last_contact=datetime.now())
+    with db:
+        db.host_add(host)
+
+    def add_report() -> None:
+        with db:
+            for r in sim.report(1):
+                r.host_id = host.host_id
+                db.record_add(r)
+
+    def by_host_probe() -> None:
+        db.record_get_by_host_probe(hosts[0], "sysload")
+
+    def by_host() -> None:
+        db.record_get_by_host(hosts[0], 1440, lazy=True)
+
+    def by_probe() -> None:
+        db.record_get_by_probe("sysload", lazy=True)
+
+    return [
+        measure(f"{name}: record_add (4 records)", add_report, runs),
+        measure(f"{name}: record_get_by_host_probe", by_host_probe, runs),
+        measure(f"{name}: record_get_by_host (1440)", by_host, runs),
+        measure(f"{name}: record_get_by_probe (24h)", by_probe, max(runs // 10, 3)),
+    ]
+
+
+@suite("spool")
+def bench_spool(opt: Options) -> list[Result]:
+    """Measure how the Agent writes reports to and reads them from the spool directory.
+
+    This mirrors Agent.collect_data and Agent.process_data, minus the network.
+    """
+    sim = SimulatedHost(0)
+    spool: Final[str] = common.path.spool()
+    seq: list[int] = [0]
+
+    def write() -> None:
+        xfr = pickle.dumps(sim.report(1))
+        seq[0] += 1
+        path = os.path.join(spool, f"tmp.{seq[0]:08d}.data")
+        with open(path, "wb") as fh:
+            fh.write(xfr)
+        os.rename(path, path.replace("tmp.", ""))
+
+    def read() -> None:
+        with os.scandir(spool) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.startswith("tmp."):
+                    with open(entry.path, "rb") as fh:
+                        pickle.loads(fh.read())
+                    os.remove(entry.path)
+
+    def fill() -> None:
+        for _ in range(10):
+            write()
+
+    return [
+        measure("spool write (1 report)", write, opt.runs),
+        measure("spool read (10 reports)", read, opt.runs, setup=fill),
+    ]
+
+
+@suite("chart")
+def bench_chart(opt: Options) -> list[Result]:
+    """Measure rendering of charts, both SVG and JSON."""
+    db = Database()
+    try:
+        hosts = populate(db, 20, 20 * 4 * 1440)
+    finally:
+        db.close()
+
+    ui = WebUI(WEB_ROOT)
+    response.bind()
+    hid: Final[int] = hosts[0].host_id
+    runs: Final[int] = max(opt.runs // 10, 3)
+    return [
+        measure("chart sysload (SVG)", lambda: ui.host_load_graph(hid), runs),
+        measure("chart sensors (SVG)", lambda: ui.host_sensor_graph(hid), runs),
+        measure("chart disk (SVG)", lambda: ui.host_disk_graph(hid), runs),
+        measure("chart sysload (JSON)", lambda: ui.handle_series(hid, "sysload"), runs),
+        measure("chart sysload, all hosts (JSON)",
+                lambda: ui.handle_probe_series("sysload"),
+                runs),
+    ]
+
+
+def save_baseline(path: str, results: list[Result]) -> None:
+    """Save the results to a file to compare later runs against."""
+    doc = {
+        "timestamp": datetime.now().strftime(common.TIME_FMT),
+        "python": platform.python_version(),
+        "machine": platform.node(),
+        "results": {r.name: r._asdict() for r in results},
+    }
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(doc, fh, indent=2)
+
+
+def compare(path: str, results: list[Result], threshold: float) -> bool:
+    """Compare results against a saved baseline, using the median.
+
+    Prints a table of the differences and returns False if any benchmark got
+    slower by more than threshold (a fraction, i.e. 0.1 means 10%).
+    """
+    with open(path, "r", encoding="utf-8") as fh:
+        doc = json.load(fh)
+    baseline: Final[dict[str, dict]] = doc["results"]
+    ok: bool = True
+
+    print(f"\nCompared to baseline from {doc['timestamp']} ({doc['machine']}):")
+    print(f"{'Benchmark':<40} {'Base (ms)':>10} {'Now (ms)':>10} {'Change':>8}")
+    for r in results:
+        if r.name not in baseline:
+            print(f"{r.name:<40} {'-':>10} {r.p50 * 1000:>10.3f} {'new':>8}")
+            continue
+        base: float = baseline[r.name]["p50"]
+        change: float = (r.p50 - base) / base if base > 0 else 0.0
+        flag: str = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            ok = False
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{r.name:<40} {base * 1000:>10.3f} {r.p50 * 1000:>10.3f} "
+              f"{change * 100:>7.1f}%{flag}")
+    return ok
+
+
+def main() -> None:
+    """Run the benchmarks given on the command line, or all of them."""
+    parser = argparse.ArgumentParser(
+        prog=f"{common.APP_NAME.lower()}-bench",
+        description="Run performance benchmarks",
+    )
+    parser.add_argument("suite", nargs="*",
+                        help=f"The suites to run, out of {', '.join(sorted(suites))} "
+                        "(default: all)")
+    parser.add_argument("-r", "--runs", type=int, default=100)
+    parser.add_argument("-n", "--rows", type=int, default=1_000_000,
+                        help="Number of records in the database "
+                        "for the database and storage suites")
+    parser.add_argument("-b", "--basedir", default="",
+                        help="Base directory to use (default: a temporary directory)")
+    parser.add_argument("-s", "--save", metavar="PATH",
+                        help="Save the results as a baseline")
+    parser.add_argument("-c", "--compare", metavar="PATH",
+                        help="Compare the results against a baseline")
+    parser.add_argument("-t", "--threshold", type=float, default=0.1,
+                        help="Slowdown (as a fraction) to report as a regression")
+    args = parser.parse_args()
+
+    for name in args.suite:
+        if name not in suites:
+            parser.error(f"Unknown suite {name}")
+
+    basedir: str = args.basedir
+    if basedir == "":
+        basedir = tempfile.mkdtemp(prefix=f"{common.APP_NAME.lower()}_bench_")
+    os.makedirs(basedir, exist_ok=True)
+
+    opt = Options(runs=args.runs, rows=args.rows)
+    results: list[Result] = []
+    print(f"{'Benchmark':<40} {'Runs':>7} {'Mean (ms)':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    for name in (args.suite or sorted(suites)):
+        # Each suite gets a fresh base directory, and thus a fresh database.
+        common.set_basedir(os.path.join(basedir, name))
+        for res in suites[name](opt):
+            print(res)
+            results.append(res)
+
+    if args.save:
+        save_baseline(args.save, results)
+    if args.compare and not compare(args.compare, results, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 08:09:14 krylon>
+#
+# /data/code/python/medusa/cache.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.cache
+
+(c) 2026 Benjamin Walkenhorst
+
+In-memory copies of things we would otherwise ask the database for over and
+over again.
+"""
+
+from dataclasses import replace
+from datetime import datetime
+from threading import Lock
+from typing import Iterable, Optional
+
+from medusa.data import Host, Record
+from medusa.database import Database
+
+
+class LatestValues:
+    """LatestValues holds the most recent Record per Host and source."""
+
+    __slots__ = [
+        "lock",
+        "values",
+    ]
+
+    lock: Lock
+    values: dict[int, dict[str, Record]]
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.values = {}
+
+    def load(self, db: Database) -> None:
+        """Fill the cache from the database."""
+        records = db.record_get_latest()
+        with self.lock:
+            self.values.clear()
+        self.update(records)
+
+    def update(self, records: Iterable[Record]) -> None:
+        """Remember the Records, unless we already know about a more recent one."""
+        with self.lock:
+            for r in records:
+                src = r.source()
+                if r.host_id not in self.values:
+                    self.values[r.host_id] = {src: r}
+                    continue
+                hvals = self.values[r.host_id]
+                if src not in hvals or hvals[src].timestamp <= r.timestamp:
+                    hvals[src] = r
+
+    def get(self, host_id: int) -> dict[str, Record]:
+        """Return the most recent Record of each source for the given Host."""
+        with self.lock:
+            return dict(self.values.get(host_id, {}))
+
+    def get_all(self) -> dict[int, dict[str, Record]]:
+        """Return the most recent Records for all Hosts."""
+        with self.lock:
+            return {hid: dict(v) for hid, v in self.values.items()}
+
+
+class HostCache:
+    """HostCache maps Host names and IDs to Hosts, so we do not need to ask the database.
+
+    Hosts are never renamed or removed, so an entry, once cached, stays valid.
+    If a lookup misses the cache, we ask the database, in case the Host was
+    added by a different thread or process, and remember the answer.
+    All methods return copies, so callers may modify the Hosts they get.
+    """
+
+    __slots__ = [
+        "lock",
+        "by_name",
+        "by_id",
+    ]
+
+    lock: Lock
+    by_name: dict[str, Host]
+    by_id: dict[int, Host]
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.by_name = {}
+        self.by_id = {}
+
+    def load(self, db: Database) -> None:
+        """Fill the cache from the database."""
+        hosts = db.host_get_all()
+        with self.lock:
+            self.by_name.clear()
+            self.by_id.clear()
+            for h in hosts:
+                self.by_name[h.name] = h
+                self.by_id[h.host_id] = h
+
+    def add(self, host: Host) -> None:
+        """Add a Host to the cache, after it has been added to the database."""
+        assert host.host_id > 0
+        h = replace(host)
+        with self.lock:
+            self.by_name[h.name] = h
+            self.by_id[h.host_id] = h
+
+    def get_by_name(self, db: Database, name: str) -> Optional[Host]:
+        """Look up a Host by its name."""
+        with self.lock:
+            h = self.by_name.get(name)
+            if h is not None:
+                return replace(h)
+        h = db.host_get_by_name(name)
+        if h is not None:
+            self.add(h)
+        return h
+
+    def get_by_id(self, db: Database, host_id: int) -> Optional[Host]:
+        """Look up a Host by its ID."""
+        with self.lock:
+            h = self.by_id.get(host_id)
+            if h is not None:
+                return replace(h)
+        h = db.host_get_by_id(host_id)
+        if h is not None:
+            self.add(h)
+        return h
+
+    def get_all(self) -> list[Host]:
+        """Return all Hosts, sorted by name."""
+        with self.lock:
+            return [replace(self.by_name[n]) for n in sorted(self.by_name)]
+
+    def touch(self, host_id: int, stamp: datetime) -> None:
+        """Update the last_contact timestamp of a Host.
+
+        The database does this via a trigger when records are added, this
+        keeps our copy in sync.
+        """
+        with self.lock:
+            h = self.by_id.get(host_id)
+            if h is not None:
+                h.last_contact = stamp
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
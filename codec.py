@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 09:11:43 krylon>
+#
+# /data/code/python/medusa/codec.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.codec
+
+(c) 2026 Benjamin Walkenhorst
+
+JSON encoding and decoding. If orjson is installed, we use it, otherwise we
+fall back to the json module from the standard library.
+
+The output of the two backends differs in whitespace, so nothing must
+depend on the exact formatting of what dumps returns.
+"""
+
+import json
+from json.encoder import encode_basestring_ascii
+from typing import Any, Callable, Final, Union
+
+# Encodes a str as a JSON string literal, quotes included, exactly like
+# json.dumps does. It is implemented in C, so it is pretty fast.
+encode_str: Final = encode_basestring_ascii
+
+
+def _default(obj: Any) -> Any:
+    """Convert objects orjson does not handle natively, i.e. NamedTuples."""
+    if isinstance(obj, tuple):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {obj.__class__.__name__}")
+
+
+# The backend is picked once, when the module is loaded, so calling loads
+# and dumps costs no more than calling the backend directly.
+BACKEND: str
+loads: Callable[[Union[str, bytes]], Any]
+dumps: Callable[[Any], str]
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    BACKEND = "json"
+    loads = json.loads
+    dumps = json.dumps
+else:
+    BACKEND = "orjson"
+
+    def _dumps_orjson(obj: Any) -> str:
+        """Encode an object as JSON."""
+        return orjson.dumps(obj, default=_default).decode()
+
+    loads = orjson.loads
+    dumps = _dumps_orjson
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
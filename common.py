@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Time-stamp: <2025-06-02 18:54:31 krylon>
+# Time-stamp: <2026-10-19 09:07:38 krylon>
 #
 # /data/code/python/medusa/common.py
 # created on 24. 01. 2024
@@ -19,7 +19,8 @@ medusa.common
 import logging
 import logging.handlers
 import os
-from typing import Final
+import time
+from typing import Final, Iterable
 from threading import Lock
 
 APP_NAME: Final[str] = "Medusa"
@@ -75,6 +76,14 @@ class Path:
         """Return the path of the configuration file"""
         return os.path.join(self.__base, "settings.toml")
 
+    def cache(self) -> str:
+        """Return the path of the cache directory, e.g. for compiled templates."""
+        return os.path.join(self.__base, "cache")
+
+    def stats(self) -> str:
+        """Return the path of the file the Agent writes its metrics to."""
+        return os.path.join(self.__base, "agent.stats")
+
 
 path: Path = Path(os.path.expanduser(f"~/.{APP_NAME.lower()}.d"))
 
@@ -95,6 +104,52 @@ def init_app() -> None:
         os.mkdir(path.base())
     if not os.path.isdir(path.spool()):
         os.mkdir(path.spool())
+    if not os.path.isdir(path.cache()):
+        os.mkdir(path.cache())
+
+
+# Maps hours since the epoch to the local date and hour, plus the local
+# minute and second at the start of that hour. Hours in which the offset to
+# UTC changes map to an empty prefix.
+_hour_cache: Final[dict[int, tuple[str, int, int]]] = {}  # pylint: disable-msg=C0103
+
+
+def fmt_stamp(stamp: int) -> str:
+    """Format seconds since the epoch as local time, like strftime(TIME_FMT) does.
+
+    Charts and listings format thousands of timestamps at once, and most of
+    them share the date and hour, so we only ask the C library once per hour.
+    Some time zones change their offset to UTC in the middle of an hour,
+    timestamps in those hours are formatted one by one.
+    """
+    hour, sec = divmod(stamp, 3600)
+    ent = _hour_cache.get(hour)
+    if ent is None:
+        if len(_hour_cache) >= 8192:
+            _hour_cache.clear()
+        lt = time.localtime(hour * 3600)
+        if lt.tm_gmtoff != time.localtime(hour * 3600 + 3599).tm_gmtoff:
+            ent = ("", 0, 0)
+        else:
+            ent = (time.strftime("%Y-%m-%d %H:", lt), lt.tm_min, lt.tm_sec)
+        _hour_cache[hour] = ent
+    if ent[0] == "":
+        return time.strftime(TIME_FMT, time.localtime(stamp))
+    minute, sec = divmod(sec, 60)
+    minute += ent[1]
+    sec += ent[2]
+    if sec >= 60:
+        minute += 1
+        sec -= 60
+    if minute >= 60:
+        # Time zones with an offset that is not a full hour end up here.
+        return time.strftime(TIME_FMT, time.localtime(stamp))
+    return f"{ent[0]}{minute:02d}:{sec:02d}"
+
+
+def fmt_stamps(stamps: Iterable[int]) -> list[str]:
+    """Format a bunch of timestamps, e.g. for the labels of a chart."""
+    return [fmt_stamp(s) for s in stamps]
 
 
 def get_logger(name: str, terminal: bool = True) -> logging.Logger:
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Time-stamp: <2025-06-02 19:32:14 krylon>
+# Time-stamp: <2026-10-19 08:52:19 krylon>
 #
 # /data/code/python/medusa/config.py
 # created on 09. 05. 2025
@@ -22,7 +22,7 @@ from typing import Any, Final
 
 import krylib
 import tomlkit
-from tomlkit.items import Table
+from tomlkit.items import AoT, Table
 from tomlkit.toml_document import Container, TOMLDocument
 from tomlkit.toml_file import TOMLFile
 
@@ -41,6 +41,9 @@ Interval = 60
 Probes = [ "cpu", "sysload", "sensors", "disk" ]
 Server = "schwarzgeraet"
 Interval = 10
+# Tags to group Hosts by, in addition to os, version and arch, e.g.
+# Labels = {{ rack = "3", role = "db" }}
+Labels = {{}}
 
 [Server]
 Address = "::"
@@ -49,10 +52,115 @@ Address = "::"
 Host = "localhost"
 Port = 9001
 Timeout = 10.0
+# Size of the in-memory cache for static files, in MiB
+StaticCache = 16
+# How many hours of recent data to keep in memory for charts, and how much
+# memory to use for it at most, in MiB
+SeriesHours = 24
+SeriesBuffer = 64
+
+[Liveness]
+# A Host is considered stale if we have not heard from it for this many probe
+# intervals, and down after this many
+Stale = 3
+Down = 10
+
+[Anomaly]
+# Values are compared to their exponentially weighted moving average. Alpha
+# is the weight of each new sample, a value more than Threshold standard
+# deviations away from the average is an anomaly. Nothing is reported until
+# a value has been seen Warmup times.
+Alpha = 0.05
+Threshold = 4.0
+Warmup = 30
+
+[Forecast]
+# How quickly old samples lose their influence on the disk space trend, in
+# hours, and how far ahead we look for file systems running full, in days
+HalfLife = 24
+Horizon = 30
+
+[Rollup]
+# Values are summarized per period of this many minutes, including a sketch
+# to compute quantiles from, accurate to within Alpha (relative error).
+# Without any summaries, we start with the last Backfill days.
+Minutes = 60
+Alpha = 0.01
+Backfill = 7
+
+[Database]
+# Measure how long each query takes
+Timing = true
+# Log queries that take longer than this many seconds, 0 to disable
+SlowQuery = 0.25
+# Records are stored in one table per "day" or "week", so old ones can be
+# dropped a table at a time. Records older than Retention days are dropped
+# once they have been summarized, 0 keeps them forever.
+Partition = "day"
+Retention = 0
+# The web interface reads through up to Readers read-only connections, so
+# charts do not hold up Agents submitting data. The write-ahead log is
+# checkpointed when no reader is busy, once it has grown to Checkpoint MiB.
+Readers = 4
+Checkpoint = 4
+# How SQLite stores data, applied to every connection, see
+# https://sqlite.org/pragma.html. The defaults lose nothing if the power
+# goes out. Synchronous = "normal" saves a sync per transaction and cannot
+# corrupt the database, but a power outage may undo the last transactions.
+# CacheSize and MmapSize are in MiB, per connection. TempStore is one of
+# "default", "file", "memory". PageSize only applies to a new database.
+# WalAutocheckpoint is in pages, BusyTimeout in seconds.
+Synchronous = "full"
+CacheSize = 2
+MmapSize = 0
+TempStore = "default"
+PageSize = 4096
+WalAutocheckpoint = 1000
+BusyTimeout = 5
+
+# Alert rules, checked whenever an Agent sends data. Kind is one of
+#   "threshold" - Value is above Above or below Below
+#   "rate"      - Value changes faster than Above or Below per minute
+#   "nodata"    - no Record from Source for Intervals probe intervals
+# Value is one of the values of a Record, e.g. "load5", "/" for disk, or a
+# sensor name, or "score". An Alert is raised after the condition holds for
+# For consecutive samples, and ended after it has not held for as many.
+# Hosts optionally limits a rule to the Hosts named.
+[[Alert]]
+Name = "High load"
+Kind = "threshold"
+Source = "sysload"
+Value = "load5"
+Above = 8.0
+For = 3
+
+[[Alert]]
+Name = "Root file system full"
+Kind = "threshold"
+Source = "disk"
+Value = "/"
+Below = 1048576
+
+[[Alert]]
+Name = "Root file system filling up"
+Kind = "rate"
+Source = "disk"
+Value = "/"
+Below = -102400
+For = 3
+
+[[Alert]]
+Name = "Sensors silent"
+Kind = "nodata"
+Source = "sensors"
+Intervals = 5
 """
 
 open_lock: Final[Lock] = Lock()
 
+# Used to tell if the caller of Config.get passed a default value.
+_no_default: Final[object] = object()
+
 
 class Config:
     """Config handles reading and writing the configuration file."""
@@ -86,8 +194,19 @@ class Config:
 
         self.log = common.get_logger("Config")
 
-    def get(self, section: str, key: str) -> Any:
-        """Get a config value."""
+    def get(self, section: str, key: str, default: Any = _no_default) -> Any:
+        """Get a config value.
+
+        If a default is given, it is returned when the section or key is missing
+        from the configuration file, e.g. because the file was created by an older
+        version of the application.
+        """
+        if default is not _no_default:
+            if section not in self.doc:
+                return default
+            sec = self.doc[section]
+            if not isinstance(sec, Table) or key not in sec:
+                return default
         try:
             assert section in self.doc
             s = self.doc[section]
@@ -105,6 +224,18 @@ class Config:
                            krylib.fmt_err(err))
             raise
 
+    def tables(self, name: str) -> list[dict[str, Any]]:
+        """Return the entries of an array of tables, e.g. [[Alert]], as plain dicts.
+
+        If the configuration file has no such array, the list is empty.
+        """
+        if name not in self.doc:
+            return []
+        aot = self.doc[name]
+        if not isinstance(aot, AoT):
+            raise ValueError(f"{name} must be an array of tables, i.e. [[{name}]]")
+        return [t.unwrap() for t in aot]
+
     def update(self, section: str, key: str, val: Any) -> None:
         """Set a config value."""
         try:
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Time-stamp: <2025-06-05 17:59:40 krylon>
+# Time-stamp: <2026-10-19 09:27:48 krylon>
 #
 # /data/code/python/medusa/data.py
 # created on 18. 03. 2025
@@ -17,13 +17,15 @@ medusa.data
 """
 
 import json
+import math
 import re
+import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any, Final, NamedTuple, Optional, Union
 
-from medusa import common
+from medusa import codec, common
 
 name_short_pat: Final[re.Pattern] = \
     re.compile("^([^.]+)")
@@ -52,18 +54,125 @@ class Host:
         return m[1]
 
 
+# Tags are short name/value pairs attached to Hosts, like os=freebsd or rack=3.
+tag_name_pat: Final[re.Pattern] = re.compile(r"^[A-Za-z0-9_.-]{1,32}$")
+TAG_VALUE_MAX: Final[int] = 64
+TAGS_MAX: Final[int] = 32
+
+
+def parse_tags(raw: Any) -> dict[str, str]:
+    """Check the tags a Host sent, and return them as a dict of strings.
+
+    Numbers and booleans are accepted as values and turned into strings.
+    Raises ValueError if anything is amiss.
+    """
+    if not isinstance(raw, dict):
+        raise ValueError(f"Tags must be an object, not {type(raw).__name__}")
+    if len(raw) > TAGS_MAX:
+        raise ValueError(f"Too many tags: {len(raw)} > {TAGS_MAX}")
+    return {k: _tag_value(k, v) for k, v in raw.items()}
+
+
+def filter_tags(raw: Any) -> tuple[dict[str, str], list[str]]:
+    """Check the tags a Host sent, like parse_tags, but drop the invalid ones.
+
+    Only the first TAGS_MAX tags are kept. Returns the valid tags, and a
+    description of each problem found.
+    """
+    if not isinstance(raw, dict):
+        return {}, [f"Tags must be an object, not {type(raw).__name__}"]
+    tags: dict[str, str] = {}
+    problems: list[str] = []
+    for k, v in raw.items():
+        if len(tags) == TAGS_MAX:
+            problems.append(f"Too many tags, dropped {k!r}")
+            continue
+        try:
+            tags[k] = _tag_value(k, v)
+        except ValueError as err:
+            problems.append(str(err))
+    return tags, problems
+
+
+def _tag_value(name: Any, value: Any) -> str:
+    """Check a single tag, and return its value as a string.
+
+    Raises ValueError if the name or the value are not acceptable.
+    """
+    if not isinstance(name, str) or tag_name_pat.match(name) is None:
+        raise ValueError(f"Invalid tag name {name!r}")
+    if isinstance(value, bool):
+        value = "true" if value else "false"
+    elif isinstance(value, (int, float)):
+        value = str(value)
+    if not isinstance(value, str) or not 0 < len(value) <= TAG_VALUE_MAX:
+        raise ValueError(f"Invalid value for tag {name}: {value!r}")
+    return value
+
+
+@dataclass(slots=True, kw_only=True)
+class Alert:
+    """Alert records that a Host violated one of the alert rules for a while.
+
+    Timestamps are seconds since the epoch. While the Alert is active, ended is None.
+    """
+
+    alert_id: int = 0
+    host_id: int
+    rule: str
+    started: int
+    ended: Optional[int] = None
+    value: float = 0.0
+    message: str = ""
+
+    @property
+    def active(self) -> bool:
+        """Return True if the condition that triggered the Alert persists."""
+        return self.ended is None
+
+    def started_str(self) -> str:
+        """Return a textual representation of the time the Alert was raised."""
+        return common.fmt_stamp(self.started)
+
+    def ended_str(self) -> str:
+        """Return a textual representation of the time the Alert ended, if it has."""
+        return "" if self.ended is None else common.fmt_stamp(self.ended)
+
+
 @dataclass(slots=True)
 class Record(ABC):
-    """Record is the base class for data points collected on a Host."""
+    """Record is the base class for data points collected on a Host.
+
+    The timestamp is kept as seconds since the epoch, which is how the
+    database stores it. For convenience, a datetime may be passed when
+    creating a Record, it is converted right away.
+    """
 
     record_id: int = -1
     host_id: int = 0
-    timestamp: datetime = field(default_factory=datetime.now)
+    timestamp: int = field(default_factory=lambda: int(time.time()))
+
+    def __post_init__(self) -> None:
+        self.normalize()
+
+    def normalize(self) -> None:
+        """Make sure the timestamp is an int.
+
+        Records unpickled from older Agents still carry a datetime, and
+        unpickling does not call __post_init__.
+        """
+        if isinstance(self.timestamp, datetime):
+            self.timestamp = int(self.timestamp.timestamp())
+
+    @property
+    def dt(self) -> datetime:
+        """Return the timestamp as a datetime."""
+        return datetime.fromtimestamp(self.timestamp)
 
     @staticmethod
-    def get_instance(rid: int, hid: int, tstamp: datetime, src: str, pload: str) -> 'Record':
+    def get_instance(rid: int, hid: int, tstamp: int, src: str, pload: str) -> 'Record':
         """De-serialize an instance."""
-        raw: Any = json.loads(pload)
+        raw: Any = codec.loads(pload)
         match src:
             case 'cpu':
                 return CPURecord(
@@ -111,12 +220,16 @@ class Record(ABC):
 
     def timestr(self) -> str:
         """Return a string of the timestamp in ISO 8601 format."""
-        return self.timestamp.strftime(common.TIME_FMT)
+        return common.fmt_stamp(self.timestamp)
 
     @abstractmethod
     def score(self) -> Union[int, float]:
         """Return a numeric value to be used in rendering charts."""
 
+    @abstractmethod
+    def values(self) -> dict[str, Union[int, float]]:
+        """Return the Record's numeric values, by name, e.g. to draw one line per value."""
+
 
 @dataclass(slots=True)
 class CPURecord(Record):
@@ -130,12 +243,18 @@ class CPURecord(Record):
 
     def payload(self) -> str:
         """Return the Record payload in serialized form."""
+        if type(self.frequency) is int:  # pylint: disable-msg=C0123
+            return str(self.frequency)
         return json.dumps(self.frequency)
 
     def score(self) -> Union[int, float]:
         """Return a numeric value to be used in rendering charts."""
         return self.frequency
 
+    def values(self) -> dict[str, Union[int, float]]:
+        """Return the Record's numeric values, by name."""
+        return {"frequency": self.frequency}
+
 
 class SysLoad(NamedTuple):
     """SysLoad represents the system load average commonly used on Un*x"""
@@ -157,12 +276,28 @@ class LoadRecord(Record):
 
     def payload(self) -> str:
         """Return the Record payload in serialized form."""
+        # Almost always three floats, which we can format a lot faster than json.dumps.
+        if self.load is not None:
+            l1, l5, l15 = self.load
+            if type(l1) is type(l5) is type(l15) is float and \
+                    math.isfinite(l1 + l5 + l15):  # pylint: disable-msg=C0123
+                return f"[{l1!r}, {l5!r}, {l15!r}]"
         return json.dumps(self.load)
 
     def score(self) -> Union[int, float]:
         """Return a numeric value to be used in rendering charts."""
         return self.load.load5 if self.load is not None else 0
 
+    def values(self) -> dict[str, Union[int, float]]:
+        """Return the Record's numeric values, by name."""
+        if self.load is None:
+            return {}
+        return {
+            "load1": self.load[0],
+            "load5": self.load[1],
+            "load15": self.load[2],
+        }
+
 
 class SensorData(NamedTuple):
     """SensorData is a number and a unit."""
@@ -183,12 +318,16 @@ class SensorRecord(Record):
 
     def payload(self) -> str:
         """Return the Record payload in serialized form."""
-        return json.dumps(self.sensors)
+        return codec.dumps(self.sensors)
 
     def score(self) -> Union[int, float]:
         """Return a numeric value to be used in rendering charts."""
         return 0
 
+    def values(self) -> dict[str, Union[int, float]]:
+        """Return the Record's numeric values, by name."""
+        return {k: v[0] for k, v in self.sensors.items()}
+
 
 class FileSystem(NamedTuple):
     """FileSystem knows the total, used, and free space on a filesystem."""
@@ -212,12 +351,112 @@ class DiskRecord(Record):
 
     def payload(self) -> str:
         """Return the Record payload in serialized form."""
-        return json.dumps(self.disks)
+        return codec.dumps(self.disks)
 
     def score(self) -> Union[int, float]:
         """Return a numeric value to be used in rendering charts."""
         return self.disks["/"][3]
 
+    def values(self) -> dict[str, Union[int, float]]:
+        """Return the free space on each file system, by mount point."""
+        return {k: v[3] for k, v in self.disks.items()}
+
+
+# DiskRecord payloads look like {"/": ["/dev/sda1", total, used, free, "/"], ...}
+# This finds the free space on the root file system without parsing all of it.
+# Depending on the JSON backend, there may or may not be spaces after separators.
+_disk_root_pat: Final[re.Pattern] = \
+    re.compile(r'"/": ?\["(?:[^"\\]|\\.)*", ?-?\d+, ?-?\d+, ?(-?\d+),')
+
+
+class LazyRecord:
+    """LazyRecord holds a Record in serialized form and only decodes it when needed.
+
+    Pages that list many Records often only need the source, the timestamp,
+    the score, or the payload as it is stored, so decoding all of them would
+    be a waste. Any other attribute is looked up on the decoded Record, which
+    is built on first access.
+    """
+
+    __slots__ = [
+        "record_id",
+        "host_id",
+        "timestamp",
+        "src",
+        "raw",
+        "rec",
+    ]
+
+    record_id: int
+    host_id: int
+    timestamp: int
+    src: str
+    raw: str
+    rec: Optional[Record]
+
+    def __init__(self, rid: int, hid: int, tstamp: int, src: str, pload: str) -> None:
+        self.record_id = rid
+        self.host_id = hid
+        self.timestamp = tstamp
+        self.src = src
+        self.raw = pload
+        self.rec = None
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes we do not have ourselves.
+        return getattr(self.materialize(), name)
+
+    def materialize(self) -> Record:
+        """Return the decoded Record."""
+        if self.rec is None:
+            self.rec = Record.get_instance(self.record_id,
+                                           self.host_id,
+                                           self.timestamp,
+                                           self.src,
+                                           self.raw)
+        return self.rec
+
+    def source(self) -> str:
+        """Return the source of the Record."""
+        return self.src
+
+    def payload(self) -> str:
+        """Return the Record payload in serialized form."""
+        return self.raw
+
+    def timestr(self) -> str:
+        """Return a string of the timestamp in ISO 8601 format."""
+        return common.fmt_stamp(self.timestamp)
+
+    def score(self) -> Union[int, float]:
+        """Return a numeric value to be used in rendering charts.
+
+        For the common sources, the score is picked out of the payload
+        directly. If that fails, we decode the Record and ask it.
+        """
+        if self.rec is None:
+            try:
+                match self.src:
+                    case "sysload":
+                        return float(self.raw.split(",", 2)[1])
+                    case "sensors":
+                        return 0
+                    case "disk":
+                        m = _disk_root_pat.search(self.raw)
+                        if m is not None:
+                            return int(m[1])
+            except (ValueError, IndexError):
+                pass
+        return self.materialize().score()
+
+    def values(self) -> dict[str, Union[int, float]]:
+        """Return the Record's numeric values, by name."""
+        return self.materialize().values()
+
+
+# Whatever the Database hands out, decoded or not.
+AnyRecord = Union[Record, LazyRecord]
+
 # Local Variables: #
 # python-indent: 4 #
 # End: #
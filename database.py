@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Time-stamp: <2025-06-03 15:18:13 krylon>
+# Time-stamp: <2026-10-19 09:30:19 krylon>
 #
 # /data/code/python/medusa/database.py
 # created on 18. 03. 2025
@@ -17,16 +17,23 @@ medusa.database
 """
 
 import logging
+import math
+import os
 import sqlite3
 import time
-from datetime import datetime
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from enum import IntEnum, auto, unique
-from threading import Lock
-from typing import Final, Optional
+from pathlib import Path
+from threading import Condition, Lock, RLock
+from typing import Any, Final, NamedTuple, Optional
 
 import krylib
 
-from medusa import common, data
+from medusa import common, data, metrics
+from medusa.config import Config
+from medusa.sketch import Sketch, SketchError
 
 
 class DatabaseError(common.MedusaError):
@@ -39,6 +46,20 @@ class IntegrityError(DatabaseError):
 
 OPEN_LOCK: Final[Lock] = Lock()
 
+# The default number of read-only connections in a Pool, and the size of the
+# write-ahead log, in bytes, at which the Pool checkpoints it.
+READERS: Final[int] = 4
+CHECKPOINT: Final[int] = 4 * 2**20
+
+query_seconds: Final[metrics.Histogram] = metrics.registry.histogram(
+    "medusa_db_query_seconds",
+    "Time spent executing database queries, including fetching the results",
+    ("query", ))
+query_errors: Final[metrics.Counter] = metrics.registry.counter(
+    "medusa_db_query_errors_total",
+    "Database queries that failed",
+    ("query", ))
+
 # I'm feeling a little sheepish realizing just now I could keep the host.last_contact
 # timestamp up to date using triggers.
 INIT_QUERIES: Final[list[str]] = [
@@ -80,6 +101,195 @@ CREATE TRIGGER tr_host_contact_stamp
     """,
 ]
 
+# Changes to the schema after the initial version. Each entry brings the
+# database from version i to version i+1, the current version is stored in
+# PRAGMA user_version. A freshly created database gets INIT_QUERIES followed
+# by all of these.
+MIGRATIONS: Final[list[list[str]]] = [
+    # 1: Keep the most recent Record per Host and source around, so we can
+    # display the current state of things without scanning the record table.
+    [
+        """
+CREATE TABLE record_latest (
+    host_id     INTEGER NOT NULL,
+    source      TEXT NOT NULL,
+    record_id   INTEGER NOT NULL,
+    timestamp   INTEGER NOT NULL,
+    payload     TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (host_id, source),
+    FOREIGN KEY (host_id) REFERENCES host (id)
+        ON UPDATE RESTRICT
+        ON DELETE CASCADE
+) STRICT, WITHOUT ROWID
+        """,
+        """
+INSERT INTO record_latest (host_id, source, record_id, timestamp, payload)
+SELECT host_id, source, id, MAX(timestamp), payload
+FROM record
+GROUP BY host_id, source
+        """,
+        """
+CREATE TRIGGER tr_record_latest
+    AFTER INSERT ON record
+    BEGIN
+        INSERT INTO record_latest (host_id, source, record_id, timestamp, payload)
+            VALUES (NEW.host_id, NEW.source, NEW.id, NEW.timestamp, NEW.payload)
+        ON CONFLICT (host_id, source) DO UPDATE
+            SET record_id = excluded.record_id,
+                timestamp = excluded.timestamp,
+                payload = excluded.payload
+            WHERE excluded.timestamp >= record_latest.timestamp;
+    END
+        """,
+    ],
+    # 2: Alerts raised by the rules in the configuration file. An Alert is
+    # active until ended is set, there is at most one active Alert per Host
+    # and rule.
+    [
+        """
+CREATE TABLE alert (
+    id          INTEGER PRIMARY KEY,
+    host_id     INTEGER NOT NULL,
+    rule        TEXT NOT NULL,
+    started     INTEGER NOT NULL,
+    ended       INTEGER,
+    value       REAL NOT NULL DEFAULT 0,
+    message     TEXT NOT NULL DEFAULT '',
+    FOREIGN KEY (host_id) REFERENCES host (id)
+        ON UPDATE RESTRICT
+        ON DELETE CASCADE,
+    CHECK (ended IS NULL OR ended >= started)
+) STRICT
+        """,
+        "CREATE UNIQUE INDEX alert_active_idx ON alert (host_id, rule) WHERE ended IS NULL",
+        "CREATE INDEX alert_started_idx ON alert (started)",
+    ],
+    # 3: Summaries of the values per Host, source and period, each with a
+    # quantile sketch (see medusa.sketch), so quantiles over long periods or
+    # many Hosts do not require scanning the record table.
+    [
+        """
+CREATE TABLE rollup (
+    host_id     INTEGER NOT NULL,
+    source      TEXT NOT NULL,
+    width       INTEGER NOT NULL,
+    start       INTEGER NOT NULL,
+    count       INTEGER NOT NULL,
+    sum         REAL NOT NULL,
+    min         REAL NOT NULL,
+    max         REAL NOT NULL,
+    sketch      BLOB NOT NULL,
+    PRIMARY KEY (host_id, source, width, start),
+    FOREIGN KEY (host_id) REFERENCES host (id)
+        ON UPDATE RESTRICT
+        ON DELETE CASCADE,
+    CHECK (width > 0 AND start % width = 0)
+) STRICT, WITHOUT ROWID
+        """,
+        "CREATE INDEX rollup_time_idx ON rollup (source, width, start)",
+    ],
+    # 4: Tags attached to Hosts, like os=freebsd or rack=3, to pick groups of
+    # Hosts by. Existing Hosts get their OS as a tag.
+    [
+        """
+CREATE TABLE host_tag (
+    host_id     INTEGER NOT NULL,
+    name        TEXT NOT NULL,
+    value       TEXT NOT NULL,
+    PRIMARY KEY (host_id, name),
+    FOREIGN KEY (host_id) REFERENCES host (id)
+        ON UPDATE RESTRICT
+        ON DELETE CASCADE
+) STRICT, WITHOUT ROWID
+        """,
+        "CREATE INDEX host_tag_value_idx ON host_tag (name, value)",
+        "INSERT INTO host_tag (host_id, name, value) SELECT id, 'os', os FROM host",
+    ],
+    # 5: Records are stored in one table per day or week, see PARTITION_QUERIES.
+    # record_part lists the tables and the period each one covers. The
+    # original record table stays around as a partition covering everything
+    # up to the end of the current day, or nothing at all if it is empty.
+    [
+        """
+CREATE TABLE record_part (
+    name        TEXT PRIMARY KEY,
+    start       INTEGER UNIQUE NOT NULL,
+    stop        INTEGER NOT NULL,
+    CHECK (stop > start)
+) STRICT, WITHOUT ROWID
+        """,
+        """
+INSERT INTO record_part (name, start, stop)
+SELECT 'record', 0, IFNULL(MAX(MAX(timestamp) + 1, (unixepoch() / 86400 + 1) * 86400), 1)
+FROM record
+        """,
+    ],
+    # 6: Once partitions have expired, record_expired holds the end of the
+    # last one dropped, so late Records do not bring them back.
+    [
+        """
+CREATE TABLE record_expired (
+    id          INTEGER PRIMARY KEY CHECK (id = 0),
+    stop        INTEGER NOT NULL
+) STRICT
+        """,
+    ],
+]
+
+DB_VERSION: Final[int] = len(MIGRATIONS)
+
+# The widths of partitions we support, in seconds.
+PARTITIONS: Final[dict[str, int]] = {
+    "day": 86400,
+    "week": 7 * 86400,
+}
+
+# Creates a partition of the record table. Each one has its own indices and
+# triggers, which go away along with it. Record IDs are unique across
+# partitions, each one starts at its first day (since the epoch) times 2^32,
+# which leaves the IDs well within what JavaScript can handle.
+PARTITION_QUERIES: Final[list[str]] = [
+    """
+CREATE TABLE IF NOT EXISTS {table} (
+    id          INTEGER PRIMARY KEY,
+    host_id     INTEGER NOT NULL,
+    timestamp   INTEGER NOT NULL,
+    source      TEXT NOT NULL,
+    payload     TEXT NOT NULL DEFAULT '',
+    FOREIGN KEY (host_id) REFERENCES host (id)
+        ON UPDATE RESTRICT
+        ON DELETE CASCADE,
+    CHECK (json_valid(payload)),
+    CHECK (timestamp >= {start} AND timestamp < {stop}),
+    UNIQUE (host_id, source, timestamp)
+) STRICT
+    """,
+    "CREATE INDEX IF NOT EXISTS {table}_src_idx ON {table} (source, timestamp)",
+    "CREATE INDEX IF NOT EXISTS {table}_host_idx ON {table} (host_id, timestamp)",
+    """
+CREATE TRIGGER IF NOT EXISTS {table}_contact
+    AFTER INSERT ON {table}
+    BEGIN
+        UPDATE host
+            SET last_contact = unixepoch()
+            WHERE id = NEW.host_id;
+    END
+    """,
+    """
+CREATE TRIGGER IF NOT EXISTS {table}_latest
+    AFTER INSERT ON {table}
+    BEGIN
+        INSERT INTO record_latest (host_id, source, record_id, timestamp, payload)
+            VALUES (NEW.host_id, NEW.source, NEW.id, NEW.timestamp, NEW.payload)
+        ON CONFLICT (host_id, source) DO UPDATE
+            SET record_id = excluded.record_id,
+                timestamp = excluded.timestamp,
+                payload = excluded.payload
+            WHERE excluded.timestamp >= record_latest.timestamp;
+    END
+    """,
+]
+
 
 @unique
 class QueryID(IntEnum):
@@ -94,6 +304,26 @@ class QueryID(IntEnum):
     RecordGetByHost = auto()
     RecordGetByHostProbe = auto()
     RecordGetByProbe = auto()
+    RecordGetLatest = auto()
+    AlertAdd = auto()
+    AlertClose = auto()
+    AlertGetActive = auto()
+    AlertGetRecent = auto()
+    RollupAdd = auto()
+    RollupGetLast = auto()
+    RollupGetRange = auto()
+    TagClear = auto()
+    TagAdd = auto()
+    TagGetByHost = auto()
+    TagGetAll = auto()
+    TagGetGroups = auto()
+    HostGetByTag = auto()
+    PartitionAdd = auto()
+    PartitionGetAll = auto()
+    PartitionRemove = auto()
+    PartitionDrop = auto()
+    PartitionGetHorizon = auto()
+    PartitionSetHorizon = auto()
 
 
 db_queries: Final[dict[QueryID, str]] = {
@@ -114,8 +344,8 @@ WHERE id = ?
     QueryID.HostGetByName: "SELECT id, os, last_contact FROM host WHERE name = ?",
     QueryID.HostGetAll: "SELECT id, name, os, last_contact FROM host ORDER BY name",
     QueryID.RecordAdd: """
-INSERT into record (host_id, timestamp, source, payload)
-            VALUES (      ?,         ?,      ?,       ?)
+INSERT into {table} (id, host_id, timestamp, source, payload)
+             VALUES ((SELECT IFNULL(MAX(id), ?) + 1 FROM {table}), ?, ?, ?, ?)
 RETURNING id
     """,
     QueryID.RecordGetByHost: """
@@ -124,7 +354,7 @@ SELECT
     timestamp,
     source,
     payload
-FROM record
+FROM {table}
 WHERE host_id = ?
 ORDER BY timestamp DESC
 LIMIT ?
@@ -134,7 +364,7 @@ SELECT
     id,
     timestamp,
     payload
-FROM record
+FROM {table}
 WHERE host_id = ? AND source = ? AND timestamp >= ?
 ORDER BY timestamp
     """,
@@ -144,43 +374,404 @@ SELECT
     host_id,
     timestamp,
     payload
-FROM record
+FROM {table}
 WHERE source = ?
   AND timestamp BETWEEN ? AND ?
+ORDER BY timestamp
+    """,
+    QueryID.RecordGetLatest: """
+SELECT
+    host_id,
+    source,
+    record_id,
+    timestamp,
+    payload
+FROM record_latest
+    """,
+    QueryID.AlertAdd: """
+INSERT INTO alert (host_id, rule, started, value, message)
+           VALUES (      ?,    ?,       ?,     ?,       ?)
+ON CONFLICT DO NOTHING
+RETURNING id
+    """,
+    QueryID.AlertClose: """
+UPDATE alert
+    SET ended = MAX(?, started)
+WHERE host_id = ? AND rule = ? AND ended IS NULL
+    """,
+    QueryID.AlertGetActive: """
+SELECT
+    id,
+    host_id,
+    rule,
+    started,
+    value,
+    message
+FROM alert
+WHERE ended IS NULL
+ORDER BY started
+    """,
+    QueryID.AlertGetRecent: """
+SELECT
+    id,
+    host_id,
+    rule,
+    started,
+    ended,
+    value,
+    message
+FROM alert
+WHERE started >= ?
+ORDER BY started DESC
+    """,
+    QueryID.RollupAdd: """
+INSERT INTO rollup (host_id, source, width, start, count, sum, min, max, sketch)
+            VALUES (      ?,      ?,     ?,     ?,     ?,   ?,   ?,   ?,      ?)
+ON CONFLICT (host_id, source, width, start) DO UPDATE
+    SET count = excluded.count,
+        sum = excluded.sum,
+        min = excluded.min,
+        max = excluded.max,
+        sketch = excluded.sketch
+    """,
+    QueryID.RollupGetLast: """
+SELECT MAX(start)
+FROM rollup
+WHERE source = ? AND width = ?
+    """,
+    QueryID.RollupGetRange: """
+SELECT
+    host_id,
+    start,
+    sketch
+FROM rollup
+WHERE source = ? AND width = ? AND start BETWEEN ? AND ?
+ORDER BY start
+    """,
+    QueryID.TagClear: "DELETE FROM host_tag WHERE host_id = ?",
+    QueryID.TagAdd: """
+INSERT INTO host_tag (host_id, name, value)
+              VALUES (      ?,    ?,     ?)
+ON CONFLICT (host_id, name) DO UPDATE SET value = excluded.value
+    """,
+    QueryID.TagGetByHost: "SELECT name, value FROM host_tag WHERE host_id = ? ORDER BY name",
+    QueryID.TagGetAll: "SELECT host_id, name, value FROM host_tag ORDER BY host_id, name",
+    QueryID.TagGetGroups: """
+SELECT
+    name,
+    value,
+    COUNT(host_id)
+FROM host_tag
+GROUP BY name, value
+ORDER BY name, value
+    """,
+    QueryID.HostGetByTag: """
+SELECT
+    h.id,
+    h.name,
+    h.os,
+    h.last_contact
+FROM host_tag t
+INNER JOIN host h ON t.host_id = h.id
+WHERE t.name = ? AND t.value = ?
+ORDER BY h.name
+    """,
+    QueryID.PartitionAdd: """
+INSERT INTO record_part (name, start, stop)
+                 VALUES (   ?,     ?,    ?)
+ON CONFLICT DO NOTHING
+    """,
+    QueryID.PartitionGetAll: "SELECT name, start, stop FROM record_part ORDER BY start",
+    QueryID.PartitionRemove: "DELETE FROM record_part WHERE name = ?",
+    QueryID.PartitionDrop: "DROP TABLE IF EXISTS {table}",
+    QueryID.PartitionGetHorizon: "SELECT IFNULL(MAX(stop), 0) FROM record_expired",
+    QueryID.PartitionSetHorizon: """
+INSERT INTO record_expired (id, stop) VALUES (0, ?)
+ON CONFLICT (id) DO UPDATE SET stop = MAX(stop, excluded.stop)
     """,
 }
 
 
-class Database:
-    """Database provides persistence and the operations to store and handle data."""
+@dataclass(slots=True)
+class QueryStats:
+    """QueryStats summarizes all executions of one query."""
+
+    count: int = 0
+    errors: int = 0
+    slow: int = 0
+    total: float = 0.0
+    longest: float = 0.0
+
+    def mean(self) -> float:
+        """Return the average time the query took, in seconds."""
+        if self.count == 0:
+            return 0.0
+        return self.total / self.count
+
+
+class TimingSettings(NamedTuple):
+    """TimingSettings determines how closely we watch our queries."""
+
+    enabled: bool
+    slow: float
+
+
+class StorageSettings(NamedTuple):
+    """StorageSettings are the PRAGMAs that determine how SQLite stores our data.
+
+    Sizes are in bytes, the busy timeout in milliseconds. The defaults are
+    those of SQLite itself, which lose nothing if the power goes out.
+    """
+
+    synchronous: str = "full"
+    cache_size: int = 2 * 2**20
+    mmap_size: int = 0
+    temp_store: str = "default"
+    page_size: int = 4096
+    wal_autocheckpoint: int = 1000
+    busy_timeout: int = 5000
+
+    def pragmas(self) -> list[str]:
+        """Return the PRAGMAs to apply to each connection.
+
+        The page size is left out, it only takes effect when the database is created.
+        """
+        return [
+            f"PRAGMA synchronous = {self.synchronous}",
+            # A negative value is in KiB rather than pages.
+            f"PRAGMA cache_size = {-(self.cache_size // 1024)}",
+            f"PRAGMA mmap_size = {self.mmap_size}",
+            f"PRAGMA temp_store = {self.temp_store}",
+            f"PRAGMA wal_autocheckpoint = {self.wal_autocheckpoint}",
+            f"PRAGMA busy_timeout = {self.busy_timeout}",
+        ]
+
+
+SYNCHRONOUS: Final[tuple[str, ...]] = ("off", "normal", "full", "extra")
+TEMP_STORE: Final[tuple[str, ...]] = ("default", "file", "memory")
+
+
+class Partition(NamedTuple):
+    """Partition is a table holding the Records from start up to, but not including, stop."""
+
+    name: str
+    start: int
+    stop: int
+
+    @property
+    def base_id(self) -> int:
+        """Return the number the IDs of Records in this partition count up from.
+
+        See PARTITION_QUERIES.
+        """
+        return (self.start // 86400) << 32
+
+
+# Database connections are short-lived, so the statistics are kept per
+# process, and we read the settings only once per configuration file.
+stats_lock: Final[Lock] = Lock()
+_query_stats: Final[dict[QueryID, QueryStats]] = {}
+_timing: Final[dict[str, TimingSettings]] = {}
+_part_width: Final[dict[str, int]] = {}
+_storage: Final[dict[str, StorageSettings]] = {}
+# The partitions of each database and the time before which Records have
+# expired, along with the schema version they were loaded at. Creating or
+# dropping a partition, or rolling back a transaction that did, changes the
+# schema version, which tells us to load them again.
+_parts: Final[dict[str, tuple[int, list[Partition], int]]] = {}
+
+
+def timing_settings() -> TimingSettings:
+    """Return the settings for timing queries from the configuration file."""
+    path: Final[str] = common.path.config()
+    with stats_lock:
+        ts = _timing.get(path)
+    if ts is None:
+        cfg = Config()
+        ts = TimingSettings(
+            enabled=bool(cfg.get("Database", "Timing", True)),
+            slow=float(cfg.get("Database", "SlowQuery", 0.25)),
+        )
+        with stats_lock:
+            _timing[path] = ts
+    return ts
+
+
+def _storage_number(cfg: Config, log: logging.Logger, key: str, dflt: int, unit: int = 1) -> int:
+    """Return a non-negative number from the Database section of the configuration file.
+
+    The file gives it in multiples of unit, e.g. MiB or seconds, we return it
+    in bytes or milliseconds.
+    """
+    raw: Final = cfg.get("Database", key, dflt / unit)
+    try:
+        val: float = float(raw)
+    except (TypeError, ValueError):
+        val = math.nan
+    if not (math.isfinite(val) and val >= 0):
+        log.error("Invalid value for %s: %s, using %s", key, raw, dflt / unit)
+        return dflt
+    return int(val * unit)
+
+
+def storage_settings() -> StorageSettings:
+    """Return the storage settings from the configuration file.
+
+    Invalid values are logged and replaced by the defaults.
+    """
+    path: Final[str] = common.path.config()
+    with stats_lock:
+        st = _storage.get(path)
+    if st is not None:
+        return st
+
+    cfg: Final[Config] = Config()
+    log: Final[logging.Logger] = common.get_logger("database")
+    dflt: Final[StorageSettings] = StorageSettings()
+    sync: str = str(cfg.get("Database", "Synchronous", dflt.synchronous)).lower()
+    if sync not in SYNCHRONOUS:
+        log.error("Invalid value for Synchronous: %s, using %s", sync, dflt.synchronous)
+        sync = dflt.synchronous
+    temp: str = str(cfg.get("Database", "TempStore", dflt.temp_store)).lower()
+    if temp not in TEMP_STORE:
+        log.error("Invalid value for TempStore: %s, using %s", temp, dflt.temp_store)
+        temp = dflt.temp_store
+    page: int = _storage_number(cfg, log, "PageSize", dflt.page_size)
+    if not 512 <= page <= 65536 or page & (page - 1) != 0:
+        log.error("Invalid page size %d, using %d", page, dflt.page_size)
+        page = dflt.page_size
+
+    st = StorageSettings(
+        synchronous=sync,
+        cache_size=_storage_number(cfg, log, "CacheSize", dflt.cache_size, 2**20),
+        mmap_size=_storage_number(cfg, log, "MmapSize", dflt.mmap_size, 2**20),
+        temp_store=temp,
+        page_size=page,
+        wal_autocheckpoint=_storage_number(cfg, log, "WalAutocheckpoint",
+                                           dflt.wal_autocheckpoint),
+        busy_timeout=_storage_number(cfg, log, "BusyTimeout", dflt.busy_timeout, 1000),
+    )
+    with stats_lock:
+        _storage[path] = st
+    return st
+
+
+def partition_width() -> int:
+    """Return the width of new partitions of the record table, in seconds.
+
+    The width is read from the configuration file.
+    """
+    path: Final[str] = common.path.config()
+    with stats_lock:
+        width = _part_width.get(path)
+    if width is None:
+        name: Final[str] = str(Config().get("Database", "Partition", "day"))
+        width = PARTITIONS.get(name)
+        if width is None:
+            common.get_logger("database").error("Invalid partition width %s, using one day",
+                                                name)
+            width = PARTITIONS["day"]
+        with stats_lock:
+            _part_width[path] = width
+    return width
+
+
+def partition_range(stamp: int, width: int) -> tuple[int, int]:
+    """Return the start and end of the partition of the given width a timestamp falls into.
+
+    Days start at midnight UTC, weeks on Monday.
+    """
+    # The epoch was on a Thursday, the first Monday came four days later.
+    origin: Final[int] = 4 * 86400 if width % (7 * 86400) == 0 else 0
+    start: Final[int] = stamp - (stamp - origin) % width
+    return start, start + width
+
+
+def _fmt_param(p: Any) -> str:
+    """Format a query parameter for the log, shortening long strings like payloads."""
+    s = repr(p)
+    if len(s) > 64:
+        return s[:60] + "...'"
+    return s
+
+
+class Database:  # pylint: disable-msg=R0904
+    """Database provides persistence and the operations to store and handle data.
+
+    There is a method for each operation on each table, so callers never
+    see SQL.
+    """
 
     __slots__ = [
         "db",
         "log",
         "path",
+        "timing",
+        "part_width",
+        "readonly",
+        "pool",
+        "storage",
     ]
 
     db: sqlite3.Connection
     log: logging.Logger
     path: Final[str]
+    timing: TimingSettings
+    part_width: int
+    readonly: bool
+    pool: Optional['Pool']
+    storage: StorageSettings
 
-    def __init__(self, path: str = "") -> None:
+    def __init__(self,
+                 path: str = "",
+                 readonly: bool = False,
+                 storage: Optional[StorageSettings] = None) -> None:
         if path == "":
             path = common.path.db()
         self.path = path
         self.log = common.get_logger("database")
-        self.log.debug("Open database at %s", path)
+        self.log.debug("Open database at %s%s", path, " read-only" if readonly else "")
+        self.timing = timing_settings()
+        self.part_width = partition_width()
+        self.readonly = readonly
+        self.pool = None
+        self.storage = storage if storage is not None else storage_settings()
+        timeout: Final[float] = self.storage.busy_timeout / 1000
         with OPEN_LOCK:
             exist: bool = krylib.fexist(path)
-            self.db = sqlite3.connect(path)  # pylint: disable-msg=C0103
+            # Connections from a Pool are handed from one thread to the next.
+            if readonly:
+                # A read-only connection can neither create nor upgrade the
+                # database, so it has to exist already.
+                self.db = sqlite3.connect(Path(path).resolve().as_uri() + "?mode=ro",
+                                          timeout,
+                                          uri=True,
+                                          check_same_thread=False)
+            else:
+                self.db = sqlite3.connect(path,  # pylint: disable-msg=C0103
+                                          timeout,
+                                          check_same_thread=False)
             self.db.isolation_level = None
 
             cur: sqlite3.Cursor = self.db.cursor()
             cur.execute("PRAGMA foreign_keys = true")
-            cur.execute("PRAGMA journal_mode = WAL")
+            for pragma in self.storage.pragmas():
+                cur.execute(pragma)
+            if readonly:
+                cur.execute("PRAGMA query_only = true")
+            else:
+                if not exist:
+                    # This has to come before anything is written.
+                    cur.execute(f"PRAGMA page_size = {self.storage.page_size}")
+                cur.execute("PRAGMA journal_mode = WAL")
+            cur.close()
 
-            if not exist:
+            if readonly:
+                pass
+            elif not exist:
                 self.__create_db()
+            else:
+                self.__migrate()
 
     def __create_db(self) -> None:
         """Initialize a freshly created database"""
@@ -188,6 +779,38 @@ class Database:
             for query in INIT_QUERIES:
                 cur: sqlite3.Cursor = self.db.cursor()
                 cur.execute(query)
+        self.__migrate()
+
+    def __migrate(self) -> None:
+        """Bring the schema of an existing database up to date."""
+        cur: sqlite3.Cursor = self.db.cursor()
+        cur.execute("PRAGMA user_version")
+        version: Final[int] = cur.fetchall()[0][0]
+        if version >= DB_VERSION:
+            return
+
+        self.log.info("Upgrade database schema from version %d to %d",
+                      version,
+                      DB_VERSION)
+        try:
+            cur.execute("BEGIN IMMEDIATE")
+            # Another connection may have upgraded the schema while we waited
+            # for the lock.
+            cur.execute("PRAGMA user_version")
+            current: Final[int] = cur.fetchall()[0][0]
+            if current >= DB_VERSION:
+                cur.execute("COMMIT")
+                return
+            for step in MIGRATIONS[current:]:
+                for query in step:
+                    cur.execute(query)
+            cur.execute(f"PRAGMA user_version = {DB_VERSION}")
+            cur.execute("COMMIT")
+        except sqlite3.Error as err:
+            cur.execute("ROLLBACK")
+            msg = f"{err.__class__.__name__} trying to upgrade database schema: {err}"
+            self.log.error(msg)
+            raise DatabaseError(msg) from err
 
     def __enter__(self) -> None:
         self.db.__enter__()
@@ -196,19 +819,105 @@ class Database:
         return self.db.__exit__(ex_type, ex_val, traceback)
 
     def close(self) -> None:
-        """Close the underlying database connection explicitly."""
-        self.db.close()
+        """Close the underlying database connection explicitly.
+
+        A connection from a Pool is handed back to it instead.
+        """
+        if self.pool is not None:
+            self.pool.release(self)
+        else:
+            self.db.close()
+
+    def _execute(self, qid: QueryID, params: tuple = (), table: str = "") -> list[Any]:
+        """Execute one of our queries and return all result rows.
+
+        Queries on the partitions of the record table need the name of the
+        partition to run on.
+        Fetching the rows is part of the work the query does, so it is timed
+        along with the query itself.
+        """
+        labels: Final[tuple[str]] = (qid.name, )
+        query: Final[str] = db_queries[qid] if table == "" else db_queries[qid].format(table=table)
+        if not self.timing.enabled:
+            try:
+                cur: sqlite3.Cursor = self.db.cursor()
+                cur.execute(query, params)
+                return cur.fetchall()
+            except sqlite3.Error:
+                query_errors.inc(labels)
+                raise
+
+        failed: bool = False
+        t0: Final[float] = time.perf_counter()
+        try:
+            cur = self.db.cursor()
+            cur.execute(query, params)
+            return cur.fetchall()
+        except sqlite3.Error:
+            failed = True
+            query_errors.inc(labels)
+            raise
+        finally:
+            elapsed: Final[float] = time.perf_counter() - t0
+            query_seconds.observe(elapsed, labels)
+            slow: Final[bool] = 0 < self.timing.slow <= elapsed
+            with stats_lock:
+                qs = _query_stats.get(qid)
+                if qs is None:
+                    qs = QueryStats()
+                    _query_stats[qid] = qs
+                qs.count += 1
+                qs.total += elapsed
+                qs.longest = max(qs.longest, elapsed)
+                qs.errors += failed
+                qs.slow += slow
+            if slow and not failed:
+                self._log_slow(qid, query, params, elapsed)
+
+    def _log_slow(self, qid: QueryID, query: str, params: tuple, elapsed: float) -> None:
+        """Log a slow query, along with the plan SQLite chose for it."""
+        try:
+            cur: sqlite3.Cursor = self.db.cursor()
+            cur.execute("EXPLAIN QUERY PLAN " + query, params)
+            # Rows are (id, parent, notused, detail), children follow their parent.
+            depth: dict[int, int] = {0: 0}
+            plan: list[str] = []
+            for row in cur.fetchall():
+                depth[row[0]] = depth.get(row[1], 0) + 1
+                plan.append("    " * depth[row[0]] + row[3])
+        except sqlite3.Error as err:
+            plan = [f"    (no plan: {err})"]
+        self.log.warning("Slow query %s took %.1f ms, parameters (%s), plan:\n%s",
+                         qid.name,
+                         elapsed * 1000,
+                         ", ".join(_fmt_param(p) for p in params),
+                         "\n".join(plan))
+
+    @staticmethod
+    def query_stats() -> dict[QueryID, QueryStats]:
+        """Return statistics on the queries executed so far by this process.
+
+        Statistics are only collected if Database.Timing is enabled in the
+        configuration.
+        """
+        with stats_lock:
+            return {qid: QueryStats(qs.count, qs.errors, qs.slow, qs.total, qs.longest)
+                    for qid, qs in _query_stats.items()}
+
+    @staticmethod
+    def reset_query_stats() -> None:
+        """Forget all statistics collected so far."""
+        with stats_lock:
+            _query_stats.clear()
 
     def host_add(self, host: data.Host) -> None:
         """Add a Host to the database."""
         try:
-            cur: sqlite3.Cursor = self.db.cursor()
-            cur.execute(db_queries[QueryID.HostAdd],
-                        (host.name,
-                         host.os,
-                         int(host.last_contact.timestamp())))
-            row = cur.fetchone()
-            host.host_id = row[0]
+            rows = self._execute(QueryID.HostAdd,
+                                 (host.name,
+                                  host.os,
+                                  int(host.last_contact.timestamp())))
+            host.host_id = rows[0][0]
         except sqlite3.IntegrityError as err:
             msg = f"Error adding Host {host.name}: {err}"
             self.log.error(msg)
@@ -217,10 +926,9 @@ class Database:
     def host_update_contact(self, host: data.Host, timestamp: datetime) -> None:
         """Update a Host's contact timestamp."""
         try:
-            cur: sqlite3.Cursor = self.db.cursor()
-            cur.execute(db_queries[QueryID.HostUpdateContact],
-                        (int(timestamp.timestamp()),
-                         host.host_id))
+            self._execute(QueryID.HostUpdateContact,
+                          (int(timestamp.timestamp()),
+                           host.host_id))
             host.last_contact = timestamp
         except sqlite3.Error as err:
             msg = f"{err.__class__.__name__} trying to update last_contact for {host.name}: {err}"
@@ -230,11 +938,9 @@ class Database:
     def host_get_by_name(self, name: str) -> Optional[data.Host]:
         """Look up a Host by its name."""
         try:
-            cur: sqlite3.Cursor = self.db.cursor()
-            cur.execute(db_queries[QueryID.HostGetByName],
-                        (name, ))
-            row = cur.fetchone()
-            if row is not None:
+            rows = self._execute(QueryID.HostGetByName, (name, ))
+            if len(rows) > 0:
+                row = rows[0]
                 host: data.Host = data.Host(
                     host_id=row[0],
                     name=name,
@@ -251,11 +957,9 @@ class Database:
     def host_get_by_id(self, host_id: int) -> Optional[data.Host]:
         """Look up a Host by its name."""
         try:
-            cur: sqlite3.Cursor = self.db.cursor()
-            cur.execute(db_queries[QueryID.HostGetByID],
-                        (host_id, ))
-            row = cur.fetchone()
-            if row is not None:
+            rows = self._execute(QueryID.HostGetByID, (host_id, ))
+            if len(rows) > 0:
+                row = rows[0]
                 host: data.Host = data.Host(
                     host_id=host_id,
                     name=row[0],
@@ -272,11 +976,10 @@ class Database:
     def host_get_all(self) -> list[data.Host]:
         """Return all Hosts stored in the database."""
         try:
-            cur: sqlite3.Cursor = self.db.cursor()
-            cur.execute(db_queries[QueryID.HostGetAll])
+            rows = self._execute(QueryID.HostGetAll)
             hosts: list[data.Host] = []
 
-            for row in cur:
+            for row in rows:
                 h: data.Host = data.Host(
                     host_id=row[0],
                     name=row[1],
@@ -291,49 +994,236 @@ class Database:
             self.log.error(msg)
             raise DatabaseError(msg) from err
 
-    def record_add(self, rec: data.Record) -> None:
-        """Add a Record to the database."""
+    def host_get_by_tag(self, name: str, value: str) -> list[data.Host]:
+        """Return the Hosts that carry the given tag, sorted by name."""
+        try:
+            rows = self._execute(QueryID.HostGetByTag, (name, value))
+            return [data.Host(host_id=row[0],
+                              name=row[1],
+                              os=row[2],
+                              last_contact=datetime.fromtimestamp(row[3])) for row in rows]
+        except sqlite3.Error as err:
+            msg = f"{err.__class__.__name__} trying to look up Hosts tagged {name}={value}: {err}"
+            self.log.error(msg)
+            raise DatabaseError(msg) from err
+
+    def tag_set(self, host_id: int, tags: dict[str, str]) -> None:
+        """Replace the tags of a Host.
+
+        This takes several queries, the caller should wrap it in a transaction.
+        """
+        try:
+            self._execute(QueryID.TagClear, (host_id, ))
+            for name, value in tags.items():
+                self._execute(QueryID.TagAdd, (host_id, name, value))
+        except sqlite3.Error as err:
+            msg = f"{err.__class__.__name__} trying to set tags for Host {host_id}: {err}"
+            self.log.error(msg)
+            raise DatabaseError(msg) from err
+
+    def tag_get_by_host(self, host_id: int) -> dict[str, str]:
+        """Return the tags of a Host."""
+        try:
+            rows = self._execute(QueryID.TagGetByHost, (host_id, ))
+            return {row[0]: row[1] for row in rows}
+        except sqlite3.Error as err:
+            msg = f"{err.__class__.__name__} trying to load tags for Host {host_id}: {err}"
+            self.log.error(msg)
+            raise DatabaseError(msg) from err
+
+    def tag_get_all(self) -> dict[int, dict[str, str]]:
+        """Return the tags of all Hosts, by Host ID."""
+        try:
+            rows = self._execute(QueryID.TagGetAll)
+            tags: dict[int, dict[str, str]] = {}
+            for row in rows:
+                if row[0] in tags:
+                    tags[row[0]][row[1]] = row[2]
+                else:
+                    tags[row[0]] = {row[1]: row[2]}
+            return tags
+        except sqlite3.Error as err:
+            msg = f"{err.__class__.__name__} trying to load all tags: {err}"
+            self.log.error(msg)
+            raise DatabaseError(msg) from err
+
+    def tag_get_groups(self) -> list[tuple[str, str, int]]:
+        """Return all tags in use, as tuples of name, value, and number of Hosts."""
+        try:
+            return [(row[0], row[1], row[2]) for row in self._execute(QueryID.TagGetGroups)]
+        except sqlite3.Error as err:
+            msg = f"{err.__class__.__name__} trying to load Host groups: {err}"
+            self.log.error(msg)
+            raise DatabaseError(msg) from err
+
+    def partitions(self) -> list[Partition]:
+        """Return the partitions of the record table, oldest first."""
+        return self.__load_partitions()[1]
+
+    def record_horizon(self) -> int:
+        """Return the time before which Records have expired, 0 if none have."""
+        return self.__load_partitions()[2]
+
+    def __load_partitions(self) -> tuple[int, list[Partition], int]:
         try:
             cur: sqlite3.Cursor = self.db.cursor()
-            cur.execute(db_queries[QueryID.RecordAdd],
-                        (rec.host_id,
-                         int(rec.timestamp.timestamp()),
-                         rec.source(),
-                         rec.payload(),
-                         ))
-
-            row = cur.fetchone()
-            assert row is not None
-            assert len(row) == 1
-            assert isinstance(row[0], int)
-            rec.record_id = row[0]
+            cur.execute("PRAGMA schema_version")
+            version: Final[int] = cur.fetchall()[0][0]
+            with stats_lock:
+                cached = _parts.get(self.path)
+            if cached is not None and cached[0] == version:
+                return cached
+            parts: Final[list[Partition]] = [Partition(*row) for row in
+                                             self._execute(QueryID.PartitionGetAll)]
+            horizon: Final[int] = self._execute(QueryID.PartitionGetHorizon)[0][0]
+            with stats_lock:
+                _parts[self.path] = (version, parts, horizon)
+            return version, parts, horizon
+        except sqlite3.Error as err:
+            msg = f"{err.__class__.__name__} trying to load partitions of the record table: {err}"
+            self.log.error(msg)
+            raise DatabaseError(msg) from err
+
+    def _partitions_between(self, begin: int, end: int) -> list[Partition]:
+        """Return the partitions holding Records from begin up to and including end.
+
+        The partitions are sorted oldest first.
+        """
+        return [p for p in self.partitions() if p.start <= end and p.stop > begin]
+
+    def record_partition(self, stamp: int) -> Partition:
+        """Return the partition a Record with the given timestamp goes into, creating it if needed.
+
+        New partitions are as wide as configured, but never overlap existing ones.
+        Raises DatabaseError if Records from that time have already expired.
+        """
+        _, parts, horizon = self.__load_partitions()
+        if stamp < horizon:
+            msg = f"Records from before {horizon} have expired, cannot store {stamp}"
+            self.log.error(msg)
+            raise DatabaseError(msg)
+        idx: Final[int] = bisect_right(parts, stamp, key=lambda p: p.start) - 1
+        if idx >= 0 and parts[idx].stop > stamp:
+            return parts[idx]
+
+        start, stop = partition_range(stamp, self.part_width)
+        start = max(start, horizon)
+        if idx >= 0:
+            start = max(start, parts[idx].stop)
+        if idx + 1 < len(parts):
+            stop = min(stop, parts[idx + 1].start)
+        day: Final[datetime] = datetime.fromtimestamp(start, timezone.utc)
+        part: Final[Partition] = Partition(
+            day.strftime("record_%Y%m%d" if start % 86400 == 0 else "record_%Y%m%d_%H%M%S"),
+            start,
+            stop)
+
+        self.log.info("Create partition %s for Records from %s to %s",
+                      part.name,
+                      day.isoformat(),
+                      datetime.fromtimestamp(stop, timezone.utc).isoformat())
+        cur: Final[sqlite3.Cursor] = self.db.cursor()
+        try:
+            # A savepoint works whether or not the caller has started a transaction.
+            cur.execute("SAVEPOINT partition")
+            for query in PARTITION_QUERIES:
+                cur.execute(query.format(table=part.name, start=start, stop=stop))
+            self._execute(QueryID.PartitionAdd, part)
+            cur.execute("RELEASE partition")
+        except sqlite3.Error as err:
+            cur.execute("ROLLBACK TO partition")
+            cur.execute("RELEASE partition")
+            msg = f"{err.__class__.__name__} trying to create partition {part.name}: {err}"
+            self.log.error(msg)
+            raise DatabaseError(msg) from err
+        return part
+
+    def record_expire(self, before: int) -> list[str]:
+        """Drop the partitions holding only Records older than before.
+
+        Dropping a table takes the same time no matter how many rows it holds,
+        so there is no point in deleting individual Records. Returns the names
+        of the partitions that were dropped.
+        """
+        dropped: list[str] = []
+        cur: Final[sqlite3.Cursor] = self.db.cursor()
+        for part in self.partitions():
+            if part.stop > before:
+                break
+            try:
+                cur.execute("SAVEPOINT expire")
+                self._execute(QueryID.PartitionRemove, (part.name, ))
+                self._execute(QueryID.PartitionDrop, table=part.name)
+                self._execute(QueryID.PartitionSetHorizon, (part.stop, ))
+                cur.execute("RELEASE expire")
+            except sqlite3.Error as err:
+                cur.execute("ROLLBACK TO expire")
+                cur.execute("RELEASE expire")
+                msg = f"{err.__class__.__name__} trying to drop partition {part.name}: {err}"
+                self.log.error(msg)
+                raise DatabaseError(msg) from err
+            self.log.info("Dropped partition %s", part.name)
+            dropped.append(part.name)
+        return dropped
+
+    def record_add(self, rec: data.Record) -> None:
+        """Add a Record to the database.
+
+        Records older than the partitions that have expired are dropped.
+        """
+        if rec.timestamp < self.record_horizon():
+            self.log.warning("Drop %s Record of Host %d from %s, it has expired already",
+                             rec.source(),
+                             rec.host_id,
+                             rec.timestr())
+            return
+        part: Final[Partition] = self.record_partition(rec.timestamp)
+        try:
+            rows = self._execute(QueryID.RecordAdd,
+                                 (part.base_id,
+                                  rec.host_id,
+                                  rec.timestamp,
+                                  rec.source(),
+                                  rec.payload(),
+                                  ),
+                                 part.name)
+
+            assert len(rows) == 1
+            assert isinstance(rows[0][0], int)
+            rec.record_id = rows[0][0]
         except sqlite3.Error as err:
             msg = f"{err.__class__.__name__} trying to add Record: {err}"
             self.log.error(msg)
             raise DatabaseError(msg) from err
 
-    def record_get_by_host(self, host: data.Host, limit: int = -1) -> list[data.Record]:
+    def record_get_by_host(self, host: data.Host, limit: int = -1, lazy: bool = False) \
+            -> list[data.AnyRecord]:
         """Load the records for a given Host.
 
         Records are sorted by timestamp in descending order.
         If limit is given, only the <limit> most recent records are returned.
+        If lazy is True, the payloads are only decoded when needed, see LazyRecord.
         """
+        make = data.LazyRecord if lazy else data.Record.get_instance
         try:
-            cur: sqlite3.Cursor = self.db.cursor()
-            cur.execute(db_queries[QueryID.RecordGetByHost],
-                        (host.host_id, limit))
+            records: list[data.AnyRecord] = []
 
-            records: list[data.Record] = []
+            for part in reversed(self.partitions()):
+                if 0 <= limit <= len(records):
+                    break
+                rows = self._execute(QueryID.RecordGetByHost,
+                                     (host.host_id, limit - len(records) if limit >= 0 else -1),
+                                     part.name)
 
-            for row in cur:
-                rec: data.Record = data.Record.get_instance(
-                    row[0],
-                    host.host_id,
-                    datetime.fromtimestamp(row[1]),
-                    row[2],
-                    row[3],
-                )
-                records.append(rec)
+                for row in rows:
+                    rec: data.AnyRecord = make(
+                        row[0],
+                        host.host_id,
+                        row[1],
+                        row[2],
+                        row[3],
+                    )
+                    records.append(rec)
 
             return records
         except sqlite3.Error as err:
@@ -346,19 +1236,22 @@ class Database:
         """Load records for a given Host and source."""
         min_stamp: Final[int] = int(time.time()) - age
         try:
-            cur: sqlite3.Cursor = self.db.cursor()
-            cur.execute(db_queries[QueryID.RecordGetByHostProbe],
-                        (host.host_id, source, min_stamp))
             records: list[data.Record] = []
 
-            for row in cur:
-                rec: data.Record = data.Record.get_instance(
-                    row[0],
-                    host.host_id,
-                    datetime.fromtimestamp(row[1]),
-                    source,
-                    row[2])
-                records.append(rec)
+            for part in self.partitions():
+                if part.stop <= min_stamp:
+                    continue
+                rows = self._execute(QueryID.RecordGetByHostProbe,
+                                     (host.host_id, source, min_stamp),
+                                     part.name)
+                for row in rows:
+                    rec: data.Record = data.Record.get_instance(
+                        row[0],
+                        host.host_id,
+                        row[1],
+                        source,
+                        row[2])
+                    records.append(rec)
 
             return records
         except sqlite3.Error as err:
@@ -367,9 +1260,13 @@ class Database:
             self.log.error(msg)
             raise DatabaseError(msg) from err
 
-    def record_get_by_probe(self, src: str, begin: int = -1, end: int = -1) \
-            -> list[data.Record]:
-        """Get all records from a given source for the given period."""
+    def record_get_by_probe(self, src: str, begin: int = -1, end: int = -1, lazy: bool = False) \
+            -> list[data.AnyRecord]:
+        """Get all records from a given source for the given period.
+
+        If lazy is True, the payloads are only decoded when needed, see LazyRecord.
+        """
+        make = data.LazyRecord if lazy else data.Record.get_instance
         if begin == -1:
             now = int(time.time())
             begin = now - 86400
@@ -377,27 +1274,357 @@ class Database:
         else:
             assert begin < end
         try:
-            cur: sqlite3.Cursor = self.db.cursor()
-            cur.execute(db_queries[QueryID.RecordGetByProbe],
-                        (src, begin, end))
+            records: list[data.AnyRecord] = []
+            for part in self._partitions_between(begin, end):
+                rows = self._execute(QueryID.RecordGetByProbe,
+                                     (src, begin, end),
+                                     part.name)
+                for row in rows:
+                    rec = make(
+                        row[0],
+                        row[1],
+                        row[2],
+                        src,
+                        row[3],
+                    )
+                    records.append(rec)
+            return records
+        except sqlite3.Error as err:
+            cname: Final[str] = err.__class__.__name__
+            msg = f"{cname} trying to load records for Probe {src}: {err}"
+            self.log.error(msg)
+            raise DatabaseError(msg) from err
+
+    def record_get_latest(self) -> list[data.Record]:
+        """Return the most recent Record of each source for all Hosts."""
+        try:
+            rows = self._execute(QueryID.RecordGetLatest)
             records: list[data.Record] = []
-            # ...
-            for row in cur:
+            for row in rows:
                 rec = data.Record.get_instance(
+                    row[2],
                     row[0],
-                    row[1],
-                    datetime.fromtimestamp(row[2]),
-                    src,
                     row[3],
+                    row[1],
+                    row[4],
                 )
                 records.append(rec)
             return records
         except sqlite3.Error as err:
-            cname: Final[str] = err.__class__.__name__
-            msg = f"{cname} trying to load records for Probe {src}: {err}"
+            msg = f"{err.__class__.__name__} trying to load most recent records: {err}"
+            self.log.error(msg)
+            raise DatabaseError(msg) from err
+
+    def alert_add(self, alert: data.Alert) -> bool:
+        """Store a freshly raised Alert.
+
+        Returns False if there already is an active Alert for the same Host and rule.
+        """
+        try:
+            rows = self._execute(QueryID.AlertAdd,
+                                 (alert.host_id,
+                                  alert.rule,
+                                  alert.started,
+                                  alert.value,
+                                  alert.message))
+            if len(rows) == 0:
+                return False
+            alert.alert_id = rows[0][0]
+            return True
+        except sqlite3.Error as err:
+            msg = f"{err.__class__.__name__} trying to add Alert {alert.rule}: {err}"
+            self.log.error(msg)
+            raise DatabaseError(msg) from err
+
+    def alert_close(self, host_id: int, rule: str, ended: int) -> None:
+        """Mark the active Alert for the given Host and rule, if any, as ended."""
+        try:
+            self._execute(QueryID.AlertClose, (ended, host_id, rule))
+        except sqlite3.Error as err:
+            msg = f"{err.__class__.__name__} trying to close Alert {rule} for Host {host_id}: {err}"
             self.log.error(msg)
             raise DatabaseError(msg) from err
 
+    def alert_get_active(self) -> list[data.Alert]:
+        """Return all active Alerts, oldest first."""
+        try:
+            rows = self._execute(QueryID.AlertGetActive)
+            return [data.Alert(alert_id=row[0],
+                               host_id=row[1],
+                               rule=row[2],
+                               started=row[3],
+                               value=row[4],
+                               message=row[5]) for row in rows]
+        except sqlite3.Error as err:
+            msg = f"{err.__class__.__name__} trying to load active Alerts: {err}"
+            self.log.error(msg)
+            raise DatabaseError(msg) from err
+
+    def alert_get_recent(self, age: int = 86400) -> list[data.Alert]:
+        """Return the Alerts raised during the last age seconds, most recent first."""
+        try:
+            rows = self._execute(QueryID.AlertGetRecent, (int(time.time()) - age, ))
+            return [data.Alert(alert_id=row[0],
+                               host_id=row[1],
+                               rule=row[2],
+                               started=row[3],
+                               ended=row[4],
+                               value=row[5],
+                               message=row[6]) for row in rows]
+        except sqlite3.Error as err:
+            msg = f"{err.__class__.__name__} trying to load recent Alerts: {err}"
+            self.log.error(msg)
+            raise DatabaseError(msg) from err
+
+    def rollup_add(self, host_id: int, source: str, width: int, start: int, sk: Sketch) -> None:
+        """Store the summary of a Host's values from one source for one period.
+
+        An existing summary for the same period is replaced.
+        """
+        try:
+            self._execute(QueryID.RollupAdd,
+                          (host_id,
+                           source,
+                           width,
+                           start,
+                           sk.count,
+                           sk.sum,
+                           sk.min,
+                           sk.max,
+                           sk.to_bytes()))
+        except sqlite3.Error as err:
+            msg = f"{err.__class__.__name__} trying to add rollup for {source} " \
+                f"on Host {host_id}: {err}"
+            self.log.error(msg)
+            raise DatabaseError(msg) from err
+
+    def rollup_get_last(self, source: str, width: int) -> Optional[int]:
+        """Return the start of the most recent period summarized for a source.
+
+        Returns None if there is none.
+        """
+        try:
+            rows = self._execute(QueryID.RollupGetLast, (source, width))
+            return rows[0][0]
+        except sqlite3.Error as err:
+            msg = f"{err.__class__.__name__} trying to find latest rollup for {source}: {err}"
+            self.log.error(msg)
+            raise DatabaseError(msg) from err
+
+    def rollup_get_range(self, source: str, width: int, begin: int, end: int) \
+            -> list[tuple[int, int, Sketch]]:
+        """Return the summaries of all Hosts for the periods starting between begin and end.
+
+        Each one comes as a tuple of host ID, start of the period, and Sketch,
+        ordered by the start of the period.
+        """
+        try:
+            rows = self._execute(QueryID.RollupGetRange, (source, width, begin, end))
+            return [(row[0], row[1], Sketch.from_bytes(row[2])) for row in rows]
+        except (sqlite3.Error, SketchError) as err:
+            msg = f"{err.__class__.__name__} trying to load rollups for {source}: {err}"
+            self.log.error(msg)
+            raise DatabaseError(msg) from err
+
+
+class Pool:
+    """Pool keeps one connection to write through and a number of read-only ones.
+
+    With the write-ahead log, readers do not wait for the writer, nor the
+    writer for readers, so long queries for charts do not hold up Agents
+    submitting data. Connections are handed out by writer and reader, and
+    returned by closing them. Only one thread at a time gets the writer, the
+    thread holding it may ask for it again, e.g. to raise Alerts while it
+    ingests data. Up to size readers are handed out at a time, beyond that,
+    threads wait for one to be returned.
+
+    A checkpoint copies the log back into the database, but it cannot get
+    past pages a reader might still look at. So instead of having the writer
+    checkpoint as it goes, we do it when a connection is returned and no
+    reader is busy, once the log has grown to checkpoint bytes. In case the
+    readers are never idle, the writer still checkpoints on its own when the
+    log grows ten times as large, or as configured, if that is larger.
+    """
+
+    __slots__ = [
+        "log",
+        "path",
+        "size",
+        "checkpoint",
+        "lock",
+        "ready",
+        "idle",
+        "opened",
+        "busy",
+        "wlock",
+        "wdepth",
+        "wdb",
+    ]
+
+    log: logging.Logger
+    path: str
+    size: int
+    checkpoint: int
+    lock: Lock
+    ready: Condition
+    idle: list[Database]
+    opened: int
+    busy: int
+    wlock: RLock
+    wdepth: int
+    wdb: Optional[Database]
+
+    def __init__(self, path: str = "", size: int = READERS, checkpoint: int = CHECKPOINT) -> None:
+        assert size > 0
+        if path == "":
+            path = common.path.db()
+        self.log = common.get_logger("database")
+        self.path = path
+        self.size = size
+        self.checkpoint = checkpoint
+        self.lock = Lock()
+        self.ready = Condition(self.lock)
+        self.idle = []
+        self.opened = 0
+        self.busy = 0
+        self.wlock = RLock()
+        self.wdepth = 0
+        self.wdb = None
+
+    def writer(self) -> Database:
+        """Return the connection to write through, once no one else is using it."""
+        self.wlock.acquire()  # pylint: disable-msg=R1732
+        self.wdepth += 1
+        try:
+            if self.wdb is None:
+                db = Database(self.path)
+                cur: sqlite3.Cursor = db.db.cursor()
+                cur.execute("PRAGMA page_size")
+                pages: Final[int] = 10 * self.checkpoint // cur.fetchall()[0][0]
+                if 0 < db.storage.wal_autocheckpoint < pages:
+                    cur.execute(f"PRAGMA wal_autocheckpoint = {pages}")
+                db.pool = self
+                self.wdb = db
+        except BaseException:
+            self.wdepth -= 1
+            self.wlock.release()
+            raise
+        return self.wdb
+
+    def reader(self) -> Database:
+        """Return a read-only connection, waiting for one if all of them are busy."""
+        with self.ready:
+            while len(self.idle) == 0 and self.opened >= self.size:
+                self.ready.wait()
+            self.busy += 1
+            if len(self.idle) > 0:
+                return self.idle.pop()
+            self.opened += 1
+
+        try:
+            if self.wdb is None:
+                # Readers cannot create the database, the writer does.
+                self.writer().close()
+            db = Database(self.path, readonly=True)
+            db.pool = self
+            return db
+        except BaseException:
+            with self.ready:
+                self.opened -= 1
+                self.busy -= 1
+                self.ready.notify()
+            raise
+
+    def release(self, db: Database) -> None:
+        """Take back a connection handed out by writer or reader.
+
+        Returning a connection that was not handed out is logged and ignored.
+        """
+        if db is self.wdb:
+            # Taking the lock once more tells us if this thread is holding it
+            # at all. The lock is released in the finally clause below.
+            if not self.wlock.acquire(blocking=False):  # pylint: disable-msg=R1732
+                self.log.error("The writer was returned by a thread not holding it")
+                return
+            try:
+                if self.wdepth == 0:
+                    self.log.error("The writer was returned, but nobody was holding it")
+                    return
+                self.wdepth -= 1
+                self.wlock.release()
+                if self.wdepth > 0:
+                    return
+                if db.db.in_transaction:
+                    # Whoever had it left a transaction open, most likely after an error.
+                    db.db.rollback()
+            finally:
+                self.wlock.release()
+        else:
+            with self.ready:
+                if any(x is db for x in self.idle):
+                    self.log.error("A reader was returned twice")
+                    return
+                self.idle.append(db)
+                self.busy -= 1
+                self.ready.notify()
+        self._checkpoint()
+
+    def _checkpoint(self) -> None:
+        """Checkpoint the write-ahead log if it has grown large enough and no reader is busy."""
+        try:
+            if os.path.getsize(self.path + "-wal") < self.checkpoint:
+                return
+        except OSError:
+            return
+        with self.lock:
+            if self.busy > 0:
+                return
+        if self.wdb is None:
+            return
+        # The lock is released in the finally clause below.
+        if not self.wlock.acquire(blocking=False):  # pylint: disable-msg=R1732
+            return
+        try:
+            if self.wdepth > 0:
+                # We got here returning a reader while holding the writer.
+                return
+            cur: sqlite3.Cursor = self.wdb.db.cursor()
+            cur.execute("PRAGMA busy_timeout")
+            timeout: Final[int] = cur.fetchall()[0][0]
+            # Should a reader turn up after all, we checkpoint what we can
+            # instead of waiting for it.
+            cur.execute("PRAGMA busy_timeout = 0")
+            try:
+                cur.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                blocked, frames, done = cur.fetchall()[0]
+            finally:
+                cur.execute(f"PRAGMA busy_timeout = {timeout}")
+            self.log.debug("Checkpoint copied %d of %d pages%s",
+                           done,
+                           frames,
+                           " (blocked by a reader)" if blocked else "")
+        except sqlite3.Error as err:
+            self.log.error("%s trying to checkpoint the database: %s",
+                           err.__class__.__name__,
+                           err)
+        finally:
+            self.wlock.release()
+
+    def close(self) -> None:
+        """Close the connections that are not handed out at the moment."""
+        with self.ready:
+            idle: Final[list[Database]] = self.idle
+            self.idle = []
+            self.opened -= len(idle)
+        for db in idle:
+            db.pool = None
+            db.close()
+        with self.wlock:
+            if self.wdb is not None:
+                self.wdb.pool = None
+                self.wdb.close()
+                self.wdb = None
+
 
 # Local Variables: #
 # python-indent: 4 #
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 09:12:13 krylon>
+#
+# /data/code/python/medusa/fleet.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.fleet
+
+(c) 2026 Benjamin Walkenhorst
+
+Aggregates across all Hosts, so a chart of the whole fleet stays readable
+when there are more Hosts than lines one can tell apart.
+
+Each sample is first boiled down to a single number, e.g. the hottest sensor
+of a SensorRecord. The period is then cut into buckets of equal width, each
+Host contributes the average of its samples in a bucket, and we compute the
+percentiles across Hosts per bucket. We also rank Hosts over the whole
+period, to find the ones that stand out.
+
+All of this works on the columns in ringbuf.Window, which the SeriesBuffer
+hands out for recent periods and which can be built from Records for older ones.
+"""
+
+import math
+from array import array
+from typing import Final, NamedTuple, Sequence
+
+from medusa.ringbuf import Window
+
+# The sources we can aggregate.
+SOURCES: Final[frozenset[str]] = frozenset(("cpu", "sysload", "sensors", "disk"))
+
+# For free disk space, less is worse, for everything else, more is.
+LOW_IS_BAD: Final[frozenset[str]] = frozenset(("disk", ))
+
+DEFAULT_BUCKETS: Final[int] = 288
+DEFAULT_TOP: Final[int] = 10
+
+# The ways we can rank Hosts, see Rank.
+STATS: Final[tuple[str, ...]] = ("mean", "peak", "last")
+
+
+def sample_values(source: str, win: Window) -> Sequence[float]:
+    """Return one number per sample in a Window.
+
+    For sensors, that is the hottest sensor, NaN if none reported a value.
+    For all other sources, it is the score of the Record.
+    """
+    if source != "sensors":
+        return win.scores
+    cols: Final[list[array]] = list(win.columns.values())
+    result = array("d", [math.nan]) * len(win.stamps)
+    for col in cols:
+        for i, v in enumerate(col):
+            if not math.isnan(v) and (math.isnan(result[i]) or v > result[i]):
+                result[i] = v
+    return result
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Return the q-th quantile (0 <= q <= 1) of sorted values, interpolating between neighbours."""
+    assert 0 <= q <= 1
+    assert len(values) > 0
+    pos: Final[float] = q * (len(values) - 1)
+    lo: Final[int] = math.floor(pos)
+    hi: Final[int] = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+def quantiles(source: str) -> tuple[float, ...]:
+    """Return the quantiles worth looking at for a source.
+
+    These are the median, the bad tail, and the worst value.
+    """
+    if source in LOW_IS_BAD:
+        return (0.5, 0.05, 0.0)
+    return (0.5, 0.95, 1.0)
+
+
+def quantile_name(q: float) -> str:
+    """Return a label for a quantile, like p95."""
+    if q == 0:
+        return "min"
+    if q == 1:
+        return "max"
+    return f"p{q * 100:g}"
+
+
+class Bucket(NamedTuple):
+    """Bucket summarizes the Hosts' values over one slice of time.
+
+    values holds one number for each of the quantiles passed to aggregate.
+    """
+
+    stamp: int
+    hosts: int
+    values: tuple[float, ...]
+
+
+def aggregate(windows: dict[int, Window],
+              source: str,
+              since: int,
+              width: int,
+              qs: Sequence[float]) -> list[Bucket]:
+    """Compute the given quantiles across Hosts in buckets of width seconds.
+
+    Bucket boundaries are multiples of the width, so charts do not jitter
+    when they are refreshed. Buckets no Host reported in are left out.
+    """
+    assert width > 0
+    first: Final[int] = since - since % width
+    sums: Final = _bucket_sums(windows, source, since, first, width)
+    result: list[Bucket] = []
+    for idx in sorted(sums):
+        means = sorted(s / n for s, n in sums[idx].values())
+        result.append(Bucket(first + idx * width,
+                             len(means),
+                             tuple(percentile(means, q) for q in qs)))
+    return result
+
+
+def _bucket_sums(windows: dict[int, Window],
+                 source: str,
+                 since: int,
+                 first: int,
+                 width: int) -> dict[int, dict[int, list[float]]]:
+    """Add up each Host's values in each bucket, see aggregate.
+
+    Returns the sum and the number of values, by bucket index and Host ID.
+    """
+    sums: dict[int, dict[int, list[float]]] = {}
+    for hid, win in windows.items():
+        for t, v in zip(win.stamps, sample_values(source, win)):
+            if t < since or math.isnan(v):
+                continue
+            idx = (t - first) // width
+            per_host = sums.get(idx)
+            if per_host is None:
+                per_host = {}
+                sums[idx] = per_host
+            acc = per_host.get(hid)
+            if acc is None:
+                per_host[hid] = [v, 1]
+            else:
+                acc[0] += v
+                acc[1] += 1
+    return sums
+
+
+class Rank(NamedTuple):
+    """Rank sums up a Host's values over a period.
+
+    peak is the worst value, i.e. the highest, or the lowest for sources
+    where less is worse.
+    """
+
+    host_id: int
+    mean: float
+    peak: float
+    last: float
+    samples: int
+
+
+def rank(host_id: int, source: str, win: Window) -> Rank:
+    """Sum up one Host's values in a Window. If there are none, they are NaN."""
+    vals: Final[list[float]] = [v for v in sample_values(source, win) if not math.isnan(v)]
+    if len(vals) == 0:
+        return Rank(host_id, math.nan, math.nan, math.nan, 0)
+    peak: Final[float] = min(vals) if source in LOW_IS_BAD else max(vals)
+    return Rank(host_id, math.fsum(vals) / len(vals), peak, vals[-1], len(vals))
+
+
+def top(windows: dict[int, Window], source: str, n: int, stat: str = "mean") -> list[Rank]:
+    """Return the n Hosts that look worst by the given statistic, worst first.
+
+    Hosts without any values in their Window are left out.
+    """
+    if stat not in STATS:
+        raise ValueError(f"Unknown statistic {stat}")
+    ranks: Final[list[Rank]] = [r for r in (rank(hid, source, w) for hid, w in windows.items())
+                                if r.samples > 0]
+    sign: Final[int] = 1 if source in LOW_IS_BAD else -1
+    ranks.sort(key=lambda r: (sign * getattr(r, stat), r.host_id))
+    return ranks[:n]
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
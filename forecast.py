@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 08:33:04 krylon>
+#
+# /data/code/python/medusa/forecast.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.forecast
+
+(c) 2026 Benjamin Walkenhorst
+
+Predicts when file systems will run out of space.
+
+For each file system, we fit a straight line through the free space over
+time. Instead of keeping the samples around, we keep the weighted sums a
+least squares fit needs, and update them as DiskRecords arrive. Older
+samples count less and less, with a configurable half-life, so the trend
+follows changes in how a disk is used.
+
+Samples are measured relative to the most recent one, which keeps the sums
+small enough to avoid losing precision. Samples that do not fit the line get
+less weight, so a single odd value does not drag it around. If several
+samples in a row are off in the same direction, the level has shifted -
+someone cleaned up, or copied a lot of data - and the fit starts over.
+"""
+
+import math
+import time
+from threading import Lock
+from typing import Final, Iterable, NamedTuple, Optional
+
+from medusa.data import AnyRecord
+from medusa.database import Database
+
+HALF_LIFE: Final[float] = 86400.0
+HORIZON: Final[float] = 30 * 86400.0
+# How much history we read from the database on startup.
+SEED_AGE: Final[int] = 86400
+# We do not make predictions from fewer samples or a shorter period than this.
+MIN_SAMPLES: Final[int] = 10
+MIN_SPAN: Final[int] = 1800
+# Samples further than this many standard deviations from the line are
+# outliers, this many outliers in a row on the same side mean the level shifted.
+OUTLIER: Final[float] = 3.0
+SHIFT: Final[int] = 3
+
+
+class Fit(NamedTuple):
+    """Fit is a line through the free space on a file system, as of the most recent sample."""
+
+    free: float
+    rate: float
+    sigma: float
+
+
+class Trend:
+    """Trend holds the decayed sums for a weighted least squares fit of one file system."""
+
+    __slots__ = [
+        "s0",
+        "st",
+        "sx",
+        "stt",
+        "stx",
+        "sxx",
+        "count",
+        "streak",
+        "first",
+        "last",
+    ]
+
+    s0: float
+    st: float
+    sx: float
+    stt: float
+    stx: float
+    sxx: float
+    count: int
+    streak: int
+    first: int
+    last: int
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything."""
+        self.s0 = self.st = self.sx = self.stt = self.stx = self.sxx = 0.0
+        self.count = 0
+        self.streak = 0
+        self.first = self.last = 0
+
+    def add(self, stamp: int, x: float, half_life: float = HALF_LIFE) -> None:
+        """Add a sample. Samples older than the most recent one are ignored."""
+        if self.count > 0:
+            if stamp <= self.last:
+                return
+            # Move the origin to the new sample, then let the old ones fade.
+            d: Final[int] = stamp - self.last
+            self.stt += d * (d * self.s0 - 2 * self.st)
+            self.stx -= d * self.sx
+            self.st -= d * self.s0
+            decay: Final[float] = 0.5 ** (d / half_life)
+            self.s0 *= decay
+            self.st *= decay
+            self.sx *= decay
+            self.stt *= decay
+            self.stx *= decay
+            self.sxx *= decay
+            self.last = stamp
+        else:
+            self.first = self.last = stamp
+
+        w: float = 1.0
+        fit = self.fit()
+        if fit is not None:
+            r = x - fit.free
+            if abs(r) > OUTLIER * fit.sigma:
+                side = 1 if r > 0 else -1
+                self.streak = self.streak + side if self.streak * side > 0 else side
+                if abs(self.streak) >= SHIFT:
+                    self.reset()
+                    self.first = self.last = stamp
+                else:
+                    w = OUTLIER * fit.sigma / abs(r)
+            else:
+                self.streak = 0
+
+        # The new sample sits at t = 0, so the sums involving t do not change.
+        self.s0 += w
+        self.sx += w * x
+        self.sxx += w * x * x
+        self.count += 1
+
+    def fit(self) -> Optional[Fit]:
+        """Return the line through the samples, None if there is not enough data."""
+        if self.count < MIN_SAMPLES or self.last - self.first < MIN_SPAN:
+            return None
+        denom: Final[float] = self.s0 * self.stt - self.st * self.st
+        if denom <= 0:
+            return None
+        rate: Final[float] = (self.s0 * self.stx - self.st * self.sx) / denom
+        free: Final[float] = (self.sx - rate * self.st) / self.s0
+        sse: Final[float] = self.sxx - free * self.sx - rate * self.stx
+        # Even a perfectly straight line gets a bit of slack.
+        sigma: Final[float] = max(math.sqrt(max(sse, 0) / self.s0), 0.001 * abs(free), 1.0)
+        return Fit(free, rate, sigma)
+
+
+class Forecast(NamedTuple):
+    """Forecast is what we expect of one file system.
+
+    Free space is in KiB, the rate in KiB per second, negative if the file
+    system is filling up.
+    """
+
+    host_id: int
+    path: str
+    stamp: int
+    free: float
+    rate: float
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Return the number of seconds until the file system is full, None if never."""
+        if self.rate >= 0:
+            return None
+        return max(self.free, 0) / -self.rate
+
+    def full_at(self) -> Optional[int]:
+        """Return the time the file system will be full, in seconds since the epoch."""
+        eta = self.eta
+        return None if eta is None else int(self.stamp + eta)
+
+    def eta_str(self) -> str:
+        """Return a textual representation of the time until the file system is full."""
+        eta = self.eta
+        if eta is None:
+            return "never"
+        if eta < 3600:
+            return f"{eta / 60:.0f} minutes"
+        if eta < 2 * 86400:
+            return f"{eta / 3600:.1f} hours"
+        return f"{eta / 86400:.1f} days"
+
+
+class Forecaster:
+    """Forecaster keeps a Trend for each file system of each Host."""
+
+    __slots__ = [
+        "lock",
+        "half_life",
+        "trends",
+    ]
+
+    lock: Lock
+    half_life: float
+    trends: dict[int, dict[str, Trend]]
+
+    def __init__(self, half_life: float = HALF_LIFE) -> None:
+        self.lock = Lock()
+        self.half_life = half_life
+        self.trends = {}
+
+    def load(self, db: Database, age: int = SEED_AGE) -> None:
+        """Start off with the recent history from the database."""
+        now: Final[int] = int(time.time())
+        records = db.record_get_by_probe("disk", now - age, now, lazy=True)
+        for r in records:
+            self.update(r.host_id, (r, ))
+
+    def update(self, host_id: int, records: Iterable[AnyRecord]) -> None:
+        """Feed freshly ingested Records to the Forecaster."""
+        with self.lock:
+            trends = self.trends.get(host_id)
+            if trends is None:
+                trends = {}
+                self.trends[host_id] = trends
+            for rec in records:
+                if rec.source() != "disk":
+                    continue
+                for path, free in rec.values().items():
+                    tr = trends.get(path)
+                    if tr is None:
+                        tr = Trend()
+                        trends[path] = tr
+                    tr.add(rec.timestamp, free, self.half_life)
+
+    def _forecasts(self, host_id: int) -> Iterable[Forecast]:
+        """Turn the Trends of a Host into Forecasts. The caller must hold the lock."""
+        for path, tr in self.trends.get(host_id, {}).items():
+            fit = tr.fit()
+            if fit is not None:
+                yield Forecast(host_id, path, tr.last, fit.free, fit.rate)
+
+    def get(self, host_id: int) -> list[Forecast]:
+        """Return the Forecasts for all file systems of a Host, by path."""
+        with self.lock:
+            result = list(self._forecasts(host_id))
+        result.sort(key=lambda f: f.path)
+        return result
+
+    def at_risk(self, horizon: float = HORIZON) -> list[Forecast]:
+        """Return the file systems on all Hosts that will be full within horizon seconds.
+
+        The ones that run out first come first.
+        """
+        result: list[Forecast] = []
+        with self.lock:
+            for host_id in self.trends:
+                for fc in self._forecasts(host_id):
+                    eta = fc.eta
+                    if eta is not None and eta <= horizon:
+                        result.append(fc)
+        result.sort(key=lambda f: (f.eta or 0, f.host_id, f.path))
+        return result
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 09:12:26 krylon>
+#
+# /data/code/python/medusa/liveness.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.liveness
+
+(c) 2026 Benjamin Walkenhorst
+
+Keeps track of which Hosts are still reporting.
+
+Each Host has a deadline by which we expect to hear from it again. When it
+passes, the Host is considered stale, and after a second deadline, down.
+The deadlines are kept in a hashed timer wheel: a ring of buckets, one per
+tick, each holding the timers that expire during that tick. Re-arming a
+timer when a Host reports, and finding the timers that have expired, only
+touches the buckets involved, no matter how many Hosts there are.
+"""
+
+import logging
+import threading
+import time
+from enum import IntEnum, auto
+from typing import Callable, Final, Hashable, Iterable, NamedTuple, Optional
+
+from medusa import common
+from medusa.data import Host
+
+TICK: Final[float] = 1.0
+WHEEL_SIZE: Final[int] = 4096
+
+
+class TimerWheel:
+    """TimerWheel holds at most one timer per key and finds the expired ones.
+
+    Timers further in the future than one turn of the wheel stay in their
+    bucket and are skipped until their turn comes.
+    """
+
+    __slots__ = [
+        "tick",
+        "buckets",
+        "where",
+        "cursor",
+    ]
+
+    tick: float
+    buckets: list[dict[Hashable, float]]
+    where: dict[Hashable, int]
+    cursor: int
+
+    def __init__(self, now: float, tick: float = TICK, size: int = WHEEL_SIZE) -> None:
+        self.tick = tick
+        self.buckets = [{} for _ in range(size)]
+        self.where = {}
+        self.cursor = int(now // tick)
+
+    def __len__(self) -> int:
+        return len(self.where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.where
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        """Set the timer for key to expire at the given time, replacing any previous one."""
+        self.cancel(key)
+        idx: Final[int] = max(int(deadline // self.tick), self.cursor) % len(self.buckets)
+        self.buckets[idx][key] = deadline
+        self.where[key] = idx
+
+    def cancel(self, key: Hashable) -> None:
+        """Remove the timer for key, if there is one."""
+        idx = self.where.pop(key, None)
+        if idx is not None:
+            del self.buckets[idx][key]
+
+    def advance(self, now: float) -> list[Hashable]:
+        """Move the wheel forward to the given time, return the keys whose timers expired."""
+        target: Final[int] = int(now // self.tick)
+        size: Final[int] = len(self.buckets)
+        expired: list[Hashable] = []
+        # If we fell behind by more than a full turn, each bucket is visited once.
+        for t in range(max(self.cursor, target - size + 1), target + 1):
+            bucket = self.buckets[t % size]
+            due = [k for k, dl in bucket.items() if dl <= now]
+            for k in due:
+                del bucket[k]
+                del self.where[k]
+            expired.extend(due)
+        self.cursor = max(self.cursor, target)
+        return expired
+
+
+class Status(IntEnum):
+    """Status is what we think of a Host."""
+
+    Up = auto()
+    Stale = auto()
+    Down = auto()
+
+
+class Transition(NamedTuple):
+    """Transition records a Host changing its Status."""
+
+    host_id: int
+    old: Status
+    new: Status
+    stamp: int
+    last: int
+
+
+# The Alerts raised for Hosts that are stale or down, see alert.Engine.notify.
+ALERTS: Final[dict[Status, str]] = {
+    Status.Stale: "Host stale",
+    Status.Down: "Host down",
+}
+
+Listener = Callable[[list[Transition]], None]
+
+
+class Monitor:
+    """Monitor watches the Hosts' last contact and notices when they go quiet.
+
+    Hosts are added once from the cache and then kept up to date by calling
+    contact() whenever a Host reports. Listeners are told about all changes
+    in Status.
+    """
+
+    __slots__ = [
+        "log",
+        "lock",
+        "stale",
+        "down",
+        "wheel",
+        "status",
+        "last",
+        "listeners",
+        "queue",
+        "dispatch",
+        "stop_ev",
+        "thread",
+    ]
+
+    log: logging.Logger
+    lock: threading.Lock
+    stale: float
+    down: float
+    wheel: TimerWheel
+    status: dict[int, Status]
+    last: dict[int, float]
+    listeners: list[Listener]
+    queue: list[Transition]
+    dispatch: threading.Lock
+    stop_ev: threading.Event
+    thread: Optional[threading.Thread]
+
+    def __init__(self, stale: float, down: float, tick: float = TICK) -> None:
+        assert 0 < stale < down
+        self.log = common.get_logger("Liveness")
+        self.lock = threading.Lock()
+        self.stale = stale
+        self.down = down
+        self.wheel = TimerWheel(time.time(), tick)
+        self.status = {}
+        self.last = {}
+        self.listeners = []
+        self.queue = []
+        self.dispatch = threading.Lock()
+        self.stop_ev = threading.Event()
+        self.thread = None
+
+    def subscribe(self, listener: Listener) -> None:
+        """Register a function to be called with every batch of Transitions.
+
+        Listeners are called synchronously, while the dispatch lock is held,
+        by whichever thread noticed the change. So they must not wait for
+        any other lock, e.g. the database writer, or they might deadlock
+        with a thread that holds it and reports contact with a Host. Such
+        listeners should be wrapped in a Relay.
+        """
+        self.listeners.append(listener)
+
+    def load(self, hosts: Iterable[Host], now: float = 0) -> list[Transition]:
+        """Add Hosts, judging them by their last_contact timestamp.
+
+        Hosts that have been quiet for too long start out as stale or down,
+        which is reported like any other Transition.
+        """
+        if now == 0:
+            now = time.time()
+        with self.lock:
+            for h in hosts:
+                last = h.last_contact.timestamp()
+                self.last[h.host_id] = last
+                self.status[h.host_id] = Status.Up
+                self._arm(h.host_id, Status.Up)
+            changes = self._expire(now)
+        self._flush()
+        return changes
+
+    def contact(self, host_id: int, stamp: float = 0) -> Optional[Transition]:
+        """Note that we have heard from a Host."""
+        if stamp == 0:
+            stamp = time.time()
+        with self.lock:
+            self.last[host_id] = max(stamp, self.last.get(host_id, 0))
+            old = self.status.get(host_id, Status.Up)
+            self.status[host_id] = Status.Up
+            self._arm(host_id, Status.Up)
+            if old == Status.Up:
+                return None
+            tr = Transition(host_id, old, Status.Up, int(stamp), int(stamp))
+            self.queue.append(tr)
+        self._flush()
+        return tr
+
+    def check(self, now: float = 0) -> list[Transition]:
+        """Find the Hosts whose deadlines have passed."""
+        if now == 0:
+            now = time.time()
+        with self.lock:
+            changes = self._expire(now)
+        if len(changes) > 0:
+            self._flush()
+        return changes
+
+    def get(self, host_id: int) -> Optional[Status]:
+        """Return the Status of a Host, None if we do not know it."""
+        with self.lock:
+            return self.status.get(host_id)
+
+    def get_all(self) -> dict[int, Status]:
+        """Return the Status of all Hosts."""
+        with self.lock:
+            return dict(self.status)
+
+    def start(self) -> None:
+        """Check the deadlines in the background, once per tick."""
+        self.thread = threading.Thread(target=self._loop, name="Liveness", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread."""
+        self.stop_ev.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _loop(self) -> None:
+        """Call check once per tick until we are told to stop."""
+        while not self.stop_ev.wait(self.wheel.tick):
+            try:
+                self.check()
+            except Exception as err:  # pylint: disable-msg=W0718
+                self.log.error("%s checking Host liveness: %s",
+                               err.__class__.__name__,
+                               err)
+
+    def _arm(self, host_id: int, status: Status) -> None:
+        """Set the timer for the next Transition a Host may go through.
+
+        The caller must hold the lock.
+        """
+        match status:
+            case Status.Up:
+                self.wheel.schedule(host_id, self.last[host_id] + self.stale)
+            case Status.Stale:
+                self.wheel.schedule(host_id, self.last[host_id] + self.down)
+            case Status.Down:
+                self.wheel.cancel(host_id)
+
+    def _expire(self, now: float) -> list[Transition]:
+        """Move Hosts whose timers have expired on to the next Status.
+
+        A Host may go from Up to Down at once, if both deadlines have passed.
+        The Transitions are queued for the listeners, the caller must hold the lock.
+        """
+        changes: list[Transition] = []
+        pending: list[Hashable] = self.wheel.advance(now)
+        while len(pending) > 0:
+            for hid in pending:
+                assert isinstance(hid, int)
+                old = self.status[hid]
+                new = Status.Stale if old == Status.Up else Status.Down
+                self.status[hid] = new
+                self._arm(hid, new)
+                changes.append(Transition(hid, old, new, int(now), int(self.last[hid])))
+            pending = self.wheel.advance(now)
+        self.queue.extend(changes)
+        return changes
+
+    def _flush(self) -> None:
+        """Pass queued Transitions to the listeners, without holding the lock.
+
+        Transitions are queued while the lock is held and handed out under a
+        separate lock, so listeners see them in the order they happened, even
+        if several threads report changes at the same time. See subscribe for
+        what that means for listeners.
+        """
+        with self.dispatch:
+            with self.lock:
+                batch = self.queue
+                self.queue = []
+            if len(batch) == 0:
+                return
+            for tr in batch:
+                self.log.info("Host %d went from %s to %s", tr.host_id, tr.old.name, tr.new.name)
+            for fn in self.listeners:
+                try:
+                    fn(batch)
+                except Exception as err:  # pylint: disable-msg=W0718
+                    self.log.error("%s passing liveness changes to %s: %s",
+                                   err.__class__.__name__,
+                                   fn,
+                                   err)
+
+
+class Relay:
+    """Relay passes batches of Transitions on to a function, on a thread of its own.
+
+    The Monitor calls its listeners while holding its dispatch lock, and
+    contact() is called by threads that may hold other locks, like the
+    database writer. A listener that waits for such a lock deadlocks with
+    them. Subscribing a Relay instead of the listener itself only queues the
+    Transitions, the function gets them on the Relay's thread, in order.
+    """
+
+    __slots__ = [
+        "log",
+        "fn",
+        "cond",
+        "pending",
+        "stopped",
+        "thread",
+    ]
+
+    log: logging.Logger
+    fn: Listener
+    cond: threading.Condition
+    pending: list[Transition]
+    stopped: bool
+    thread: Optional[threading.Thread]
+
+    def __init__(self, fn: Listener) -> None:
+        self.log = common.get_logger("Liveness")
+        self.fn = fn
+        self.cond = threading.Condition()
+        self.pending = []
+        self.stopped = False
+        self.thread = None
+
+    def __call__(self, batch: list[Transition]) -> None:
+        with self.cond:
+            self.pending.extend(batch)
+            self.cond.notify()
+
+    def start(self) -> None:
+        """Pass Transitions on in the background."""
+        self.thread = threading.Thread(target=self._loop, name="LivenessRelay", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Pass on what is still queued, then stop the background thread."""
+        with self.cond:
+            self.stopped = True
+            self.cond.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _loop(self) -> None:
+        """Hand queued Transitions to the function until we are told to stop."""
+        while True:
+            with self.cond:
+                while len(self.pending) == 0 and not self.stopped:
+                    self.cond.wait()
+                if len(self.pending) == 0:
+                    return
+                batch = self.pending
+                self.pending = []
+            try:
+                self.fn(batch)
+            except Exception as err:  # pylint: disable-msg=W0718
+                self.log.error("%s passing liveness changes to %s: %s",
+                               err.__class__.__name__,
+                               self.fn,
+                               err)
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Time-stamp: <2025-06-02 18:35:39 krylon>
+# Time-stamp: <2026-10-19 08:16:54 krylon>
 #
 # /data/code/python/medusa/medusa.py
 # created on 07. 05. 2025
@@ -23,7 +23,7 @@ import os
 import sys
 from threading import Thread
 
-from medusa import common
+from medusa import common, profiler
 from medusa.agent import Agent
 # from medusa.server import Server
 from medusa.web import WebUI
@@ -44,6 +44,7 @@ print(f"Mode: {args.mode} - Base: {args.basedir} - Address: {args.address} - Por
 
 try:
     common.set_basedir(os.path.expanduser(args.basedir))
+    profiler.install_signal_handler()
 
     match args.mode:
         case "server":
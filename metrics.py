@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 09:10:53 krylon>
+#
+# /data/code/python/medusa/metrics.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.metrics
+
+(c) 2026 Benjamin Walkenhorst
+
+Counters, gauges and histograms that tell us what Medusa itself is doing.
+They are rendered in the Prometheus text format, so they can be scraped by
+anything that speaks it, or just read by a human.
+
+Updating a metric costs a lock and a few additions, so it is cheap enough
+for the hot paths. Rates, e.g. records per second, are left to whoever
+reads the counters.
+"""
+
+import os
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from typing import ClassVar, Final, Iterator, Optional, Union
+
+Labels = tuple[str, ...]
+
+# Suitable for latencies, in seconds.
+DEFAULT_BUCKETS: Final[tuple[float, ...]] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(val: str) -> str:
+    """Escape a label value for the text format."""
+    return val.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _fmt_labels(names: Labels, values: Labels, extra: str = "") -> str:
+    """Format a set of labels, e.g. {route="/main",method="GET"}."""
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra != "":
+        parts.append(extra)
+    if len(parts) == 0:
+        return ""
+    return "{" + ",".join(parts) + "}"
+
+
+def _fmt_num(n: Union[int, float]) -> str:
+    """Format a number, without a pointless .0 for integral values."""
+    if isinstance(n, float) and n.is_integer() and abs(n) < 2**53:
+        return str(int(n))
+    return repr(n)
+
+
+class Metric(ABC):
+    """Metric is the base class for all kinds of metrics."""
+
+    __slots__ = [
+        "name",
+        "help",
+        "labels",
+        "lock",
+    ]
+
+    kind: ClassVar[str] = "untyped"
+
+    name: str
+    help: str
+    labels: Labels
+    lock: Lock
+
+    def __init__(self, name: str, helptext: str, labels: Labels = ()) -> None:
+        self.name = name
+        self.help = helptext
+        self.labels = labels
+        self.lock = Lock()
+
+    def render(self) -> list[str]:
+        """Return the lines representing the Metric in the text format."""
+        lines = [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self._samples())
+        return lines
+
+    @abstractmethod
+    def _samples(self) -> list[str]:
+        """Return the lines holding the values of the Metric."""
+
+
+class Counter(Metric):
+    """Counter is a value that only ever goes up."""
+
+    __slots__ = ["values"]
+
+    kind = "counter"
+
+    values: dict[Labels, float]
+
+    def __init__(self, name: str, helptext: str, labels: Labels = ()) -> None:
+        super().__init__(name, helptext, labels)
+        self.values = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        """Increment the Counter."""
+        assert len(labels) == len(self.labels)
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def get(self, labels: Labels = ()) -> float:
+        """Return the current value of the Counter."""
+        with self.lock:
+            return self.values.get(labels, 0)
+
+    def _samples(self) -> list[str]:
+        with self.lock:
+            return [f"{self.name}{_fmt_labels(self.labels, k)} {_fmt_num(v)}"
+                    for k, v in sorted(self.values.items())]
+
+
+class Gauge(Counter):
+    """Gauge is a value that may go up and down."""
+
+    __slots__: list[str] = []
+
+    kind = "gauge"
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        """Set the Gauge to the given value."""
+        assert len(labels) == len(self.labels)
+        with self.lock:
+            self.values[labels] = value
+
+
+class Histogram(Metric):
+    """Histogram counts observations, e.g. latencies, in buckets with fixed upper bounds."""
+
+    __slots__ = [
+        "buckets",
+        "counts",
+        "sums",
+    ]
+
+    kind = "histogram"
+
+    buckets: tuple[float, ...]
+    counts: dict[Labels, list[int]]
+    sums: dict[Labels, float]
+
+    def __init__(self,
+                 name: str,
+                 helptext: str,
+                 labels: Labels = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, helptext, labels)
+        assert list(buckets) == sorted(buckets)
+        self.buckets = buckets
+        self.counts = {}
+        self.sums = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        """Record an observation."""
+        # The last slot catches everything above the largest bucket.
+        idx: Final[int] = bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.counts.get(labels)
+            if counts is None:
+                assert len(labels) == len(self.labels)
+                counts = [0] * (len(self.buckets) + 1)
+                self.counts[labels] = counts
+                self.sums[labels] = 0.0
+            counts[idx] += 1
+            self.sums[labels] += value
+
+    @contextmanager
+    def time(self, labels: Labels = ()) -> Iterator[None]:
+        """Observe the time it takes to execute the body of a with statement."""
+        t0: Final[float] = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, labels)
+
+    def count(self, labels: Labels = ()) -> int:
+        """Return the number of observations."""
+        with self.lock:
+            return sum(self.counts.get(labels, ()))
+
+    def _samples(self) -> list[str]:
+        lines: list[str] = []
+        with self.lock:
+            for key in sorted(self.counts):
+                total: int = 0
+                for bound, n in zip(self.buckets, self.counts[key]):
+                    total += n
+                    le = _fmt_labels(self.labels, key, f'le="{_fmt_num(bound)}"')
+                    lines.append(f"{self.name}_bucket{le} {total}")
+                total += self.counts[key][-1]
+                le = _fmt_labels(self.labels, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{le} {total}")
+                lbl = _fmt_labels(self.labels, key)
+                lines.append(f"{self.name}_sum{lbl} {_fmt_num(self.sums[key])}")
+                lines.append(f"{self.name}_count{lbl} {total}")
+        return lines
+
+
+class Registry:
+    """Registry keeps track of all Metrics.
+
+    Asking for a Metric that already exists returns the existing one, so
+    modules can declare their Metrics at import time without stepping on
+    each other.
+    """
+
+    __slots__ = [
+        "lock",
+        "metrics",
+    ]
+
+    lock: Lock
+    metrics: dict[str, Metric]
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.metrics = {}
+
+    def _get(self, cls: type["Metric"], name: str, *args, **kwargs) -> Metric:
+        with self.lock:
+            m: Optional[Metric] = self.metrics.get(name)
+            if m is None:
+                m = cls(name, *args, **kwargs)
+                self.metrics[name] = m
+            elif type(m) is not cls:  # pylint: disable-msg=C0123
+                raise TypeError(f"Metric {name} is a {m.kind}, not a {cls.kind}")
+            return m
+
+    def counter(self, name: str, helptext: str, labels: Labels = ()) -> Counter:
+        """Return the Counter with the given name, creating it if necessary."""
+        m = self._get(Counter, name, helptext, labels)
+        assert isinstance(m, Counter)
+        return m
+
+    def gauge(self, name: str, helptext: str, labels: Labels = ()) -> Gauge:
+        """Return the Gauge with the given name, creating it if necessary."""
+        m = self._get(Gauge, name, helptext, labels)
+        assert isinstance(m, Gauge)
+        return m
+
+    def histogram(self,
+                  name: str,
+                  helptext: str,
+                  labels: Labels = (),
+                  buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        """Return the Histogram with the given name, creating it if necessary."""
+        m = self._get(Histogram, name, helptext, labels, buckets)
+        assert isinstance(m, Histogram)
+        return m
+
+    def render(self) -> str:
+        """Render all Metrics in the text format."""
+        with self.lock:
+            mlist = sorted(self.metrics.values(), key=lambda m: m.name)
+        lines: list[str] = []
+        for m in mlist:
+            lines.extend(m.render())
+        lines.append("")
+        return "\n".join(lines)
+
+    def dump(self, path: str) -> None:
+        """Write all Metrics to a file.
+
+        The file is replaced atomically, so readers never see a half-written file.
+        """
+        tmp: Final[str] = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(self.render())
+        os.replace(tmp, path)
+
+
+registry: Final[Registry] = Registry()
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Time-stamp: <2025-04-25 16:31:01 krylon>
+# Time-stamp: <2026-10-19 09:07:38 krylon>
 #
 # /data/code/python/medusa/probe/base.py
 # created on 25. 01. 2024
@@ -40,6 +40,10 @@ class Probe(ABC):
     def _set_stamp(self):
         self.last_fetch = datetime.now()
 
+    def stamp(self) -> int:
+        """Return the time of the last fetch as seconds since the epoch."""
+        return int(self.last_fetch.timestamp())
+
     @abstractmethod
     def get_data(self) -> Optional[Record]:
         """Retrieve data."""
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Time-stamp: <2025-05-05 19:39:45 krylon>
+# Time-stamp: <2026-10-19 09:07:38 krylon>
 #
 # /data/code/python/medusa/probe/cpu.py
 # created on 27. 01. 2024
@@ -30,13 +30,13 @@ class CPUProbe(Probe):
         self._set_stamp()
         if "hz_actual" in data:
             info: CPURecord = CPURecord(
-                timestamp=self.last_fetch,
+                timestamp=self.stamp(),
                 frequency=data["hz_actual"][0],
             )
             # TODO Get temperature, if possible utilization, too.
         else:
             info = CPURecord(
-                timestamp=self.last_fetch,
+                timestamp=self.stamp(),
                 frequency=0)
         return info
 
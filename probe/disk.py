@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Time-stamp: <2025-05-13 16:55:58 krylon>
+# Time-stamp: <2026-10-19 09:07:38 krylon>
 #
 # /data/code/python/medusa/probe/disk.py
 # created on 12. 05. 2025
@@ -55,7 +55,7 @@ class DiskProbe(Probe):
         if proc.returncode != 0:
             self.log.error("Failed to invoke df(1):\n%s\n\n",
                            proc.stderr)
-            return DiskRecord(timestamp=self.last_fetch, disks=result)
+            return DiskRecord(timestamp=self.stamp(), disks=result)
 
         matches = df_pat.findall(proc.stdout)
         for m in matches:
@@ -68,7 +68,7 @@ class DiskProbe(Probe):
             )
             result[fs.path] = fs
 
-        return DiskRecord(timestamp=self.last_fetch, disks=result)
+        return DiskRecord(timestamp=self.stamp(), disks=result)
 
 
 # Local Variables: #
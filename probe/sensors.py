@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Time-stamp: <2025-05-31 14:28:27 krylon>
+# Time-stamp: <2026-10-19 09:07:38 krylon>
 #
 # /data/code/python/medusa/probe/sensors.py
 # created on 09. 05. 2025
@@ -64,7 +64,7 @@ class SensorProbe(Probe):
         self._set_stamp()
         if result is None:
             result = {}
-        rec = SensorRecord(timestamp=self.last_fetch, sensors=result)
+        rec = SensorRecord(timestamp=self.stamp(), sensors=result)
         return rec
 
     def _run_sensors_linux(self) -> Optional[dict[str, SensorData]]:
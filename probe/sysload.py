@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Time-stamp: <2025-04-25 16:32:03 krylon>
+# Time-stamp: <2026-10-19 09:07:38 krylon>
 #
 # /data/code/python/medusa/probe/sysload.py
 # created on 25. 01. 2024
@@ -30,7 +30,7 @@ class LoadProbe(Probe):
         data = os.getloadavg()
         self._set_stamp()
         record = LoadRecord(
-            timestamp=self.last_fetch,
+            timestamp=self.stamp(),
             load=SysLoad(data[0], data[1], data[2]),
         )
         return record
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 09:31:05 krylon>
+#
+# /data/code/python/medusa/profiler.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.profiler
+
+(c) 2026 Benjamin Walkenhorst
+
+A sampling profiler that can be switched on in a running process.
+
+For a limited time, it looks at the stacks of all threads at regular
+intervals and counts how often it sees each one. The result is written to
+the base directory in the collapsed-stack format that flamegraph.pl,
+speedscope and friends understand. Nothing is slowed down unless the
+profiler is running.
+"""
+
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from types import CodeType, FrameType
+from typing import Final, Optional
+
+from medusa import common
+
+# How often we take a sample, in seconds.
+INTERVAL: Final[float] = 0.005
+DEFAULT_DURATION: Final[float] = 30.0
+MAX_DURATION: Final[float] = 300.0
+
+
+class ProfilerBusyError(common.MedusaError):
+    """Indicates that a profiling run is in progress already."""
+
+
+class Profiler:
+    """Profiler samples the stacks of all threads for a limited time."""
+
+    __slots__ = [
+        "log",
+        "lock",
+        "interval",
+        "thread",
+        "labels",
+    ]
+
+    log: logging.Logger
+    lock: threading.Lock
+    interval: float
+    thread: Optional[threading.Thread]
+    labels: dict[CodeType, str]
+
+    def __init__(self, interval: float = INTERVAL) -> None:
+        self.log = common.get_logger("Profiler")
+        self.lock = threading.Lock()
+        self.interval = interval
+        self.thread = None
+        self.labels = {}
+
+    def running(self) -> bool:
+        """Return True if a profiling run is in progress."""
+        with self.lock:
+            return self.thread is not None and self.thread.is_alive()
+
+    def start(self, seconds: float = DEFAULT_DURATION) -> str:
+        """Start sampling for the given number of seconds, in the background.
+
+        Returns the path of the file the profile will be written to.
+        """
+        seconds = min(max(seconds, self.interval), MAX_DURATION)
+        path: Final[str] = os.path.join(
+            common.path.base(),
+            datetime.now().strftime("profile_%Y%m%d_%H%M%S.folded"))
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                raise ProfilerBusyError("A profiling run is in progress already")
+            self.thread = threading.Thread(target=self._run,
+                                           args=(seconds, path),
+                                           name="Profiler",
+                                           daemon=True)
+            self.thread.start()
+        self.log.info("Profiling for %.1f seconds, results go to %s", seconds, path)
+        return path
+
+    def _label(self, code: CodeType) -> str:
+        """Return the name of a stack frame, as it appears in the profile."""
+        lbl = self.labels.get(code)
+        if lbl is None:
+            lbl = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            lbl = lbl.replace(";", ",")
+            self.labels[code] = lbl
+        return lbl
+
+    def _collapse(self, thread: str, frame: Optional[FrameType]) -> str:
+        """Turn a stack into a single line, from the outermost frame to the innermost."""
+        stack: list[str] = []
+        while frame is not None:
+            stack.append(self._label(frame.f_code))
+            frame = frame.f_back
+        stack.append(thread.replace(";", ","))
+        stack.reverse()
+        return ";".join(stack)
+
+    def _run(self, seconds: float, path: str) -> None:
+        """Take samples until the time is up, then write the profile."""
+        me: Final[int] = threading.get_ident()
+        samples: Counter[str] = Counter()
+        rounds: int = 0
+        deadline: Final[float] = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():  # pylint: disable-msg=W0212
+                if tid != me:
+                    samples[self._collapse(names.get(tid, str(tid)), frame)] += 1
+            rounds += 1
+            time.sleep(self.interval)
+
+        try:
+            tmp: Final[str] = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                for stack, cnt in sorted(samples.items()):
+                    fh.write(f"{stack} {cnt}\n")
+            os.replace(tmp, path)
+            self.log.info("Wrote profile with %d samples of %d distinct stacks to %s",
+                          rounds,
+                          len(samples),
+                          path)
+        except OSError as err:
+            self.log.error("Failed to write profile to %s: %s", path, err)
+
+
+profiler: Final[Profiler] = Profiler()
+
+
+def install_signal_handler(seconds: float = DEFAULT_DURATION) -> None:
+    """Start a profiling run whenever the process receives SIGUSR1.
+
+    Starting a run takes locks the interrupted code might be holding, so the
+    signal handler merely wakes up a thread that does it.
+    This must be called from the main thread.
+    """
+    if not hasattr(signal, "SIGUSR1"):
+        return
+
+    requested: Final[threading.Event] = threading.Event()
+
+    def watch() -> None:
+        while True:
+            requested.wait()
+            requested.clear()
+            try:
+                profiler.start(seconds)
+            except ProfilerBusyError as err:
+                profiler.log.info("Ignoring SIGUSR1: %s", err)
+
+    def handler(_signum, _frame) -> None:
+        requested.set()
+
+    threading.Thread(target=watch, name="ProfilerSignal", daemon=True).start()
+    signal.signal(signal.SIGUSR1, handler)
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Time-stamp: <2025-06-02 18:01:03 krylon>
+# Time-stamp: <2026-10-19 08:19:12 krylon>
 #
 # /data/code/python/medusa/proto.py
 # created on 23. 04. 2025
@@ -16,7 +16,6 @@ medusa.proto
 (c) 2025 Benjamin Walkenhorst
 """
 
-import json
 import os
 import socket
 import warnings
@@ -24,7 +23,7 @@ from datetime import datetime, timedelta
 from enum import IntEnum, auto
 from typing import Final
 
-from medusa import common
+from medusa import codec, common
 from medusa.common import MedusaError
 
 # For testing/debugging, I set this to a very low value, later on I should increase this.
@@ -67,6 +66,12 @@ class MsgType(IntEnum):
     Success = auto()
 
 
+# Every Message starts the same way, depending only on its status, so we
+# prepare those parts once.
+_msg_prefix: Final[dict[MsgType, str]] = \
+    {t: f'{{"status": {t.value}, "timestamp": ' for t in MsgType}
+
+
 class Message:  # pylint: disable-msg=R0903
     """Message is the response the Web server sends to the Agent, and possibly to the WebUI."""
 
@@ -89,14 +94,15 @@ class Message:  # pylint: disable-msg=R0903
             self.msg = ""
 
     def json(self) -> str:
-        """Convert the instance to JSON."""
-        tbl = {
-            "status": self.status,
-            "timestamp": self.timestamp,
-            "msg": self.msg,
-        }
-
-        return json.dumps(tbl)
+        """Convert the instance to JSON.
+
+        The output is the same as json.dumps would produce for a dict of our fields.
+        """
+        return "".join((_msg_prefix[self.status],
+                        codec.encode_str(self.timestamp),
+                        ', "msg": ',
+                        codec.encode_str(self.msg),
+                        "}"))
 
 
 # Local Variables: #
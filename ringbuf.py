@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 09:15:51 krylon>
+#
+# /data/code/python/medusa/ringbuf.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.ringbuf
+
+(c) 2026 Benjamin Walkenhorst
+
+Recent samples per Host and source, kept in memory as typed arrays, so
+charts of the last few hours can be drawn without asking the database.
+
+Each Ring holds one column of timestamps, one of scores, and one per value
+name (see Record.values). Values missing from a sample are stored as NaN.
+A Ring only covers a sliding window of time, older samples are dropped.
+
+The total size of all Rings is limited. When the limit is exceeded, the
+Rings of the Host whose data was least recently looked at are dropped. A
+Host's Rings are loaded from the database the next time someone asks.
+"""
+
+import logging
+import math
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from threading import Lock
+from typing import Collection, Final, Iterable, NamedTuple, Optional
+
+from medusa import common
+from medusa.data import AnyRecord, Host
+from medusa.database import Database
+
+NAN: Final[float] = math.nan
+
+# Only these sources are buffered, so a request for some made-up source
+# cannot make us allocate anything.
+SOURCES: Final[frozenset[str]] = frozenset(("cpu", "sysload", "sensors", "disk"))
+
+
+class Window(NamedTuple):
+    """Window is a copy of the samples in a Ring from a given point in time on."""
+
+    stamps: array
+    scores: array
+    columns: dict[str, array]
+
+    def points(self, name: str) -> list[tuple[int, float]]:
+        """Return (timestamp, value) pairs for one column, skipping gaps."""
+        return [(t, v) for t, v in zip(self.stamps, self.columns[name]) if not math.isnan(v)]
+
+    def score_points(self) -> list[tuple[int, float]]:
+        """Return (timestamp, score) pairs."""
+        return list(zip(self.stamps, self.scores))
+
+
+class Ring:
+    """Ring holds the samples of one source on one Host, ordered by time.
+
+    Samples before head are dead and get removed in bulk once they make up
+    half of the arrays, so dropping old samples is cheap on average.
+    """
+
+    __slots__ = [
+        "stamps",
+        "scores",
+        "columns",
+        "head",
+        "ready",
+        "pending",
+    ]
+
+    stamps: array
+    scores: array
+    columns: dict[str, array]
+    head: int
+    ready: bool
+    pending: list[AnyRecord]
+
+    def __init__(self) -> None:
+        self.stamps = array("q")
+        self.scores = array("d")
+        self.columns = {}
+        self.head = 0
+        self.ready = False
+        self.pending = []
+
+    def __len__(self) -> int:
+        return len(self.stamps) - self.head
+
+    def nbytes(self) -> int:
+        """Return the approximate amount of memory used by the samples."""
+        return len(self.stamps) * 8 * (2 + len(self.columns))
+
+    def add(self, rec: AnyRecord) -> None:
+        """Add a sample. Samples usually arrive in order, but need not."""
+        stamp: Final[int] = rec.timestamp
+        if len(self.stamps) > 0 and stamp <= self.stamps[-1]:
+            idx = bisect_left(self.stamps, stamp, self.head)
+            if idx < len(self.stamps) and self.stamps[idx] == stamp:
+                return
+        else:
+            idx = len(self.stamps)
+
+        values = rec.values()
+        for name in values:
+            if name not in self.columns:
+                self.columns[name] = array("d", [NAN]) * len(self.stamps)
+
+        self.stamps.insert(idx, stamp)
+        self.scores.insert(idx, rec.score())
+        for name, col in self.columns.items():
+            col.insert(idx, values.get(name, NAN))
+
+    def trim(self, oldest: int) -> None:
+        """Drop all samples older than the given timestamp."""
+        self.head = bisect_left(self.stamps, oldest, self.head)
+        if self.head > 64 and self.head * 2 > len(self.stamps):
+            del self.stamps[:self.head]
+            del self.scores[:self.head]
+            for col in self.columns.values():
+                del col[:self.head]
+            self.head = 0
+
+    def window(self, since: int, until: int) -> Window:
+        """Return a copy of the samples in the given period."""
+        lo: Final[int] = bisect_left(self.stamps, since, self.head)
+        hi: Final[int] = bisect_right(self.stamps, until, lo)
+        return Window(self.stamps[lo:hi],
+                      self.scores[lo:hi],
+                      {k: c[lo:hi] for k, c in self.columns.items()})
+
+
+def window_from_records(records: Iterable[AnyRecord]) -> Window:
+    """Build a Window from Records, e.g. for periods the buffer does not cover."""
+    ring = Ring()
+    for r in records:
+        ring.add(r)
+    return Window(ring.stamps, ring.scores, ring.columns)
+
+
+def _group_records(records: Iterable[AnyRecord],
+                   by_host: dict[int, list[AnyRecord]],
+                   known: Collection[int],
+                   since: int) -> dict[int, list[AnyRecord]]:
+    """Add Records to the lists in by_host, by their Host ID.
+
+    Records of Hosts that are neither in by_host nor in known are returned,
+    grouped the same way, if they are not older than since.
+    """
+    unknown: dict[int, list[AnyRecord]] = {}
+    for r in records:
+        if r.host_id in by_host:
+            by_host[r.host_id].append(r)
+        elif r.host_id not in known and r.timestamp >= since:
+            if r.host_id in unknown:
+                unknown[r.host_id].append(r)
+            else:
+                unknown[r.host_id] = [r]
+    return unknown
+
+
+class SeriesBuffer:
+    """SeriesBuffer keeps the recent samples of all Hosts in memory, up to a given size."""
+
+    __slots__ = [
+        "log",
+        "lock",
+        "span",
+        "limit",
+        "used",
+        "hosts",
+    ]
+
+    log: logging.Logger
+    lock: Lock
+    span: int
+    limit: int
+    used: int
+    hosts: OrderedDict[int, dict[str, Ring]]
+
+    def __init__(self, span: int, limit: int) -> None:
+        self.log = common.get_logger("SeriesBuffer")
+        self.lock = Lock()
+        self.span = span
+        self.limit = limit
+        self.used = 0
+        self.hosts = OrderedDict()
+
+    def covers(self, source: str, age: int) -> bool:
+        """Return True if the buffer can answer for a source and period of the given length."""
+        return source in SOURCES and age <= self.span
+
+    def add(self, host_id: int, records: Iterable[AnyRecord]) -> None:
+        """Add freshly ingested Records.
+
+        Records for Rings that have not been loaded are dropped, they will be
+        read from the database when someone asks for them.
+        """
+        with self.lock:
+            rings = self.hosts.get(host_id)
+            if rings is None:
+                return
+            for r in records:
+                ring = rings.get(r.source())
+                if ring is None:
+                    continue
+                if not ring.ready:
+                    ring.pending.append(r)
+                    continue
+                before = ring.nbytes()
+                ring.add(r)
+                ring.trim(ring.stamps[-1] - self.span)
+                self.used += ring.nbytes() - before
+            self._evict()
+
+    def get(self, db: Database, host: Host, source: str, age: int) -> Optional[Window]:
+        """Return the samples of the last age seconds from one source on a Host.
+
+        Returns None if the period is longer than the buffer covers, or if the
+        Ring is being loaded by someone else right now.
+        """
+        if not self.covers(source, age):
+            return None
+        now: Final[int] = int(time.time())
+        with self.lock:
+            rings = self.hosts.get(host.host_id)
+            if rings is not None:
+                self.hosts.move_to_end(host.host_id)
+                ring = rings.get(source)
+                if ring is not None:
+                    return ring.window(now - age, now) if ring.ready else None
+            ring = self._placeholder(host.host_id, source)
+
+        try:
+            records = db.record_get_by_host_probe(host, source, self.span)
+        except Exception:
+            self._drop(host.host_id, source, ring)
+            raise
+
+        with self.lock:
+            self._fill(host.host_id, source, ring, records)
+            return ring.window(now - age, now)
+
+    def get_source(self, db: Database, hosts: Iterable[Host], source: str, age: int) \
+            -> Optional[dict[int, Window]]:
+        """Return the samples of the last age seconds from one source on all given Hosts.
+
+        Rings that are missing are loaded with a single query. That query may
+        turn up Hosts the caller did not know about, their samples are included,
+        but not kept.
+        Returns None if the period is longer than the buffer covers, or if a
+        Ring is being loaded by someone else right now.
+        """
+        if not self.covers(source, age):
+            return None
+        now: Final[int] = int(time.time())
+        result: dict[int, Window] = {}
+        missing: dict[int, Ring] = {}
+        with self.lock:
+            rings = {h.host_id: self.hosts.get(h.host_id, {}).get(source) for h in hosts}
+            if any(r is not None and not r.ready for r in rings.values()):
+                return None
+            for hid, ring in rings.items():
+                if ring is None:
+                    missing[hid] = self._placeholder(hid, source)
+                else:
+                    self.hosts.move_to_end(hid)
+                    result[hid] = ring.window(now - age, now)
+
+        if len(missing) == 0:
+            return result
+
+        try:
+            records = db.record_get_by_probe(source, now - self.span, now, lazy=True)
+        except Exception:
+            for hid, ring in missing.items():
+                self._drop(hid, source, ring)
+            raise
+
+        by_host: Final[dict[int, list[AnyRecord]]] = {hid: [] for hid in missing}
+        for hid, recs in _group_records(records, by_host, rings.keys(), now - age).items():
+            result[hid] = window_from_records(recs)
+
+        with self.lock:
+            for hid, ring in missing.items():
+                self._fill(hid, source, ring, by_host[hid])
+                result[hid] = ring.window(now - age, now)
+        return result
+
+    def _placeholder(self, host_id: int, source: str) -> Ring:
+        """Create an empty Ring that collects incoming Records while it is being loaded.
+
+        The caller must hold the lock.
+        """
+        ring = Ring()
+        if host_id not in self.hosts:
+            self.hosts[host_id] = {}
+        self.hosts[host_id][source] = ring
+        self.hosts.move_to_end(host_id)
+        return ring
+
+    def _fill(self, host_id: int, source: str, ring: Ring, records: Iterable[AnyRecord]) -> None:
+        """Load Records into a placeholder Ring. The caller must hold the lock."""
+        for r in records:
+            ring.add(r)
+        for r in ring.pending:
+            ring.add(r)
+        ring.pending.clear()
+        ring.ready = True
+        if len(ring) > 0:
+            ring.trim(ring.stamps[-1] - self.span)
+        # If the Ring was evicted while we were loading it, it does not count.
+        if self.hosts.get(host_id, {}).get(source) is ring:
+            self.used += ring.nbytes()
+            self._evict()
+
+    def _drop(self, host_id: int, source: str, ring: Ring) -> None:
+        """Remove a placeholder Ring after loading it failed."""
+        with self.lock:
+            rings = self.hosts.get(host_id)
+            if rings is not None and rings.get(source) is ring:
+                del rings[source]
+
+    def _evict(self) -> None:
+        """Drop the least recently used Hosts until we are within our limit.
+
+        The caller must hold the lock.
+        """
+        while self.used > self.limit and len(self.hosts) > 1:
+            hid, rings = self.hosts.popitem(last=False)
+            freed = sum(r.nbytes() for r in rings.values() if r.ready)
+            self.used -= freed
+            self.log.debug("Evict Host %d from the series buffer, freeing %d bytes",
+                           hid,
+                           freed)
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
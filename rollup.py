@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 09:29:29 krylon>
+#
+# /data/code/python/medusa/rollup.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.rollup
+
+(c) 2026 Benjamin Walkenhorst
+
+Summarizes the values of each Host per period, by default per hour.
+
+A summary holds the count, sum, minimum and maximum of the values, and a
+quantile sketch of them. Sketches can be merged, so the quantiles over a
+week, or over a group of Hosts, come from merging the summaries involved,
+rather than from scanning all the Records. An average would hide the
+spikes, the sketch does not.
+
+Periods are summarized in the background once they are over, plus a grace
+period for Agents that report late. Records arriving after that are not
+counted. Once Records are past the retention period, their partitions of
+the record table are dropped, the summaries stay.
+"""
+
+import logging
+import threading
+import time
+from typing import Collection, Final, Iterable, NamedTuple, Optional
+
+from medusa import common, fleet
+from medusa.data import AnyRecord
+from medusa.database import Database, Pool
+from medusa.ringbuf import window_from_records
+from medusa.sketch import ALPHA, Sketch
+
+# Load and temperature, fleet.sample_values knows how to boil them down.
+SOURCES: Final[tuple[str, ...]] = ("sysload", "sensors")
+
+WIDTH: Final[int] = 3600
+# How far back we go when there are no summaries yet.
+BACKFILL: Final[int] = 7 * 86400
+GRACE: Final[int] = 300
+# How many periods we summarize per query.
+BATCH: Final[int] = 24
+INTERVAL: Final[float] = 300.0
+
+
+def summarize(source: str,
+              records: Iterable[AnyRecord],
+              width: int,
+              alpha: float = ALPHA) -> dict[tuple[int, int], Sketch]:
+    """Sketch the values of Records, by Host and start of the period."""
+    by_host: dict[int, list[AnyRecord]] = {}
+    for r in records:
+        if r.host_id in by_host:
+            by_host[r.host_id].append(r)
+        else:
+            by_host[r.host_id] = [r]
+
+    result: dict[tuple[int, int], Sketch] = {}
+    for hid, recs in by_host.items():
+        win = window_from_records(recs)
+        for t, v in zip(win.stamps, fleet.sample_values(source, win)):
+            key = (hid, t - t % width)
+            sk = result.get(key)
+            if sk is None:
+                sk = Sketch(alpha)
+                result[key] = sk
+            sk.add(v)
+    return {k: sk for k, sk in result.items() if sk.count > 0}
+
+
+class Summary(NamedTuple):
+    """Summary is the merged Sketch of a number of Hosts for one period."""
+
+    start: int
+    hosts: int
+    sketch: Sketch
+
+
+def query(db: Database,
+          source: str,
+          begin: int,
+          end: int,
+          hosts: Optional[Collection[int]] = None,
+          *,
+          width: int = WIDTH) -> list[Summary]:
+    """Return the Summaries for the periods between begin and end, oldest first.
+
+    Only whole periods are covered, a period counts if it starts between
+    begin and end. If hosts is given, only those Hosts are included.
+    """
+    merged: dict[int, Summary] = {}
+    for hid, start, sk in db.rollup_get_range(source, width, begin - begin % width, end):
+        if hosts is not None and hid not in hosts:
+            continue
+        s = merged.get(start)
+        if s is None:
+            merged[start] = Summary(start, 1, sk)
+        else:
+            s.sketch.merge(sk)
+            merged[start] = Summary(start, s.hosts + 1, s.sketch)
+    return [merged[k] for k in sorted(merged)]
+
+
+def total(summaries: Iterable[Summary]) -> Optional[Sketch]:
+    """Merge the Sketches of a number of Summaries, None if there are none."""
+    result: Optional[Sketch] = None
+    for s in summaries:
+        if result is None:
+            result = Sketch(s.sketch.alpha, s.sketch.max_bins)
+        result.merge(s.sketch)
+    return result
+
+
+def by_group(db: Database,
+             source: str,
+             begin: int,
+             end: int,
+             groups: dict[int, str],
+             *,
+             width: int = WIDTH) -> dict[str, tuple[int, Sketch]]:
+    """Merge the summaries for the periods between begin and end per group of Hosts.
+
+    groups maps Host IDs to the name of the group they belong to, Hosts not
+    in any group are left out. Returns the number of Hosts that had any data
+    and the merged Sketch, by group.
+    """
+    members: dict[str, set[int]] = {}
+    merged: dict[str, Sketch] = {}
+    for hid, _, sk in db.rollup_get_range(source, width, begin - begin % width, end):
+        grp = groups.get(hid)
+        if grp is None:
+            continue
+        if grp in merged:
+            merged[grp].merge(sk)
+            members[grp].add(hid)
+        else:
+            merged[grp] = sk
+            members[grp] = {hid}
+    return {g: (len(members[g]), sk) for g, sk in merged.items()}
+
+
+class Roller:
+    """Roller summarizes the periods that are over, periodically in the background."""
+
+    __slots__ = [
+        "log",
+        "width",
+        "backfill",
+        "grace",
+        "alpha",
+        "retention",
+        "done",
+        "stop_ev",
+        "thread",
+    ]
+
+    log: logging.Logger
+    width: int
+    backfill: int
+    grace: int
+    alpha: float
+    retention: int
+    done: dict[str, int]
+    stop_ev: threading.Event
+    thread: Optional[threading.Thread]
+
+    def __init__(self,
+                 width: int = WIDTH,
+                 backfill: int = BACKFILL,
+                 grace: int = GRACE,
+                 alpha: float = ALPHA,
+                 retention: int = 0) -> None:
+        assert width > 0
+        self.log = common.get_logger("Rollup")
+        self.width = width
+        self.backfill = backfill
+        self.grace = grace
+        self.alpha = alpha
+        self.retention = retention
+        self.done = {}
+        self.stop_ev = threading.Event()
+        self.thread = None
+
+    def run(self, pool: Pool, now: int = 0) -> int:
+        """Summarize all periods that are over and have not been summarized, yet.
+
+        Records are read through a reader from the Pool, so the writer is only
+        held while the summaries are stored. If a retention period is set,
+        Records older than that are dropped afterwards. Returns the number of
+        summaries written.
+        """
+        if now == 0:
+            now = int(time.time())
+        end: Final[int] = (now - self.grace) - (now - self.grace) % self.width
+        cnt: int = 0
+        for src in SOURCES:
+            begin = self.done.get(src)
+            if begin is None:
+                begin = self._resume(pool, src, now)
+            while begin < end:
+                stop = min(begin + BATCH * self.width, end)
+                db = pool.reader()
+                try:
+                    records = db.record_get_by_probe(src, begin, stop - 1, lazy=True)
+                    sketches = summarize(src, records, self.width, self.alpha)
+                finally:
+                    db.close()
+                db = pool.writer()
+                try:
+                    with db:
+                        for (hid, start), sk in sketches.items():
+                            db.rollup_add(hid, src, self.width, start, sk)
+                finally:
+                    db.close()
+                cnt += len(sketches)
+                begin = stop
+                # Periods without any data are not stored, so we remember how
+                # far we got to not look at them again.
+                self.done[src] = begin
+        if cnt > 0:
+            self.log.debug("Wrote %d rollups", cnt)
+        if self.retention > 0:
+            db = pool.writer()
+            try:
+                db.record_expire(now - self.retention)
+            finally:
+                db.close()
+        return cnt
+
+    def start(self, pool: Pool, interval: float = INTERVAL) -> None:
+        """Summarize periods in the background, every interval seconds."""
+        self.thread = threading.Thread(target=self._loop,
+                                       args=(pool, interval),
+                                       name="Rollup",
+                                       daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread."""
+        self.stop_ev.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _loop(self, pool: Pool, interval: float) -> None:
+        """Call run every interval seconds until we are told to stop."""
+        while not self.stop_ev.is_set():
+            try:
+                self.run(pool)
+            except Exception as err:  # pylint: disable-msg=W0718
+                self.log.error("%s summarizing Records: %s",
+                               err.__class__.__name__,
+                               err)
+            self.stop_ev.wait(interval)
+
+    def _resume(self, pool: Pool, src: str, now: int) -> int:
+        """Return the start of the first period of src not summarized, yet."""
+        db: Final[Database] = pool.reader()
+        try:
+            last: Final[Optional[int]] = db.rollup_get_last(src, self.width)
+        finally:
+            db.close()
+        if last is not None:
+            return last + self.width
+        return (now - self.backfill) - (now - self.backfill) % self.width
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 09:15:02 krylon>
+#
+# /data/code/python/medusa/series.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.series
+
+(c) 2026 Benjamin Walkenhorst
+
+Time series helpers, mainly downsampling, so we do not have to ship every
+single data point to the browser when it is going to draw a chart that is
+maybe 1500 pixels wide.
+"""
+
+from typing import Callable, Final, Sequence, Union
+
+Number = Union[int, float]
+Point = tuple[Number, Number]
+
+DEFAULT_POINTS: Final[int] = 500
+MAX_POINTS: Final[int] = 5000
+
+
+def lttb(points: Sequence[Point], threshold: int) -> list[Point]:
+    """Downsample a series using Largest-Triangle-Three-Buckets.
+
+    points must be sorted by their x value (i.e. the timestamp).
+    The first and last point are always retained. If the series is not
+    longer than threshold, it is returned unchanged.
+    """
+    cnt: Final[int] = len(points)
+    if threshold >= cnt or threshold < 3:
+        return list(points)
+
+    sampled: list[Point] = [points[0]]
+    # The first and last bucket contain only one point each, the remaining
+    # points are distributed evenly across threshold - 2 buckets.
+    every: Final[float] = (cnt - 2) / (threshold - 2)
+    a: int = 0
+
+    for i in range(threshold - 2):
+        # Average of the *next* bucket, used as the third vertex.
+        avg: Point = _mean(points, int((i + 1) * every) + 1, min(int((i + 2) * every) + 1, cnt))
+        a = _largest_triangle(points, a, int(i * every) + 1, int((i + 1) * every) + 1, avg)
+        sampled.append(points[a])
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def _mean(points: Sequence[Point], start: int, end: int) -> Point:
+    """Return the average of the points from start up to, but not including, end."""
+    avg_x: float = 0.0
+    avg_y: float = 0.0
+    for p in points[start:end]:
+        avg_x += p[0]
+        avg_y += p[1]
+    return avg_x / (end - start), avg_y / (end - start)
+
+
+def _largest_triangle(points: Sequence[Point], a: int, start: int, end: int, c: Point) -> int:
+    """Pick the point from start to end that forms the largest triangle with points[a] and c.
+
+    Returns its index.
+    """
+    ax, ay = points[a]
+    cx, cy = c
+    max_area: float = -1.0
+    best: int = start
+    for j in range(start, end):
+        px, py = points[j]
+        area = abs((ax - cx) * (py - ay) - (ax - px) * (cy - ay))
+        if area > max_area:
+            max_area = area
+            best = j
+    return best
+
+
+def minmax(points: Sequence[Point], threshold: int) -> list[Point]:
+    """Downsample a series by keeping the minimum and maximum of each bucket.
+
+    This is cheaper than LTTB and preserves spikes faithfully, at the cost of
+    a somewhat jagged looking line. Each bucket contributes up to two points,
+    in chronological order, so the result has at most threshold points.
+    """
+    cnt: Final[int] = len(points)
+    if threshold >= cnt or threshold < 2:
+        return list(points)
+
+    buckets: Final[int] = max(threshold // 2, 1)
+    size: Final[float] = cnt / buckets
+    sampled: list[Point] = []
+
+    for i in range(buckets):
+        start = int(i * size)
+        end = min(int((i + 1) * size), cnt)
+        if start >= end:
+            continue
+        lo: int = start
+        hi: int = start
+        for j in range(start + 1, end):
+            if points[j][1] < points[lo][1]:
+                lo = j
+            elif points[j][1] > points[hi][1]:
+                hi = j
+        if lo == hi:
+            sampled.append(points[lo])
+        elif lo < hi:
+            sampled.append(points[lo])
+            sampled.append(points[hi])
+        else:
+            sampled.append(points[hi])
+            sampled.append(points[lo])
+
+    return sampled
+
+
+methods: Final[dict[str, Callable[[Sequence[Point], int], list[Point]]]] = {
+    "lttb": lttb,
+    "minmax": minmax,
+}
+
+
+def downsample(points: Sequence[Point], threshold: int, method: str = "lttb") -> list[Point]:
+    """Downsample a series to (at most) threshold points using the given method."""
+    try:
+        return methods[method](points, threshold)
+    except KeyError as err:
+        raise ValueError(f"Unknown downsampling method '{method}'") from err
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
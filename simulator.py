@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 09:14:07 krylon>
+#
+# /data/code/python/medusa/simulator.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.simulator
+
+(c) 2026 Benjamin Walkenhorst
+
+A fleet of simulated Agents, to find out how much load a single Server can
+take. Run it as
+
+    python3 -m medusa.simulator --local --hosts 1000 --duration 60
+
+to start a Server on a scratch base directory and hammer it, or point it at
+a running Server using --address and --port.
+"""
+
+import argparse
+import heapq
+import json
+import os
+import pickle
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Final, Optional
+
+import requests
+
+from medusa import common
+from medusa.data import (CPURecord, DiskRecord, FileSystem, LoadRecord, Record,
+                         SensorData, SensorRecord, SysLoad)
+from medusa.proto import MsgType
+
+OS_NAMES: Final[tuple[str, ...]] = ("Debian", "openSUSE", "FreeBSD", "Arch", "Raspbian")
+
+
+class SimulatedHost:  # pylint: disable-msg=R0902
+    """SimulatedHost produces a plausible stream of Records for one imaginary machine.
+
+    Load follows a mean-reverting random walk with the occasional spike,
+    temperatures follow the load, and disks slowly fill up until somebody
+    cleans up.
+    """
+
+    __slots__ = [
+        "name",
+        "os",
+        "tags",
+        "rnd",
+        "stamp",
+        "interval",
+        "load",
+        "base_temp",
+        "cores",
+        "freq",
+        "disks",
+    ]
+
+    name: str
+    os: str
+    tags: dict[str, str]
+    rnd: random.Random
+    stamp: int
+    interval: int
+    load: float
+    base_temp: float
+    cores: int
+    freq: int
+    disks: dict[str, list[int]]
+
+    def __init__(self, idx: int, seed: int = 0, interval: int = 60, start: int = 0) -> None:
+        self.rnd = random.Random(seed * 1_000_003 + idx)
+        self.name = f"sim{idx:05d}.example.org"
+        self.os = self.rnd.choice(OS_NAMES)
+        # Not drawn from rnd, so the samples stay the same as before for a given seed.
+        self.tags = {
+            "arch": "arm64" if self.os == "Raspbian" else "amd64",
+            "rack": str(idx % 10),
+        }
+        self.interval = interval
+        self.stamp = start if start > 0 else int(time.time()) - 86400
+        self.cores = self.rnd.choice((2, 4, 8, 16))
+        self.load = self.rnd.random() * self.cores / 2
+        self.base_temp = 30 + self.rnd.random() * 15
+        self.freq = self.rnd.choice((1_800_000_000, 2_400_000_000, 3_600_000_000))
+        self.disks = {}
+        for path in ("/", "/home", "/var")[:self.rnd.randint(1, 3)]:
+            total = self.rnd.choice((32, 128, 512, 2048)) * 2**20
+            self.disks[path] = [total, int(total * self.rnd.uniform(0.1, 0.8))]
+
+    def sample(self) -> list[Record]:
+        """Advance the simulated clock by one interval and return one Record per source."""
+        self.stamp += self.interval
+        ts: Final[int] = self.stamp
+        rnd = self.rnd
+
+        target = self.cores * 0.3
+        self.load += (target - self.load) * 0.1 + rnd.gauss(0, 0.2)
+        if rnd.random() < 0.005:
+            self.load += self.cores * rnd.uniform(0.5, 2)
+        self.load = max(self.load, 0.0)
+        load5 = self.load * 0.9
+        load15 = self.load * 0.8
+
+        temp = self.base_temp + self.load / self.cores * 30
+        sensors = {
+            "Package id 0": SensorData(round(temp + rnd.gauss(0, 1), 1), "°C"),
+            "acpitz": SensorData(round(temp - 8 + rnd.gauss(0, 0.5), 1), "°C"),
+        }
+
+        disks: dict[str, FileSystem] = {}
+        for path, usage in self.disks.items():
+            total, used = usage
+            used += rnd.randint(0, total // 100_000)
+            if used > total * 0.95 or rnd.random() < 0.0005:
+                used = int(total * rnd.uniform(0.1, 0.5))
+            usage[1] = used
+            disks[path] = FileSystem("sda1", total, used, total - used, path)
+
+        return [
+            CPURecord(timestamp=ts, frequency=int(self.freq * rnd.uniform(0.4, 1.0))),
+            LoadRecord(timestamp=ts, load=SysLoad(round(self.load, 2),
+                                                  round(load5, 2),
+                                                  round(load15, 2))),
+            SensorRecord(timestamp=ts, sensors=sensors),
+            DiskRecord(timestamp=ts, disks=disks),
+        ]
+
+    def report(self, samples: int = 1) -> list[Record]:
+        """Return the Records an Agent would submit after collecting samples times."""
+        records: list[Record] = []
+        for _ in range(samples):
+            records.extend(self.sample())
+        return records
+
+
+@dataclass(slots=True, kw_only=True)
+class Stats:
+    """Stats collects the outcome of a load test."""
+
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    latencies: list[float] = field(default_factory=list)
+    errors: Counter = field(default_factory=Counter)
+    reports: int = 0
+    records: int = 0
+
+    def success(self, latency: float, records: int) -> None:
+        """Record a successful submission."""
+        with self.lock:
+            self.latencies.append(latency)
+            self.reports += 1
+            self.records += records
+
+    def failure(self, latency: float, reason: str) -> None:
+        """Record a failed submission."""
+        with self.lock:
+            self.latencies.append(latency)
+            self.errors[reason] += 1
+
+
+class LoadTest:  # pylint: disable-msg=R0902
+    """LoadTest drives a fleet of SimulatedHosts against a Server."""
+
+    url: str
+    interval: float
+    samples: int
+    workers: int
+    fleet: list[SimulatedHost]
+    stats: Stats
+    local: threading.local
+
+    def __init__(self,  # pylint: disable-msg=R0913,R0917
+                 url: str,
+                 hosts: int,
+                 interval: float,
+                 samples: int,
+                 workers: int,
+                 seed: int = 0) -> None:
+        self.url = url
+        self.interval = interval
+        self.samples = samples
+        self.workers = workers
+        self.fleet = [SimulatedHost(i, seed) for i in range(hosts)]
+        self.stats = Stats()
+        self.local = threading.local()
+
+    def _session(self) -> requests.Session:
+        """Return the HTTP session for the current thread."""
+        sess: Optional[requests.Session] = getattr(self.local, "session", None)
+        if sess is None:
+            sess = requests.Session()
+            self.local.session = sess
+        return sess
+
+    def register(self, host: SimulatedHost) -> bool:
+        """Register a simulated host with the Server."""
+        xfr = json.dumps({"name": host.name, "os": host.os, "tags": host.tags})
+        res = self._session().post(f"{self.url}/ajax/register",
+                                   data=xfr,
+                                   timeout=30,
+                                   headers={"Content-Type": "application/json"})
+        return res.status_code == 200 and res.json()["status"] == MsgType.Success
+
+    def submit(self, host: SimulatedHost) -> None:
+        """Submit one report for a simulated host and record the outcome."""
+        report = host.report(self.samples)
+        xfr = pickle.dumps(report)
+        t0 = time.perf_counter()
+        try:
+            res = self._session().post(f"{self.url}/ajax/submit_report/{host.name}",
+                                       data=xfr,
+                                       timeout=30,
+                                       headers={"Content-Type": "application/octet-stream"})
+            latency = time.perf_counter() - t0
+            if res.status_code != 200:
+                self.stats.failure(latency, f"HTTP {res.status_code}")
+            elif res.json()["status"] != MsgType.Success:
+                self.stats.failure(latency, MsgType(res.json()["status"]).name)
+            else:
+                self.stats.success(latency, len(report))
+        except requests.exceptions.RequestException as err:
+            self.stats.failure(time.perf_counter() - t0, err.__class__.__name__)
+
+    def run(self, duration: float) -> float:
+        """Register all hosts, then submit reports for duration seconds.
+
+        Each host submits once per interval, with start times spread evenly,
+        so the Server sees a steady stream rather than a thundering herd.
+        Returns the time actually spent submitting.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            failed = sum(1 for ok in pool.map(self.register, self.fleet) if not ok)
+            if failed > 0:
+                print(f"{failed} hosts failed to register")
+
+            t0 = time.monotonic()
+            end = t0 + duration
+            spread = self.interval / max(len(self.fleet), 1)
+            due: list[tuple[float, int]] = [(t0 + i * spread, i) for i in range(len(self.fleet))]
+            heapq.heapify(due)
+            while due:
+                when, idx = heapq.heappop(due)
+                if when >= end:
+                    break
+                delay = when - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self.submit, self.fleet[idx])
+                heapq.heappush(due, (when + self.interval, idx))
+        return time.monotonic() - t0
+
+
+def db_size(basedir: str) -> int:
+    """Return the size of the database, including the WAL file, in bytes."""
+    total: int = 0
+    for suffix in ("", "-wal"):
+        path = os.path.join(basedir, f"{common.APP_NAME.lower()}.db{suffix}")
+        if os.path.isfile(path):
+            total += os.path.getsize(path)
+    return total
+
+
+def record_count(basedir: str) -> int:
+    """Return the number of records in the database."""
+    path: Final[str] = os.path.join(basedir, f"{common.APP_NAME.lower()}.db")
+    if not os.path.isfile(path):
+        return 0
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        parts = [row[0] for row in conn.execute("SELECT name FROM record_part")]
+        return sum(conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0] for name in parts)
+    finally:
+        conn.close()
+
+
+def start_local(port: int) -> str:
+    """Start a Server on a scratch base directory in a background thread.
+
+    Returns the base directory.
+    """
+    from medusa.web import WebUI  # pylint: disable-msg=C0415
+
+    basedir: Final[str] = tempfile.mkdtemp(prefix=f"{common.APP_NAME.lower()}_loadtest_")
+    common.set_basedir(basedir)
+    www = WebUI(os.path.join(os.path.dirname(os.path.abspath(__file__)), "web"))
+    www.host = "localhost"
+    www.port = port
+    thr = threading.Thread(target=www.run, name="Web", daemon=True)
+    thr.start()
+
+    deadline: Final[float] = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"http://localhost:{port}/ajax/beacon", timeout=1)
+            break
+        except requests.exceptions.ConnectionError:
+            time.sleep(0.1)
+    return basedir
+
+
+def main() -> None:
+    """Run a load test as specified on the command line."""
+    parser = argparse.ArgumentParser(
+        prog=f"{common.APP_NAME.lower()}-simulator",
+        description="Simulate a fleet of Agents and measure how the Server copes",
+    )
+    parser.add_argument("-n", "--hosts", type=int, default=100,
+                        help="Number of simulated hosts")
+    parser.add_argument("-i", "--interval", type=float, default=10.0,
+                        help="Seconds between two reports from the same host")
+    parser.add_argument("-s", "--samples", type=int, default=1,
+                        help="Samples per report, each sample is one Record per source")
+    parser.add_argument("-d", "--duration", type=float, default=60.0,
+                        help="Duration of the test in seconds")
+    parser.add_argument("-w", "--workers", type=int, default=32,
+                        help="Number of concurrent connections")
+    parser.add_argument("-a", "--address", default="localhost")
+    parser.add_argument("-p", "--port", type=int, default=9001)
+    parser.add_argument("-l", "--local", action="store_true",
+                        help="Start a Server on a temporary base directory and test that")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    basedir: Optional[str] = None
+    if args.local:
+        basedir = start_local(args.port)
+        print(f"Started local Server on port {args.port}, base directory {basedir}")
+
+    size_before: Final[int] = db_size(basedir) if basedir else 0
+    test = LoadTest(f"http://{args.address}:{args.port}",
+                    args.hosts,
+                    args.interval,
+                    args.samples,
+                    args.workers,
+                    args.seed)
+    elapsed: Final[float] = test.run(args.duration)
+
+    st = test.stats
+    lat = sorted(st.latencies)
+    total: Final[int] = len(lat)
+    failed: Final[int] = sum(st.errors.values())
+    print(f"Hosts:        {args.hosts}")
+    print(f"Duration:     {elapsed:.1f} s")
+    print(f"Reports:      {st.reports} ok, {failed} failed "
+          f"({failed / max(total, 1) * 100:.2f} % errors)")
+    print(f"Throughput:   {st.reports / elapsed:.1f} reports/s, "
+          f"{st.records / elapsed:.1f} records/s")
+    if total > 0:
+        print(f"Latency:      mean {statistics.fmean(lat) * 1000:.1f} ms, "
+              f"p50 {lat[total // 2] * 1000:.1f} ms, "
+              f"p99 {lat[min(int(total * 0.99), total - 1)] * 1000:.1f} ms")
+    for reason, cnt in st.errors.most_common():
+        print(f"    {reason}: {cnt}")
+    if basedir is not None:
+        grown = db_size(basedir) - size_before
+        print(f"Database:     {record_count(basedir)} records, grew by {grown / 2**20:.1f} MiB "
+              f"({grown / max(st.records, 1):.0f} bytes/record)")
+
+
+if __name__ == '__main__':
+    main()
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 08:39:03 krylon>
+#
+# /data/code/python/medusa/sketch.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.sketch
+
+(c) 2026 Benjamin Walkenhorst
+
+A quantile sketch after DDSketch (Masson, Rim, Lee, 2019).
+
+Values are sorted into bins whose boundaries grow geometrically, so any
+quantile read from the sketch is within a fixed relative error alpha of the
+true value. Two sketches with the same alpha are merged by adding up their
+bins, which gives exactly the sketch one would have gotten from all the
+values at once. That lets us keep one small sketch per Host and hour, and
+answer questions about any period or group of Hosts by merging the ones
+involved.
+
+The bins are kept in dense arrays starting at the lowest bin in use. If a
+sketch needs more than max_bins bins, the lowest ones are folded together,
+giving up accuracy at the low end, which is rarely what we ask about.
+"""
+
+import math
+import struct
+import sys
+from array import array
+from typing import Final, Iterable, Optional
+
+ALPHA: Final[float] = 0.01
+MAX_BINS: Final[int] = 2048
+# Values closer to zero than this are counted as zero.
+MIN_VALUE: Final[float] = 1e-9
+
+VERSION: Final[int] = 1
+_header: Final[struct.Struct] = struct.Struct("<BdQdddQ")
+_store_header: Final[struct.Struct] = struct.Struct("<iIB")
+
+
+class SketchError(ValueError):
+    """SketchError indicates sketches that do not go together, or a corrupt serialized sketch."""
+
+
+class Store:
+    """Store holds the counts of consecutive bins, starting at offset."""
+
+    __slots__ = [
+        "offset",
+        "counts",
+    ]
+
+    offset: int
+    counts: array
+
+    def __init__(self) -> None:
+        self.offset = 0
+        self.counts = array("Q")
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def total(self) -> int:
+        """Return the number of values in all bins."""
+        return sum(self.counts)
+
+    def _extend(self, lo: int, hi: int) -> None:
+        """Make room for the bins with keys from lo up to, but not including, hi."""
+        if len(self.counts) == 0:
+            self.offset = lo
+            self.counts = array("Q", bytes(8 * (hi - lo)))
+            return
+        if lo < self.offset:
+            self.counts[0:0] = array("Q", bytes(8 * (self.offset - lo)))
+            self.offset = lo
+        end: Final[int] = self.offset + len(self.counts)
+        if hi > end:
+            self.counts.extend(array("Q", bytes(8 * (hi - end))))
+
+    def add(self, key: int, n: int, max_bins: int) -> None:
+        """Add n to the bin with the given key."""
+        self._extend(key, key + 1)
+        self.counts[key - self.offset] += n
+        self._collapse(max_bins)
+
+    def merge(self, other: 'Store', max_bins: int) -> None:
+        """Add the counts of another Store."""
+        if len(other.counts) == 0:
+            return
+        self._extend(other.offset, other.offset + len(other.counts))
+        base: Final[int] = other.offset - self.offset
+        for i, n in enumerate(other.counts):
+            self.counts[base + i] += n
+        self._collapse(max_bins)
+
+    def _collapse(self, max_bins: int) -> None:
+        """Fold the lowest bins into one if there are more than max_bins."""
+        excess: Final[int] = len(self.counts) - max_bins
+        if excess > 0:
+            folded = sum(self.counts[:excess + 1])
+            del self.counts[:excess]
+            self.counts[0] = folded
+            self.offset += excess
+
+    def key_at(self, rank: float, reverse: bool = False) -> int:
+        """Return the key of the bin holding the value of the given rank, counting from zero."""
+        seen: int = 0
+        idx = range(len(self.counts) - 1, -1, -1) if reverse else range(len(self.counts))
+        for i in idx:
+            seen += self.counts[i]
+            if seen > rank:
+                return self.offset + i
+        return self.offset + (0 if reverse else len(self.counts) - 1)
+
+    def pack(self) -> bytes:
+        """Serialize the Store, dropping empty bins at either end."""
+        lo: int = 0
+        hi: int = len(self.counts)
+        while lo < hi and self.counts[lo] == 0:
+            lo += 1
+        while hi > lo and self.counts[hi - 1] == 0:
+            hi -= 1
+        counts = self.counts[lo:hi]
+        # Most counts fit in 32 bits, which halves the size.
+        if len(counts) == 0 or max(counts) < 2**32:
+            counts = array("I", counts)
+        if sys.byteorder != "little":
+            counts.byteswap()
+        return _store_header.pack(self.offset + lo, hi - lo, counts.itemsize) + counts.tobytes()
+
+    @classmethod
+    def unpack(cls, buf: memoryview) -> tuple['Store', int]:
+        """De-serialize a Store, return it and the number of bytes consumed."""
+        offset, cnt, size = _store_header.unpack_from(buf)
+        end: Final[int] = _store_header.size + cnt * size
+        if size not in (4, 8) or len(buf) < end:
+            raise SketchError("Truncated or corrupt sketch")
+        counts = array("I" if size == 4 else "Q")
+        counts.frombytes(buf[_store_header.size:end])
+        if sys.byteorder != "little":
+            counts.byteswap()
+        st = cls()
+        st.offset = offset
+        st.counts = array("Q", counts)
+        return st, end
+
+
+class Sketch:
+    """Sketch summarizes a collection of numbers, so we can ask for their quantiles.
+
+    Besides the bins, we keep the count, sum, minimum and maximum, which are exact.
+    """
+
+    __slots__ = [
+        "alpha",
+        "max_bins",
+        "lg",
+        "pos",
+        "neg",
+        "zero",
+        "count",
+        "sum",
+        "min",
+        "max",
+    ]
+
+    alpha: float
+    max_bins: int
+    lg: float
+    pos: Store
+    neg: Store
+    zero: int
+    count: int
+    sum: float
+    min: float
+    max: float
+
+    def __init__(self, alpha: float = ALPHA, max_bins: int = MAX_BINS) -> None:
+        assert 0 < alpha < 1
+        self.alpha = alpha
+        self.max_bins = max_bins
+        self.lg = math.log((1 + alpha) / (1 - alpha))
+        self.pos = Store()
+        self.neg = Store()
+        self.zero = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _key(self, x: float) -> int:
+        """Return the key of the bin for a positive value."""
+        return math.ceil(math.log(x) / self.lg)
+
+    def _value(self, key: int) -> float:
+        """Return the value that represents a bin, within alpha of all values in it."""
+        return 2 * math.exp(key * self.lg) / (1 + math.exp(self.lg))
+
+    def add(self, x: float, n: int = 1) -> None:
+        """Add a value n times. NaN is ignored."""
+        if math.isnan(x) or n <= 0:
+            return
+        if x > MIN_VALUE:
+            self.pos.add(self._key(x), n, self.max_bins)
+        elif x < -MIN_VALUE:
+            self.neg.add(self._key(-x), n, self.max_bins)
+        else:
+            self.zero += n
+        self.count += n
+        self.sum += x * n
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    def update(self, values: Iterable[float]) -> None:
+        """Add a number of values."""
+        for x in values:
+            self.add(x)
+
+    def merge(self, other: 'Sketch') -> None:
+        """Add all values of another Sketch, which must have the same alpha."""
+        if other.alpha != self.alpha:
+            raise SketchError(f"Cannot merge sketches with alpha {self.alpha} and {other.alpha}")
+        if other.count == 0:
+            return
+        self.pos.merge(other.pos, self.max_bins)
+        self.neg.merge(other.neg, self.max_bins)
+        self.zero += other.zero
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Return the q-th quantile (0 <= q <= 1), NaN if the Sketch is empty.
+
+        The minimum and maximum are exact, everything in between is within
+        alpha of the value of rank floor(q * (count - 1)).
+        """
+        assert 0 <= q <= 1
+        if self.count == 0:
+            return math.nan
+        if q == 0:
+            return self.min
+        if q == 1:
+            return self.max
+        rank: Final[float] = q * (self.count - 1)
+        nneg: Final[int] = self.neg.total()
+        if rank < nneg:
+            # The most negative values come first, i.e. the highest keys.
+            x = -self._value(self.neg.key_at(rank, True))
+        elif rank < nneg + self.zero:
+            x = 0.0
+        else:
+            x = self._value(self.pos.key_at(rank - nneg - self.zero))
+        return min(max(x, self.min), self.max)
+
+    def mean(self) -> float:
+        """Return the average of all values, NaN if the Sketch is empty."""
+        return self.sum / self.count if self.count > 0 else math.nan
+
+    def to_bytes(self) -> bytes:
+        """Serialize the Sketch, e.g. to store it in the database."""
+        return _header.pack(VERSION,
+                            self.alpha,
+                            self.count,
+                            self.sum,
+                            self.min,
+                            self.max,
+                            self.zero) + self.pos.pack() + self.neg.pack()
+
+    @classmethod
+    def from_bytes(cls, raw: bytes, max_bins: int = MAX_BINS) -> 'Sketch':
+        """De-serialize a Sketch."""
+        buf: Final[memoryview] = memoryview(raw)
+        try:
+            version, alpha, count, total, lo, hi, zero = _header.unpack_from(buf)
+            if version != VERSION:
+                raise SketchError(f"Unsupported sketch version {version}")
+            sk = cls(alpha, max_bins)
+            sk.count, sk.sum, sk.min, sk.max, sk.zero = count, total, lo, hi, zero
+            sk.pos, used = Store.unpack(buf[_header.size:])
+            sk.neg, _ = Store.unpack(buf[_header.size + used:])
+        except struct.error as err:
+            raise SketchError(f"Truncated or corrupt sketch: {err}") from err
+        return sk
+
+
+def merged(sketches: Iterable[Sketch]) -> Optional[Sketch]:
+    """Return a new Sketch holding the values of all the given ones, None if there are none."""
+    result: Optional[Sketch] = None
+    for sk in sketches:
+        if result is None:
+            result = Sketch(sk.alpha, sk.max_bins)
+        result.merge(sk)
+    return result
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
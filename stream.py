@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 09:07:38 krylon>
+#
+# /data/code/python/medusa/stream.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.stream
+
+(c) 2026 Benjamin Walkenhorst
+
+Fan-out of freshly ingested Records to any number of subscribers, e.g. web
+browsers listening for Server-Sent Events.
+"""
+
+import logging
+from collections import deque
+from threading import Condition, Lock
+from typing import Final, Iterable, Optional, Sequence
+
+from medusa import codec, common
+from medusa.data import Host, Record
+
+# The maximum number of events we buffer per subscriber. If a subscriber
+# cannot keep up, we drop the oldest events rather than letting the buffer
+# grow without bounds.
+BUFFER_SIZE: Final[int] = 256
+MAX_SUBSCRIBERS: Final[int] = 64
+
+
+class TooManySubscribersError(common.MedusaError):
+    """Indicates that the Broker will not accept any more subscribers."""
+
+
+class Subscription:
+    """Subscription is one consumer's view of the event stream."""
+
+    __slots__ = [
+        "hosts",
+        "sources",
+        "queue",
+        "cond",
+        "dropped",
+        "closed",
+    ]
+
+    hosts: Optional[frozenset[int]]
+    sources: Optional[frozenset[str]]
+    queue: deque[str]
+    cond: Condition
+    dropped: int
+    closed: bool
+
+    def __init__(self,
+                 hosts: Optional[Iterable[int]] = None,
+                 sources: Optional[Iterable[str]] = None,
+                 size: int = BUFFER_SIZE) -> None:
+        self.hosts = frozenset(hosts) if hosts else None
+        self.sources = frozenset(sources) if sources else None
+        self.queue = deque(maxlen=size)
+        self.cond = Condition(Lock())
+        self.dropped = 0
+        self.closed = False
+
+    def wants(self, host_id: int, source: str) -> bool:
+        """Return True if the Subscription is interested in the given host and source."""
+        return (self.hosts is None or host_id in self.hosts) and \
+            (self.sources is None or source in self.sources)
+
+    def put(self, event: str) -> None:
+        """Append an event to the buffer, dropping the oldest one if the buffer is full."""
+        with self.cond:
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1
+            self.queue.append(event)
+            self.cond.notify()
+
+    def get(self, timeout: float) -> list[str]:
+        """Return all pending events, waiting up to timeout seconds for one to arrive.
+
+        An empty list means the timeout expired or the Subscription was closed.
+        """
+        with self.cond:
+            if len(self.queue) == 0 and not self.closed:
+                self.cond.wait(timeout)
+            events = list(self.queue)
+            self.queue.clear()
+            return events
+
+    def close(self) -> None:
+        """Wake up the consumer and mark the Subscription as closed."""
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+class Broker:
+    """Broker distributes Records to Subscriptions."""
+
+    __slots__ = [
+        "log",
+        "lock",
+        "subs",
+    ]
+
+    log: logging.Logger
+    lock: Lock
+    subs: set[Subscription]
+
+    def __init__(self) -> None:
+        self.log = common.get_logger("Broker")
+        self.lock = Lock()
+        self.subs = set()
+
+    def subscribe(self,
+                  hosts: Optional[Iterable[int]] = None,
+                  sources: Optional[Iterable[str]] = None) -> Subscription:
+        """Create and register a new Subscription.
+
+        If hosts and/or sources are given, only Records matching them are delivered.
+        """
+        sub = Subscription(hosts, sources)
+        with self.lock:
+            if len(self.subs) >= MAX_SUBSCRIBERS:
+                raise TooManySubscribersError(
+                    f"There are already {len(self.subs)} subscribers")
+            self.subs.add(sub)
+            self.log.debug("New subscriber, we now have %d", len(self.subs))
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        """Remove a Subscription."""
+        sub.close()
+        with self.lock:
+            self.subs.discard(sub)
+            self.log.debug("Subscriber left, %d remaining", len(self.subs))
+        if sub.dropped > 0:
+            self.log.info("Subscriber dropped %d events because it could not keep up",
+                          sub.dropped)
+
+    def count(self) -> int:
+        """Return the number of active Subscriptions."""
+        with self.lock:
+            return len(self.subs)
+
+    def publish(self, host: Host, records: Sequence[Record]) -> None:
+        """Hand the Records to all interested Subscriptions.
+
+        Each Record is serialized once, no matter how many subscribers receive it.
+        """
+        with self.lock:
+            if len(self.subs) == 0:
+                return
+            subs = list(self.subs)
+
+        for r in records:
+            src = r.source()
+            targets = [s for s in subs if s.wants(host.host_id, src)]
+            if len(targets) == 0:
+                continue
+            event = codec.dumps({
+                "record_id": r.record_id,
+                "host_id": host.host_id,
+                "host": host.name,
+                "source": src,
+                "timestamp": r.timestamp * 1000,
+                "score": r.score(),
+                "values": r.values(),
+            })
+            for s in targets:
+                s.put(event)
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
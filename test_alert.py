@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 09:16:59 krylon>
+#
+# /data/code/python/medusa/test_alert.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.test_alert
+
+(c) 2026 Benjamin Walkenhorst
+"""
+
+import os
+import unittest
+from datetime import datetime
+from typing import Any, Final
+
+from medusa import common
+from medusa.alert import Engine, Kind, Rule, RuleError, load_rules
+from medusa.config import Config
+from medusa.data import (DiskRecord, FileSystem, Host, LoadRecord, Record,
+                         SysLoad)
+from medusa.database import Database
+
+TEST_DIR: Final[str] = os.path.join(
+    "/tmp",
+    datetime.now().strftime("medusa_test_alert_%Y%m%d_%H%M%S"))
+
+
+def load(stamp: int, val: float) -> LoadRecord:
+    """Create a LoadRecord."""
+    return LoadRecord(timestamp=stamp, load=SysLoad(val, val, val))
+
+
+def disk(stamp: int, free: int) -> DiskRecord:
+    """Create a DiskRecord for the root file system."""
+    fs: Final[FileSystem] = FileSystem("sda1", 10**9, 10**9 - free, free, "/")
+    return DiskRecord(timestamp=stamp, disks={"/": fs})
+
+
+class AlertTest(unittest.TestCase):
+    """Test the alert rules."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        common.set_basedir(TEST_DIR)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        os.system(f'rm -rf "{TEST_DIR}"')
+
+    def setUp(self) -> None:
+        self.db = Database(os.path.join(TEST_DIR, f"{self._testMethodName}.db"))
+        self.host = Host(name="alpha", os="Debian", last_contact=datetime.now())
+        self.db.host_add(self.host)
+
+    def tearDown(self) -> None:
+        self.db.close()
+
+    def feed(self, engine: Engine, records: list[Record]) -> list[str]:
+        """Pass Records to the Engine one by one, return what happened."""
+        events: list[str] = []
+        for r in records:
+            r.host_id = self.host.host_id
+            for a in engine.evaluate(self.db, self.host, [r]):
+                events.append(f"{'start' if a.active else 'end'} {r.timestamp}")
+        return events
+
+    def test_rules(self) -> None:
+        """Test reading rules from the configuration file."""
+        rules = load_rules(Config())
+        self.assertGreater(len(rules), 0)
+        self.assertTrue(all(isinstance(r.kind, Kind) for r in rules))
+
+        bad: list[dict[str, Any]] = [
+            {"Name": "x", "Kind": "threshold", "Source": "sysload"},
+            {"Name": "x", "Kind": "bogus", "Source": "sysload", "Above": 1},
+            {"Name": "x", "Kind": "threshold", "Source": "sysload", "Abvoe": 1},
+            {"Kind": "nodata", "Source": "sysload"},
+            {"Name": "x", "Kind": "rate", "Source": "disk", "Below": 0, "For": 0},
+        ]
+        for tbl in bad:
+            with self.assertRaises(RuleError):
+                Rule.parse(tbl)
+
+    def test_threshold(self) -> None:
+        """Test raising and ending an Alert for a threshold."""
+        rule = Rule.parse({"Name": "load", "Kind": "threshold", "Source": "sysload",
+                           "Value": "load5", "Above": 4.0, "For": 2})
+        engine = Engine([rule])
+        vals: Final[list[float]] = [1, 5, 1, 5, 6, 7, 1, 5, 1, 1]
+        events = self.feed(engine, [load(1000 + i * 60, v) for i, v in enumerate(vals)])
+        self.assertEqual(events, ["start 1240", "end 1540"])
+        self.assertEqual(self.feed(engine, [load(1000, 9)]), [])  # out of date
+
+        recent = self.db.alert_get_recent(10**10)
+        self.assertEqual(len(recent), 1)
+        self.assertEqual((recent[0].started, recent[0].ended), (1240, 1540))
+        self.assertIn("above 4.0", recent[0].message)
+
+    def test_rate(self) -> None:
+        """Test an Alert for a value that changes too fast."""
+        rule = Rule.parse({"Name": "fill", "Kind": "rate", "Source": "disk",
+                           "Value": "/", "Below": -1000})
+        engine = Engine([rule])
+        frees: Final[list[int]] = [10**6, 10**6 - 500, 10**6 - 3000, 10**6 - 3100]
+        events = self.feed(engine, [disk(60 * i, f) for i, f in enumerate(frees)])
+        self.assertEqual(events, ["start 120", "end 180"])
+
+    def test_nodata_restart(self) -> None:
+        """Test Alerts for silent Hosts, and that active Alerts survive a restart."""
+        rules = [
+            Rule.parse({"Name": "silent", "Kind": "nodata", "Source": "sysload", "Intervals": 3}),
+            Rule.parse({"Name": "load", "Kind": "threshold", "Source": "sysload", "Above": 4.0}),
+        ]
+        engine = Engine(rules, 10)
+        self.assertEqual(self.feed(engine, [load(1000, 5)]), ["start 1000"])
+        now: Final[int] = engine.states[("silent", self.host.host_id)].stamp
+        self.assertEqual(engine.sweep(self.db, now + 30), [])
+        changes = engine.sweep(self.db, now + 31)
+        self.assertEqual([a.rule for a in changes], ["silent"])
+        self.assertEqual(engine.sweep(self.db, now + 60), [])
+        self.assertEqual(len(engine.active_alerts()), 2)
+
+        # After a restart, both Alerts are still active, and end as data
+        # comes in again. A rule that has been removed ends its Alert.
+        engine = Engine(rules[:1], 10)
+        engine.load(self.db, [])
+        self.assertEqual(len(engine.active_alerts()), 1)
+        self.assertEqual(self.feed(engine, [load(2000, 1)]), ["end 2000"])
+        self.assertEqual(engine.active_alerts(), [])
+        self.assertEqual(self.db.alert_get_active(), [])
+
+    def test_notify(self) -> None:
+        """Test Alerts raised from outside the rules."""
+        with self.assertRaises(RuleError):
+            Engine([Rule.parse({"Name": "down", "Kind": "nodata", "Source": "cpu"})],
+                   external=["down"])
+        engine = Engine([], external=["down"])
+        a = engine.notify(self.db, "down", self.host.host_id, True, 1000, message="gone")
+        assert a is not None
+        self.assertIsNone(engine.notify(self.db, "down", self.host.host_id, True, 1010))
+        self.assertEqual(self.db.alert_get_active()[0].message, "gone")
+
+        engine = Engine([], external=["down"])
+        engine.load(self.db, [])
+        self.assertEqual(len(engine.active_alerts()), 1)
+        a = engine.notify(self.db, "down", self.host.host_id, False, 1020)
+        assert a is not None
+        self.assertEqual((a.started, a.ended), (1000, 1020))
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
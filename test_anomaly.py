@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 08:30:29 krylon>
+#
+# /data/code/python/medusa/test_anomaly.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.test_anomaly
+
+(c) 2026 Benjamin Walkenhorst
+"""
+
+import random
+import unittest
+
+from medusa.anomaly import Detector
+from medusa.data import CPURecord, LoadRecord, SensorData, SensorRecord, SysLoad
+
+
+class AnomalyTest(unittest.TestCase):
+    """Test the anomaly detection."""
+
+    def test_detect(self) -> None:
+        """Feed noisy but regular values with a few outliers."""
+        rnd = random.Random(42)
+        det = Detector(warmup=20)
+        found = []
+        for i in range(200):
+            load = 2.0 + rnd.gauss(0, 0.1)
+            temp = 45.0 + rnd.gauss(0, 0.5)
+            if i == 10:
+                load = 20.0  # still warming up
+            if i in (100, 150):
+                load = 6.0
+            if i == 120:
+                temp = 90.0
+            recs = [
+                LoadRecord(timestamp=1000 + i * 60, load=SysLoad(load, load, load)),
+                SensorRecord(timestamp=1000 + i * 60,
+                             sensors={"Core 0": SensorData(temp, "°C")}),
+                CPURecord(timestamp=1000 + i * 60, frequency=rnd.randint(800, 4000)),
+            ]
+            found.extend(det.update(1, recs))
+
+        self.assertEqual(sorted({(a.stamp - 1000) // 60 for a in found}), [100, 120, 150])
+        self.assertEqual([a.name for a in det.get(1, "sysload", 1000 + 120 * 60)],
+                         ["load1", "load5", "load15"])
+        temps = det.get(1, "sensors")
+        self.assertEqual(len(temps), 1)
+        self.assertGreater(temps[0].score, 4)
+        self.assertIn("Core 0 = 90.00", temps[0].describe())
+        self.assertEqual(det.get(2, "sysload"), [])
+
+        # Out of date samples are ignored, other Hosts have their own idea of normal.
+        self.assertEqual(det.update(1, [LoadRecord(timestamp=1000, load=SysLoad(50, 50, 50))]), [])
+        for i in range(30):
+            self.assertEqual(det.update(2, [LoadRecord(timestamp=i, load=SysLoad(20, 20, 20))]),
+                             [])
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
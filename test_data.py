@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Time-stamp: <2025-04-22 18:50:52 krylon>
+# Time-stamp: <2026-10-19 09:27:48 krylon>
 #
 # /data/code/python/medusa/test_data.py
 # created on 22. 04. 2025
@@ -17,12 +17,17 @@ medusa.test_data
 """
 
 import os
+import pickle
+import random
+import time
 import unittest
 from datetime import datetime
-from typing import Final
+from typing import Any, Final, Optional
 
 from medusa import common
-from medusa.data import CPURecord, LoadRecord, Record, SysLoad
+from medusa.data import (CPURecord, DiskRecord, FileSystem, LazyRecord,
+                         LoadRecord, Record, SysLoad, filter_tags,
+                         parse_tags)
 
 TEST_PATH_TEMPLATE: Final[str] = \
     "medusa_data_test_%Y%m%d_%H%M%S"
@@ -56,7 +61,7 @@ class ModelTest(unittest.TestCase):
         rec: CPURecord = CPURecord(
             record_id=1,
             host_id=1,
-            timestamp=datetime.fromtimestamp(0),
+            timestamp=0,
             frequency=2800,
         )
 
@@ -67,7 +72,7 @@ class ModelTest(unittest.TestCase):
         new: Record = Record.get_instance(
             rec.record_id,
             rec.host_id,
-            datetime.fromtimestamp(0),
+            0,
             'cpu',
             pl,
         )
@@ -79,7 +84,7 @@ class ModelTest(unittest.TestCase):
         lr: LoadRecord = LoadRecord(
             record_id=2,
             host_id=1,
-            timestamp=datetime.fromtimestamp(0),
+            timestamp=0,
             load=SysLoad(0.5, 2.5, 3.5),
         )
         pl: str = lr.payload()
@@ -89,13 +94,103 @@ class ModelTest(unittest.TestCase):
         new: Record = Record.get_instance(
             lr.record_id,
             lr.host_id,
-            datetime.fromtimestamp(0),
+            0,
             'sysload',
             pl,
         )
         self.assertIsInstance(new, LoadRecord)
         self.assertEqual(new, lr)
 
+    def test_lazy_record(self) -> None:
+        """Test that a LazyRecord behaves like the Record it holds."""
+        stamp: Final[int] = 0
+        dr: DiskRecord = DiskRecord(
+            record_id=3,
+            host_id=1,
+            timestamp=stamp,
+            disks={
+                "/boot": FileSystem("/dev/sda1", 1024, 512, 512, "/boot"),
+                "/": FileSystem("/dev/sda2", 8192, 1024, 7168, "/"),
+            },
+        )
+        lz = LazyRecord(dr.record_id, dr.host_id, stamp, dr.source(), dr.payload())
+        self.assertEqual(lz.score(), 7168)
+        self.assertIsNone(lz.rec)
+        self.assertEqual(lz.payload(), dr.payload())
+        self.assertEqual(lz.values(), dr.values())
+        self.assertEqual(lz.disks["/"][3], 7168)
+        self.assertEqual(lz.materialize(), Record.get_instance(3, 1, stamp, "disk", dr.payload()))
+
+        lz = LazyRecord(2, 1, stamp, "sysload", "[0.5, 2.5, 3.5]")
+        self.assertEqual(lz.score(), 2.5)
+        self.assertEqual(lz.load, SysLoad(0.5, 2.5, 3.5))
+
+    def test_timestamp(self) -> None:
+        """Test that timestamps end up as seconds since the epoch."""
+        now: Final[datetime] = datetime.now().replace(microsecond=0)
+        lr = LoadRecord(timestamp=now, load=SysLoad(1.0, 1.0, 1.0))  # type: ignore[arg-type]
+        self.assertEqual(lr.timestamp, int(now.timestamp()))
+        self.assertEqual(lr.dt, now)
+
+        # Older Agents send Records with a datetime, unpickling skips __post_init__.
+        lr.timestamp = now  # type: ignore
+        old = pickle.loads(pickle.dumps(lr))
+        self.assertIsInstance(old.timestamp, datetime)
+        old.normalize()
+        self.assertEqual(old.timestamp, int(now.timestamp()))
+
+    def test_fmt_stamp(self) -> None:
+        """Test that bulk formatting of timestamps agrees with strftime."""
+        rnd = random.Random(42)
+        stamps = [rnd.randint(0, 2**32) for _ in range(5000)]
+        stamps.extend(range(1_700_000_000, 1_700_000_000 + 86400 * 2, 59))
+        for s, txt in zip(stamps, common.fmt_stamps(stamps)):
+            self.assertEqual(txt, time.strftime(common.TIME_FMT, time.localtime(s)))
+
+    def test_fmt_stamp_half_hour(self) -> None:
+        """Test formatting around a change of the UTC offset by half an hour."""
+        old_tz: Final[Optional[str]] = os.environ.get("TZ")
+        os.environ["TZ"] = "Australia/Lord_Howe"
+        time.tzset()
+        common._hour_cache.clear()  # pylint: disable-msg=W0212
+        try:
+            # Daylight saving time began on 2024-10-06 at 02:00 local time,
+            # which was 15:30 UTC.
+            start: Final[int] = 1728136800
+            stamps = list(range(start, start + 4 * 3600, 60))
+            for s, txt in zip(stamps, common.fmt_stamps(stamps)):
+                self.assertEqual(txt, time.strftime(common.TIME_FMT, time.localtime(s)))
+        finally:
+            if old_tz is None:
+                del os.environ["TZ"]
+            else:
+                os.environ["TZ"] = old_tz
+            time.tzset()
+            common._hour_cache.clear()  # pylint: disable-msg=W0212
+
+    def test_parse_tags(self) -> None:
+        """Test checking the tags sent by Agents."""
+        self.assertEqual(parse_tags({"rack": 3, "role": "db", "virtual": True}),
+                         {"rack": "3", "role": "db", "virtual": "true"})
+        bad: Any
+        for bad in ([], {"": "x"}, {"a b": "x"}, {"rack": ""}, {"rack": None},
+                    {"rack": "x" * 65}, {f"t{i}": "x" for i in range(33)}):
+            with self.assertRaises(ValueError):
+                parse_tags(bad)
+
+    def test_filter_tags(self) -> None:
+        """Test dropping the invalid tags sent by Agents."""
+        tags, problems = filter_tags({"rack": 3, "a b": "x", "version": "", "role": "db"})
+        self.assertEqual(tags, {"rack": "3", "role": "db"})
+        self.assertEqual(len(problems), 2)
+        tags, problems = filter_tags({f"t{i}": "x" for i in range(33)})
+        self.assertEqual(len(tags), 32)
+        self.assertNotIn("t32", tags)
+        self.assertEqual(len(problems), 1)
+        tags, problems = filter_tags([])
+        self.assertEqual(tags, {})
+        self.assertEqual(len(problems), 1)
+
 # Local Variables: #
 # python-indent: 4 #
 # End: #
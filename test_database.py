@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Time-stamp: <2025-06-23 18:45:32 krylon>
+# Time-stamp: <2026-10-19 09:30:19 krylon>
 #
 # /data/code/python/medusa/test_database.py
 # created on 24. 04. 2025
@@ -17,13 +17,21 @@ medusa.test_database
 """
 
 
+import logging
 import os
+import sqlite3
+import threading
 import unittest
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Final, Optional
 
 from medusa import common
-from medusa.database import Database
+from medusa.config import Config
+from medusa.data import Host, LoadRecord, SysLoad
+from medusa.database import (DB_VERSION, INIT_QUERIES, PARTITIONS, Database,
+                             DatabaseError, Pool, QueryID, StorageSettings,
+                             TimingSettings, _storage_number, partition_range,
+                             storage_settings)
 
 TEST_DIR: Final[str] = os.path.join(
     "/tmp",
@@ -62,6 +70,242 @@ class DBTest(unittest.TestCase):
         self.assertIsNotNone(db)
         DBTest.db(db)
 
+    def test_02_db_migrate(self) -> None:
+        """Open a database created with the initial schema and upgrade it."""
+        path: Final[str] = os.path.join(TEST_DIR, "old.db")
+        conn = sqlite3.connect(path)
+        with conn:
+            for q in INIT_QUERIES:
+                conn.execute(q)
+            conn.execute("INSERT INTO host (id, name, os) VALUES (1, 'alpha', 'Debian')")
+            for i in range(10):
+                conn.execute("""INSERT INTO record (host_id, timestamp, source, payload)
+                                VALUES (1, ?, 'sysload', ?)""",
+                             (1000 + i, f"[{i}, {i}, {i}]"))
+        conn.close()
+
+        db: Database = Database(path)
+        cur = db.db.cursor()
+        cur.execute("PRAGMA user_version")
+        self.assertEqual(cur.fetchall()[0][0], DB_VERSION)
+        latest = db.record_get_latest()
+        self.assertEqual(len(latest), 1)
+        self.assertIsInstance(latest[0], LoadRecord)
+        self.assertEqual(latest[0].score(), 9)
+        self.assertEqual(db.tag_get_by_host(1), {"os": "Debian"})
+        db.close()
+
+    def test_03_query_stats(self) -> None:
+        """Check that queries are timed and slow ones are logged."""
+        db: Database = DBTest.db()
+        Database.reset_query_stats()
+        db.timing = TimingSettings(enabled=True, slow=1e-9)
+        with self.assertLogs("database", "WARNING") as logs:
+            db.host_get_by_name("nobody")
+        self.assertIn("Slow query HostGetByName", logs.output[0])
+        self.assertIn("USING INDEX", logs.output[0])
+
+        stats = Database.query_stats()
+        self.assertEqual(stats[QueryID.HostGetByName].count, 1)
+        self.assertEqual(stats[QueryID.HostGetByName].slow, 1)
+        self.assertGreater(stats[QueryID.HostGetByName].mean(), 0)
+
+    def test_04_tags(self) -> None:
+        """Tag Hosts and look them up by their tags."""
+        db: Database = DBTest.db()
+        hosts: list[Host] = []
+        with db:
+            specs = (("debian", "1"), ("freebsd", "1"), ("debian", "2"))
+            for i, (os_name, rack) in enumerate(specs):
+                h = Host(name=f"tagged{i}", os=os_name, last_contact=datetime.now())
+                db.host_add(h)
+                db.tag_set(h.host_id, {"os": os_name, "rack": rack})
+                hosts.append(h)
+
+        self.assertEqual([h.name for h in db.host_get_by_tag("os", "debian")],
+                         ["tagged0", "tagged2"])
+        self.assertEqual(db.host_get_by_tag("rack", "3"), [])
+        self.assertIn(("rack", "1", 2), db.tag_get_groups())
+
+        # Setting the tags replaces all of them.
+        with db:
+            db.tag_set(hosts[0].host_id, {"os": "debian", "role": "db"})
+        self.assertEqual(db.tag_get_by_host(hosts[0].host_id), {"os": "debian", "role": "db"})
+        self.assertEqual(db.tag_get_all()[hosts[1].host_id], {"os": "freebsd", "rack": "1"})
+        self.assertEqual([h.name for h in db.host_get_by_tag("rack", "1")], ["tagged1"])
+
+    def test_05_partitions(self) -> None:
+        """Store Records in one table per day, read across them, and drop old ones."""
+        db: Database = Database(os.path.join(TEST_DIR, "parts.db"))
+        db.part_width = PARTITIONS["day"]
+        # A fresh database does not put anything in the original record table.
+        self.assertEqual([tuple(p) for p in db.partitions()], [("record", 0, 1)])
+
+        now: Final[int] = int(datetime.now().timestamp())
+        h = Host(name="parted", os="debian", last_contact=datetime.now())
+        with db:
+            db.host_add(h)
+            for age in (3, 1, 0):
+                db.record_add(LoadRecord(host_id=h.host_id,
+                                         timestamp=now - age * 86400,
+                                         load=SysLoad(age, age, age)))
+        parts = db.partitions()
+        self.assertEqual(len(parts), 4)
+        self.assertTrue(all(p.stop - p.start == 86400 for p in parts[1:]))
+
+        recs = db.record_get_by_host(h)
+        self.assertEqual([r.timestamp for r in recs], [now, now - 86400, now - 3 * 86400])
+        self.assertEqual(len({r.record_id for r in recs}), 3)
+        self.assertEqual([r.timestamp for r in db.record_get_by_host(h, 2)], [now, now - 86400])
+        self.assertEqual(len(db.record_get_by_host_probe(h, "sysload", 2 * 86400)), 2)
+        recs = db.record_get_by_probe("sysload", now - 4 * 86400, now + 1)
+        self.assertEqual([r.score() for r in recs], [3, 1, 0])
+
+        # A new partition that is wider does not overlap the ones already there.
+        db.part_width = PARTITIONS["week"]
+        part = db.record_partition(parts[1].start - 1)
+        self.assertEqual(part.stop, parts[1].start)
+        self.assertLessEqual(parts[1].start - part.start, 7 * 86400)
+
+        self.assertEqual(db.record_expire(now - 2 * 86400), ["record", part.name, parts[1].name])
+        recs = db.record_get_by_probe("sysload", now - 4 * 86400, now + 1)
+        self.assertEqual([r.score() for r in recs], [1, 0])
+        self.assertEqual(len(db.record_get_latest()), 1)
+
+        # Late Records do not bring back partitions that have expired.
+        self.assertEqual(db.record_horizon(), parts[1].stop)
+        late = LoadRecord(host_id=h.host_id, timestamp=now - 3 * 86400, load=SysLoad(3, 3, 3))
+        with db:
+            db.record_add(late)
+        self.assertEqual(late.record_id, -1)
+        self.assertEqual(len(db.partitions()), 2)
+        with self.assertRaises(DatabaseError):
+            db.record_partition(parts[1].stop - 1)
+        db.close()
+
+    def test_06_partition_range(self) -> None:
+        """Partitions start at midnight, weekly ones on Monday."""
+        stamp: Final[int] = int(datetime(2026, 10, 22, 13, 5, tzinfo=timezone.utc).timestamp())
+        start, stop = partition_range(stamp, PARTITIONS["day"])
+        self.assertEqual(datetime.fromtimestamp(start, timezone.utc),
+                         datetime(2026, 10, 22, tzinfo=timezone.utc))
+        self.assertEqual(stop - start, 86400)
+        start, stop = partition_range(stamp, PARTITIONS["week"])
+        self.assertEqual(datetime.fromtimestamp(start, timezone.utc),
+                         datetime(2026, 10, 19, tzinfo=timezone.utc))
+        self.assertEqual(stop - start, 7 * 86400)
+
+    def test_07_pool(self) -> None:
+        """Write through one connection, read through others, and checkpoint when they are idle."""
+        path: Final[str] = os.path.join(TEST_DIR, "pool.db")
+        pool = Pool(path, size=2, checkpoint=1)
+        rd = pool.reader()
+        self.assertTrue(rd.readonly)
+        h = Host(name="pooled", os="debian", last_contact=datetime.now())
+        wr = pool.writer()
+        # The thread holding the writer gets it again.
+        self.assertIs(pool.writer(), wr)
+        wr.close()
+        with wr:
+            wr.host_add(h)
+            wr.record_add(LoadRecord(host_id=h.host_id,
+                                     timestamp=int(datetime.now().timestamp()),
+                                     load=SysLoad(1, 1, 1)))
+        self.assertIsNotNone(rd.host_get_by_name("pooled"))
+        with self.assertRaises(DatabaseError):
+            rd.tag_set(h.host_id, {"role": "db"})
+
+        # With a reader busy, the log is left alone.
+        wr.close()
+        self.assertGreater(os.path.getsize(path + "-wal"), 0)
+        rd.close()
+        self.assertEqual(os.path.getsize(path + "-wal"), 0)
+        # Readers are handed out again once returned.
+        self.assertIs(pool.reader(), rd)
+        self.assertEqual(len(rd.record_get_by_host(h)), 1)
+        rd.close()
+        pool.close()
+
+    def test_08_storage(self) -> None:
+        """Apply the storage settings to every connection."""
+        self.assertEqual(storage_settings(), StorageSettings())
+        path: Final[str] = os.path.join(TEST_DIR, "storage.db")
+        st = StorageSettings(synchronous="normal",
+                             cache_size=16 * 2**20,
+                             temp_store="memory",
+                             page_size=8192,
+                             busy_timeout=250)
+        expect: Final[dict[str, int]] = {
+            "synchronous": 1,
+            "cache_size": -16384,
+            "temp_store": 2,
+            "page_size": 8192,
+            "busy_timeout": 250,
+        }
+        for db in (Database(path, storage=st), Database(path, True, st)):
+            cur = db.db.cursor()
+            for name, value in expect.items():
+                cur.execute(f"PRAGMA {name}")
+                self.assertEqual(cur.fetchall()[0][0], value, name)
+            db.close()
+
+    def test_09_storage_invalid(self) -> None:
+        """Invalid storage settings are replaced by the defaults."""
+        path: Final[str] = os.path.join(TEST_DIR, "storage.toml")
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write('[Database]\nCacheSize = -1\nMmapSize = "lots"\nBusyTimeout = 0.5\n')
+        cfg: Final[Config] = Config(path)
+        log: Final[logging.Logger] = common.get_logger("test_database")
+        dflt: Final[StorageSettings] = StorageSettings()
+        self.assertEqual(_storage_number(cfg, log, "CacheSize", dflt.cache_size, 2**20),
+                         dflt.cache_size)
+        self.assertEqual(_storage_number(cfg, log, "MmapSize", dflt.mmap_size, 2**20),
+                         dflt.mmap_size)
+        self.assertEqual(_storage_number(cfg, log, "BusyTimeout", dflt.busy_timeout, 1000), 500)
+        self.assertEqual(_storage_number(cfg, log, "WalAutocheckpoint", dflt.wal_autocheckpoint),
+                         dflt.wal_autocheckpoint)
+
+    def test_10_pool_release(self) -> None:
+        """Returning a connection twice is ignored, a failed rollback frees the writer."""
+        path: Final[str] = os.path.join(TEST_DIR, "release.db")
+        pool = Pool(path, size=2)
+        rd = pool.reader()
+        rd.close()
+        rd.close()
+        self.assertEqual(len(pool.idle), 1)
+        self.assertEqual(pool.busy, 0)
+        wr = pool.writer()
+        wr.close()
+        wr.close()
+        self.assertEqual(pool.wdepth, 0)
+
+        class Broken:  # pylint: disable-msg=R0903
+            """A connection that fails to roll back."""
+            in_transaction = True
+
+            def rollback(self) -> None:
+                """Fail."""
+                raise sqlite3.OperationalError("disk I/O error")
+
+        conn: Final[sqlite3.Connection] = wr.db
+        wr = pool.writer()
+        wr.db = Broken()  # type: ignore
+        with self.assertRaises(sqlite3.OperationalError):
+            wr.close()
+        wr.db = conn
+        got: list[bool] = []
+
+        def take() -> None:
+            """Take the writer and give it back."""
+            got.append(pool.wlock.acquire(timeout=5))  # pylint: disable-msg=R1732
+            pool.wlock.release()
+
+        t = threading.Thread(target=take)
+        t.start()
+        t.join()
+        self.assertEqual(got, [True])
+        pool.close()
+
 
 # Local Variables: #
 # python-indent: 4 #
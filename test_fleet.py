@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 09:12:13 krylon>
+#
+# /data/code/python/medusa/test_fleet.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.test_fleet
+
+(c) 2026 Benjamin Walkenhorst
+"""
+
+import math
+import unittest
+from typing import Final
+
+from medusa import fleet
+from medusa.data import (DiskRecord, FileSystem, LoadRecord, SensorData,
+                         SensorRecord, SysLoad)
+from medusa.ringbuf import Window, window_from_records
+
+
+def loads(values: list[float], start: int = 0, step: int = 60) -> Window:
+    """Build a Window of LoadRecords, one per step seconds."""
+    return window_from_records(
+        LoadRecord(timestamp=start + i * step, load=SysLoad(v, v, v))
+        for i, v in enumerate(values))
+
+
+class FleetTest(unittest.TestCase):
+    """Test aggregates across Hosts."""
+
+    def test_percentile(self) -> None:
+        """Test interpolated quantiles."""
+        vals = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self.assertEqual(fleet.percentile(vals, 0), 1.0)
+        self.assertEqual(fleet.percentile(vals, 0.5), 3.0)
+        self.assertEqual(fleet.percentile(vals, 1), 5.0)
+        self.assertAlmostEqual(fleet.percentile(vals, 0.95), 4.8)
+        self.assertEqual(fleet.percentile([7.0], 0.95), 7.0)
+        self.assertEqual(fleet.quantile_name(0.95), "p95")
+        self.assertEqual(fleet.quantile_name(1), "max")
+
+    def test_sensors(self) -> None:
+        """Test that the hottest sensor counts, and gaps are skipped."""
+        win = window_from_records((
+            SensorRecord(timestamp=0, sensors={"cpu": SensorData(50.0, "°C"),
+                                               "gpu": SensorData(60.0, "°C")}),
+            SensorRecord(timestamp=60, sensors={"cpu": SensorData(55.0, "°C")}),
+            SensorRecord(timestamp=120, sensors={}),
+        ))
+        vals = fleet.sample_values("sensors", win)
+        self.assertEqual(list(vals[:2]), [60.0, 55.0])
+        self.assertTrue(math.isnan(vals[2]))
+        r = fleet.rank(1, "sensors", win)
+        self.assertEqual((r.peak, r.last, r.samples), (60.0, 55.0, 2))
+
+    def test_aggregate(self) -> None:
+        """Test percentiles per bucket."""
+        windows = {hid: loads([float(hid)] * 10) for hid in range(1, 11)}
+        # Host 11 only shows up for the last two minutes, with a big load.
+        windows[11] = loads([100.0, 100.0], 480)
+
+        buckets = fleet.aggregate(windows, "sysload", 0, 300, (0.5, 0.95, 1.0))
+        self.assertEqual([b.stamp for b in buckets], [0, 300])
+        self.assertEqual(buckets[0].hosts, 10)
+        self.assertEqual(buckets[0].values[0], 5.5)
+        self.assertAlmostEqual(buckets[0].values[1], 9.55)
+        self.assertEqual(buckets[0].values[2], 10.0)
+        self.assertEqual(buckets[1].hosts, 11)
+        self.assertEqual(buckets[1].values[0], 6.0)
+        self.assertEqual(buckets[1].values[2], 100.0)
+
+        # Buckets are aligned to multiples of their width.
+        buckets = fleet.aggregate(windows, "sysload", 150, 300, (0.5, ))
+        self.assertEqual(buckets[0].stamp, 0)
+
+    def test_top(self) -> None:
+        """Test ranking Hosts, including sources where less is worse."""
+        windows = {
+            1: loads([1.0, 1.0, 6.0]),
+            2: loads([3.0, 3.0, 3.0]),
+            3: loads([2.0, 2.0, 2.0]),
+            4: loads([]),
+        }
+        self.assertEqual([r.host_id for r in fleet.top(windows, "sysload", 2)], [2, 1])
+        self.assertEqual([r.host_id for r in fleet.top(windows, "sysload", 5, "peak")], [1, 2, 3])
+        with self.assertRaises(ValueError):
+            fleet.top(windows, "sysload", 2, "median")
+
+        def disk(free: int) -> Window:
+            fs: Final[FileSystem] = FileSystem("sda1", 100, 100 - free, free, "/")
+            return window_from_records((DiskRecord(timestamp=0, disks={"/": fs}), ))
+
+        windows = {1: disk(50), 2: disk(10), 3: disk(90)}
+        self.assertEqual([r.host_id for r in fleet.top(windows, "disk", 3)], [2, 1, 3])
+        self.assertEqual(fleet.quantiles("disk"), (0.5, 0.05, 0.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
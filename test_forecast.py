@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 08:33:04 krylon>
+#
+# /data/code/python/medusa/test_forecast.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.test_forecast
+
+(c) 2026 Benjamin Walkenhorst
+"""
+
+import random
+import unittest
+
+from medusa.data import DiskRecord, FileSystem
+from medusa.forecast import Forecaster, Trend
+
+
+def disk(stamp: int, free: dict[str, float]) -> DiskRecord:
+    """Create a DiskRecord."""
+    return DiskRecord(timestamp=stamp,
+                      disks={k: FileSystem("sda1", 10**8, int(10**8 - v), int(v), k)
+                             for k, v in free.items()})
+
+
+class ForecastTest(unittest.TestCase):
+    """Test the disk space forecasts."""
+
+    def test_trend(self) -> None:
+        """Fit noisy data with an outlier and a level shift."""
+        rnd = random.Random(23)
+        tr = Trend()
+        for i in range(600):
+            x = 10**7 - 100 * i + rnd.gauss(0, 500)
+            if i == 200:
+                x -= 5 * 10**5
+            if i >= 400:
+                x += 2 * 10**6
+            tr.add(i * 60, x)
+            if i == 20:
+                self.assertIsNone(tr.fit())
+            if i in (250, 599):
+                fit = tr.fit()
+                assert fit is not None
+                self.assertAlmostEqual(fit.rate, -100 / 60, delta=0.1)
+                self.assertAlmostEqual(fit.free, x, delta=5000)
+        self.assertLess(tr.count, 200)
+
+    def test_forecaster(self) -> None:
+        """Test forecasts across Hosts."""
+        fc = Forecaster()
+        for i in range(100):
+            fc.update(1, [disk(i * 60, {"/": 10**6 - 100 * i, "/home": 10**7})])
+            fc.update(2, [disk(i * 60, {"/": 10**6 - 1000 * i})])
+        self.assertEqual([f.path for f in fc.get(1)], ["/", "/home"])
+        home = fc.get(1)[1]
+        self.assertIsNone(home.eta)
+        self.assertEqual(home.eta_str(), "never")
+
+        risky = fc.at_risk(7 * 86400)
+        self.assertEqual([(f.host_id, f.path) for f in risky], [(2, "/"), (1, "/")])
+        self.assertAlmostEqual(risky[0].eta or 0, 901 * 60, delta=60)
+        self.assertEqual(risky[0].eta_str(), "15.0 hours")
+        self.assertEqual(risky[1].eta_str(), "6.9 days")
+        self.assertEqual(len(fc.at_risk(86400)), 1)
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
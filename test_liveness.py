@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 09:04:00 krylon>
+#
+# /data/code/python/medusa/test_liveness.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.test_liveness
+
+(c) 2026 Benjamin Walkenhorst
+"""
+
+import os
+import threading
+import time
+import unittest
+from datetime import datetime
+from typing import Final
+
+from medusa import common
+from medusa.data import Host
+from medusa.database import Pool
+from medusa.liveness import Monitor, Relay, Status, TimerWheel, Transition
+
+TEST_DIR: Final[str] = os.path.join(
+    "/tmp",
+    datetime.now().strftime("medusa_test_liveness_%Y%m%d_%H%M%S"))
+
+
+class LivenessTest(unittest.TestCase):
+    """Test the timer wheel and the liveness Monitor."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Prepare the stuff."""
+        common.set_basedir(TEST_DIR)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Clean up the mess."""
+        os.system(f'rm -rf "{TEST_DIR}"')
+
+    def test_wheel(self) -> None:
+        """Test scheduling, re-scheduling, and expiring timers."""
+        wheel = TimerWheel(1000.0, 1.0, 16)
+        wheel.schedule("a", 1005.5)
+        wheel.schedule("b", 1040.0)  # more than one turn ahead
+        wheel.schedule("c", 1003.0)
+        wheel.schedule("c", 1010.0)
+        wheel.schedule("d", 1002.0)
+        wheel.cancel("d")
+        self.assertEqual(len(wheel), 3)
+
+        self.assertEqual(wheel.advance(1005.0), [])
+        self.assertEqual(wheel.advance(1005.5), ["a"])
+        self.assertEqual(wheel.advance(1030.0), ["c"])
+        self.assertIn("b", wheel)
+        # Falling behind by several turns still finds everything.
+        self.assertEqual(wheel.advance(2000.0), ["b"])
+        self.assertEqual(len(wheel), 0)
+
+        wheel.schedule("late", 1500.0)
+        self.assertEqual(wheel.advance(2000.0), ["late"])
+
+    def test_monitor(self) -> None:
+        """Test Hosts going stale, down, and coming back."""
+        seen: list[Transition] = []
+        mon = Monitor(30, 100)
+        mon.subscribe(seen.extend)
+        t0 = datetime.now().timestamp()
+        hosts = [Host(host_id=i + 1,
+                      name=f"host{i}",
+                      os="Debian",
+                      last_contact=datetime.fromtimestamp(t0 - i * 50)) for i in range(3)]
+        changes = mon.load(hosts, t0)
+        self.assertEqual([(tr.host_id, tr.new) for tr in changes],
+                         [(2, Status.Stale), (3, Status.Stale), (3, Status.Down)])
+        self.assertEqual(mon.get(1), Status.Up)
+
+        self.assertEqual(mon.check(t0 + 29), [])
+        self.assertEqual([(tr.host_id, tr.new) for tr in mon.check(t0 + 31)],
+                         [(1, Status.Stale)])
+        tr = mon.contact(3, t0 + 40)
+        assert tr is not None
+        self.assertEqual((tr.old, tr.new), (Status.Down, Status.Up))
+        self.assertIsNone(mon.contact(3, t0 + 45))
+        self.assertEqual({(tr.host_id, tr.new) for tr in mon.check(t0 + 101)},
+                         {(1, Status.Down), (2, Status.Down), (3, Status.Stale)})
+        self.assertEqual(len(seen), 8)
+        self.assertEqual(mon.get_all(), {1: Status.Down, 2: Status.Down, 3: Status.Stale})
+
+    def test_relay(self) -> None:
+        """A listener that needs the database writer does not deadlock with a Host reporting."""
+        pool = Pool(os.path.join(TEST_DIR, "relay.db"))
+        seen: list[Transition] = []
+
+        def raise_alerts(batch: list[Transition]) -> None:
+            db = pool.writer()
+            try:
+                seen.extend(batch)
+            finally:
+                db.close()
+
+        t0 = datetime.now().timestamp()
+        mon = Monitor(30, 100)
+        relay = Relay(raise_alerts)
+        mon.subscribe(relay)
+        mon.load([Host(host_id=1, name="up", os="Debian", last_contact=datetime.fromtimestamp(t0)),
+                  Host(host_id=2, name="stale", os="Debian",
+                       last_contact=datetime.fromtimestamp(t0 - 50))],
+                 t0)
+
+        # Keep the liveness thread inside the dispatch lock for a while, so
+        # the ingesting thread reports contact while it is in there.
+        dispatching = threading.Event()
+
+        def hold(_: list[Transition]) -> None:
+            dispatching.set()
+            time.sleep(0.2)
+
+        mon.subscribe(hold)
+        relay.start()
+
+        def ingest() -> None:
+            db = pool.writer()
+            try:
+                dispatching.wait(5)
+                mon.contact(2, t0 + 1)
+            finally:
+                db.close()
+
+        threads = [threading.Thread(target=ingest, daemon=True),
+                   threading.Thread(target=mon.check, args=(t0 + 31, ), daemon=True)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join(5)
+            self.assertFalse(th.is_alive())
+        relay.stop()
+        pool.close()
+        self.assertEqual({(tr.host_id, tr.new) for tr in seen},
+                         {(2, Status.Stale), (2, Status.Up), (1, Status.Stale)})
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 08:15:23 krylon>
+#
+# /data/code/python/medusa/test_metrics.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.test_metrics
+
+(c) 2026 Benjamin Walkenhorst
+"""
+
+import unittest
+
+from medusa.metrics import Registry
+
+
+class MetricsTest(unittest.TestCase):
+    """Test counters, histograms and their text format."""
+
+    def test_counter(self) -> None:
+        """Test counting, with and without labels."""
+        reg = Registry()
+        c = reg.counter("test_total", "Things counted", ("kind", ))
+        c.inc(("a", ))
+        c.inc(("a", ), 2)
+        c.inc(("b\"", ))
+        self.assertEqual(c.get(("a", )), 3)
+        self.assertIs(reg.counter("test_total", "Things counted", ("kind", )), c)
+        with self.assertRaises(TypeError):
+            reg.gauge("test_total", "Not a gauge")
+
+        text = reg.render()
+        self.assertIn("# TYPE test_total counter", text)
+        self.assertIn('test_total{kind="a"} 3\n', text)
+        self.assertIn('test_total{kind="b\\""} 1\n', text)
+
+    def test_histogram(self) -> None:
+        """Test that observations end up in the right buckets."""
+        reg = Registry()
+        h = reg.histogram("test_seconds", "Time spent", buckets=(0.1, 1.0))
+        for val in (0.05, 0.1, 0.5, 2.0):
+            h.observe(val)
+        self.assertEqual(h.count(), 4)
+
+        lines = reg.render().splitlines()
+        self.assertIn('test_seconds_bucket{le="0.1"} 2', lines)
+        self.assertIn('test_seconds_bucket{le="1"} 3', lines)
+        self.assertIn('test_seconds_bucket{le="+Inf"} 4', lines)
+        self.assertIn("test_seconds_sum 2.65", lines)
+        self.assertIn("test_seconds_count 4", lines)
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 08:16:54 krylon>
+#
+# /data/code/python/medusa/test_profiler.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.test_profiler
+
+(c) 2026 Benjamin Walkenhorst
+"""
+
+import os
+import threading
+import time
+import unittest
+from datetime import datetime
+from typing import Final
+
+from medusa import common
+from medusa.profiler import Profiler, ProfilerBusyError
+
+TEST_DIR: Final[str] = os.path.join(
+    "/tmp",
+    datetime.now().strftime("medusa_test_profiler_%Y%m%d_%H%M%S"))
+
+
+def busy_loop(stop: threading.Event) -> None:
+    """Burn some CPU, so there is something to profile."""
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class ProfilerTest(unittest.TestCase):
+    """Test the sampling profiler."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        common.set_basedir(TEST_DIR)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        os.system(f'rm -rf "{TEST_DIR}"')
+
+    def test_profile(self) -> None:
+        """Profile a busy thread and check that it shows up in the output."""
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(stop, ), name="Busy")
+        worker.start()
+        try:
+            prof = Profiler(interval=0.001)
+            path = prof.start(0.2)
+            with self.assertRaises(ProfilerBusyError):
+                prof.start(0.2)
+            while prof.running():
+                time.sleep(0.05)
+        finally:
+            stop.set()
+            worker.join()
+
+        with open(path, "r", encoding="utf-8") as fh:
+            lines = fh.readlines()
+        self.assertGreater(len(lines), 0)
+        busy = [ln for ln in lines if ln.startswith("Busy;")]
+        self.assertGreater(len(busy), 0)
+        self.assertIn("busy_loop (test_profiler.py:", busy[0])
+        self.assertTrue(all(ln.rstrip().rsplit(" ", 1)[1].isdigit() for ln in lines))
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
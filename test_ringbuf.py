@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 09:10:33 krylon>
+#
+# /data/code/python/medusa/test_ringbuf.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.test_ringbuf
+
+(c) 2026 Benjamin Walkenhorst
+"""
+
+import math
+import os
+import time
+import unittest
+from datetime import datetime
+from typing import Final
+
+from medusa import common
+from medusa.data import DiskRecord, FileSystem, Host, LoadRecord, SysLoad
+from medusa.database import Database
+from medusa.ringbuf import Ring, SeriesBuffer
+
+TEST_DIR: Final[str] = os.path.join(
+    "/tmp",
+    datetime.now().strftime("medusa_test_ringbuf_%Y%m%d_%H%M%S"))
+
+
+def load(stamp: int, val: float) -> LoadRecord:
+    """Create a LoadRecord."""
+    return LoadRecord(timestamp=stamp, load=SysLoad(val, val, val))
+
+
+class RingTest(unittest.TestCase):
+    """Test the in-memory time series buffers."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        common.set_basedir(TEST_DIR)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        os.system(f'rm -rf "{TEST_DIR}"')
+
+    def test_ring(self) -> None:
+        """Test adding, ordering, and dropping samples."""
+        ring = Ring()
+        for i in range(200):
+            ring.add(load(i * 60, i))
+        ring.add(load(30, -1.0))   # out of order
+        ring.add(load(60, -2.0))   # duplicate
+        self.assertEqual(len(ring), 201)
+        self.assertEqual(list(ring.stamps[:3]), [0, 30, 60])
+        self.assertEqual(ring.columns["load5"][2], 1.0)
+
+        ring.trim(150 * 60)
+        self.assertEqual(len(ring), 50)
+        self.assertEqual(ring.head, 0)
+        win = ring.window(190 * 60, 1_000_000)
+        self.assertEqual(len(win.stamps), 10)
+        self.assertEqual(win.score_points()[0], (190 * 60, 190.0))
+
+        # A new file system shows up, earlier samples have no value for it.
+        ring.add(DiskRecord(timestamp=300 * 60,
+                            disks={"/": FileSystem("sda1", 100, 50, 50, "/")}))
+        win = ring.window(0, 1_000_000)
+        self.assertTrue(math.isnan(win.columns["/"][0]))
+        self.assertEqual(win.points("/"), [(300 * 60, 50.0)])
+
+    def test_buffer(self) -> None:
+        """Test loading from the database, ingesting, and eviction."""
+        now: Final[int] = int(time.time())
+        db = Database()
+        hosts: list[Host] = []
+        with db:
+            for i in range(3):
+                h = Host(name=f"host{i:02d}", os="Debian", last_contact=datetime.now())
+                db.host_add(h)
+                hosts.append(h)
+                for j in range(100):
+                    rec = load(now - 5970 + j * 60, i)
+                    rec.host_id = h.host_id
+                    db.record_add(rec)
+
+        buf = SeriesBuffer(3600, 2**20)
+        self.assertIsNone(buf.get(db, hosts[0], "sysload", 7200))
+        self.assertIsNone(buf.get(db, hosts[0], "bogus", 600))
+
+        win = buf.get(db, hosts[0], "sysload", 3600)
+        assert win is not None
+        self.assertEqual(len(win.stamps), 60)
+
+        fresh = load(now, 42.0)
+        fresh.host_id = hosts[0].host_id
+        buf.add(hosts[0].host_id, [fresh])
+        win = buf.get(db, hosts[0], "sysload", 600)
+        assert win is not None
+        self.assertEqual(win.scores[-1], 42.0)
+
+        wins = buf.get_source(db, hosts, "sysload", 3600)
+        assert wins is not None
+        self.assertEqual(len(wins), 3)
+        self.assertEqual(wins[hosts[2].host_id].scores[0], 2.0)
+        self.assertEqual(buf.used, sum(r.nbytes() for h in buf.hosts.values() for r in h.values()))
+
+        # Hosts the caller does not know about are included, but not kept.
+        other = SeriesBuffer(3600, 2**20)
+        wins = other.get_source(db, hosts[:1], "sysload", 600)
+        assert wins is not None
+        self.assertEqual(set(wins), {h.host_id for h in hosts})
+        self.assertEqual(len(wins[hosts[1].host_id].stamps), 10)
+        self.assertEqual(list(other.hosts), [hosts[0].host_id])
+
+        # Shrink the limit so only one Host fits, the least recently read ones go.
+        buf.get(db, hosts[1], "sysload", 600)
+        buf.limit = buf.used // 3 + 1
+        buf.add(hosts[1].host_id, [])
+        self.assertEqual(list(buf.hosts), [hosts[1].host_id])
+        db.close()
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
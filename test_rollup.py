@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 09:29:29 krylon>
+#
+# /data/code/python/medusa/test_rollup.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.test_rollup
+
+(c) 2026 Benjamin Walkenhorst
+"""
+
+import os
+import time
+import unittest
+from datetime import datetime
+from typing import Final
+
+from medusa import common, rollup
+from medusa.data import Host, LoadRecord, SensorData, SensorRecord, SysLoad
+from medusa.database import Database, Pool
+
+TEST_DIR: Final[str] = os.path.join(
+    "/tmp",
+    datetime.now().strftime("medusa_test_rollup_%Y%m%d_%H%M%S"))
+
+
+class RollupTest(unittest.TestCase):
+    """Test summarizing Records per period."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        common.set_basedir(TEST_DIR)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        os.system(f'rm -rf "{TEST_DIR}"')
+
+    @staticmethod
+    def fill(db: Database, start: int) -> list[Host]:
+        """Add three Hosts with four hours of load and sensor data each."""
+        hosts: list[Host] = []
+        with db:
+            for i in range(3):
+                h = Host(name=f"host{i:02d}", os="Debian", last_contact=datetime.now())
+                db.host_add(h)
+                hosts.append(h)
+                for j in range(240):
+                    # One spike per hour on the last Host.
+                    x = 50.0 if i == 2 and j % 60 == 30 else float(i + 1)
+                    rec = LoadRecord(host_id=h.host_id,
+                                     timestamp=start + j * 60,
+                                     load=SysLoad(x, x, x))
+                    db.record_add(rec)
+                    db.record_add(SensorRecord(host_id=h.host_id,
+                                               timestamp=start + j * 60,
+                                               sensors={"cpu": SensorData(40.0 + i, "°C")}))
+        return hosts
+
+    def test_rollup(self) -> None:
+        """Summarize a few hours of data, then ask for quantiles."""
+        now: Final[int] = int(time.time())
+        start: Final[int] = now - now % 3600 - 4 * 3600
+        db = Database()
+        hosts: Final[list[Host]] = self.fill(db, start)
+        pool: Final[Pool] = Pool()
+
+        roller = rollup.Roller(3600, 86400, 300)
+        # Four hours per source and Host.
+        self.assertEqual(roller.run(pool, start + 4 * 3600 + 301), 24)
+        self.assertEqual(roller.run(pool, start + 4 * 3600 + 301), 0)
+        self.assertEqual(db.rollup_get_last("sysload", 3600), start + 3 * 3600)
+
+        # A fresh Roller picks up where the last one left off.
+        self.assertEqual(rollup.Roller(3600, 86400, 300).run(pool, start + 4 * 3600 + 301), 0)
+        pool.close()
+
+        summaries = rollup.query(db, "sysload", start, start + 4 * 3600)
+        self.assertEqual([s.start for s in summaries], [start + k * 3600 for k in range(4)])
+        self.assertEqual(summaries[0].hosts, 3)
+        sk = rollup.total(summaries)
+        assert sk is not None
+        self.assertEqual(sk.count, 720)
+        self.assertEqual(sk.max, 50.0)
+        self.assertAlmostEqual(sk.quantile(0.5), 2.0, delta=0.02)
+        self.assertAlmostEqual(sk.quantile(0.999), 50.0, delta=0.5)
+
+        only = rollup.total(rollup.query(db, "sysload", start, now, {hosts[0].host_id}))
+        assert only is not None
+        self.assertEqual((only.count, only.max), (240, 1.0))
+
+        temp = rollup.total(rollup.query(db, "sensors", start, now))
+        assert temp is not None
+        self.assertAlmostEqual(temp.quantile(1.0), 42.0)
+
+        groups = rollup.by_group(db, "sysload", start, now,
+                                 {hosts[0].host_id: "a", hosts[2].host_id: "b"})
+        self.assertEqual(sorted(groups), ["a", "b"])
+        self.assertEqual(groups["a"][0], 1)
+        self.assertEqual(groups["b"][1].max, 50.0)
+        db.close()
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 09:40:13 krylon>
+#
+# /data/code/python/medusa/test_series.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.test_series
+
+(c) 2026 Benjamin Walkenhorst
+"""
+
+import math
+import unittest
+from typing import Final
+
+from medusa.series import Point, downsample, lttb, minmax
+
+SERIES_LEN: Final[int] = 10_000
+
+
+def make_series(cnt: int = SERIES_LEN) -> list[Point]:
+    """Create a sine wave with a single spike in it."""
+    pts: list[Point] = [(i * 60, math.sin(i / 100)) for i in range(cnt)]
+    pts[cnt // 3] = (pts[cnt // 3][0], 25.0)
+    return pts
+
+
+class SeriesTest(unittest.TestCase):
+    """Test the downsampling of time series."""
+
+    def test_lttb(self) -> None:
+        """Test Largest-Triangle-Three-Buckets."""
+        pts: Final[list[Point]] = make_series()
+        res = lttb(pts, 500)
+        self.assertEqual(len(res), 500)
+        self.assertEqual(res[0], pts[0])
+        self.assertEqual(res[-1], pts[-1])
+        self.assertIn(pts[SERIES_LEN // 3], res)
+        stamps = [p[0] for p in res]
+        self.assertEqual(stamps, sorted(stamps))
+
+    def test_minmax(self) -> None:
+        """Test min/max bucketing."""
+        pts: Final[list[Point]] = make_series()
+        res = minmax(pts, 500)
+        self.assertLessEqual(len(res), 500)
+        self.assertIn(pts[SERIES_LEN // 3], res)
+        stamps = [p[0] for p in res]
+        self.assertEqual(stamps, sorted(stamps))
+
+    def test_short(self) -> None:
+        """Series that are short enough already should be returned as they are."""
+        pts: Final[list[Point]] = make_series(100)
+        self.assertEqual(lttb(pts, 500), pts)
+        self.assertEqual(minmax(pts, 500), pts)
+
+    def test_invalid_method(self) -> None:
+        """Asking for an unknown method should raise ValueError."""
+        with self.assertRaises(ValueError):
+            downsample(make_series(10), 5, "bogus")
+
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 08:39:03 krylon>
+#
+# /data/code/python/medusa/test_sketch.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.test_sketch
+
+(c) 2026 Benjamin Walkenhorst
+"""
+
+import math
+import random
+import unittest
+
+from medusa.sketch import Sketch, SketchError, merged
+
+
+class SketchTest(unittest.TestCase):
+    """Test the quantile sketches."""
+
+    def test_accuracy(self) -> None:
+        """Test that quantiles are within the relative error, including negative values and zero."""
+        rnd = random.Random(42)
+        vals = [rnd.lognormvariate(0, 1.5) for _ in range(5000)]
+        vals += [0.0] * 50 + [-rnd.random() for _ in range(100)]
+        sk = Sketch(0.01)
+        sk.update(vals)
+        vals.sort()
+        for q in (0.0, 0.01, 0.1, 0.5, 0.9, 0.99, 0.999, 1.0):
+            exact = vals[math.floor(q * (len(vals) - 1))]
+            self.assertLessEqual(abs(sk.quantile(q) - exact), 0.0101 * abs(exact) + 1e-12, q)
+        self.assertEqual(sk.count, len(vals))
+        self.assertEqual((sk.min, sk.max), (vals[0], vals[-1]))
+        self.assertAlmostEqual(sk.mean(), math.fsum(vals) / len(vals))
+        self.assertTrue(math.isnan(Sketch().quantile(0.5)))
+
+    def test_merge(self) -> None:
+        """Test that merging gives the same result as adding everything to one Sketch."""
+        rnd = random.Random(23)
+        vals = [rnd.gauss(50, 10) for _ in range(3000)]
+        whole = Sketch()
+        whole.update(vals)
+        parts = [Sketch() for _ in range(3)]
+        for i, v in enumerate(vals):
+            parts[i % 3].add(v)
+        m = merged(parts)
+        assert m is not None
+        for q in (0.05, 0.5, 0.95, 0.99):
+            self.assertEqual(m.quantile(q), whole.quantile(q))
+        self.assertIsNone(merged([]))
+        with self.assertRaises(SketchError):
+            m.merge(Sketch(0.05))
+
+    def test_serialize(self) -> None:
+        """Test the round trip to bytes, and rejecting garbage."""
+        sk = Sketch()
+        sk.update([0.5, 1.0, 2.0, 4.0, -3.0, 0.0, 1000.0])
+        raw = sk.to_bytes()
+        back = Sketch.from_bytes(raw)
+        self.assertEqual(back.count, sk.count)
+        for q in (0.0, 0.25, 0.5, 0.75, 1.0):
+            self.assertEqual(back.quantile(q), sk.quantile(q))
+        with self.assertRaises(SketchError):
+            Sketch.from_bytes(raw[:-3])
+        self.assertEqual(Sketch.from_bytes(Sketch().to_bytes()).count, 0)
+
+    def test_collapse(self) -> None:
+        """Test that limiting the number of bins keeps the high quantiles."""
+        sk = Sketch(0.01, 100)
+        sk.update(float(i) for i in range(1, 10001))
+        self.assertLessEqual(len(sk.pos), 100)
+        self.assertAlmostEqual(sk.quantile(0.99), 9900, delta=100)
+        self.assertEqual(sk.quantile(0.0), 1.0)
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: <2026-10-19 09:07:38 krylon>
+#
+# /data/code/python/medusa/test_stream.py
+# created on 19. 10. 2026
+# (c) 2026 Benjamin Walkenhorst
+#
+# This file is part of the Medusa network monitor. It is distributed under the
+# terms of the GNU General Public License 3. See the file LICENSE for details
+# or find a copy online at https://www.gnu.org/licenses/gpl-3.0
+
+"""
+medusa.test_stream
+
+(c) 2026 Benjamin Walkenhorst
+"""
+
+import json
+import os
+import time
+import unittest
+from datetime import datetime
+from typing import Final
+
+from medusa import common
+from medusa.data import Host, LoadRecord, SysLoad
+from medusa.stream import BUFFER_SIZE, Broker
+
+TEST_DIR: Final[str] = os.path.join(
+    "/tmp",
+    datetime.now().strftime("medusa_test_stream_%Y%m%d_%H%M%S"))
+
+
+class StreamTest(unittest.TestCase):
+    """Test the fan-out of Records."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Prepare the environment for tests to run in"""
+        common.set_basedir(TEST_DIR)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Clean up afterwards"""
+        os.system(f'rm -rf "{TEST_DIR}"')
+
+    def test_publish(self) -> None:
+        """Test that Subscriptions only receive what they asked for."""
+        broker = Broker()
+        h1 = Host(host_id=1, name="alpha", os="Debian", last_contact=datetime.now())
+        h2 = Host(host_id=2, name="beta", os="FreeBSD", last_contact=datetime.now())
+        everything = broker.subscribe()
+        only_beta = broker.subscribe(hosts=[2])
+        only_disk = broker.subscribe(sources=["disk"])
+
+        rec = LoadRecord(timestamp=int(time.time()), load=SysLoad(1.0, 2.0, 3.0))
+        broker.publish(h1, [rec])
+        broker.publish(h2, [rec])
+
+        self.assertEqual(len(everything.get(0.1)), 2)
+        self.assertEqual(len(only_disk.get(0.01)), 0)
+        events = only_beta.get(0.1)
+        self.assertEqual(len(events), 1)
+        self.assertEqual(json.loads(events[0])["host"], "beta")
+
+        for s in (everything, only_beta, only_disk):
+            broker.unsubscribe(s)
+        self.assertEqual(broker.count(), 0)
+
+    def test_overflow(self) -> None:
+        """Test that a slow subscriber loses the oldest events."""
+        broker = Broker()
+        h = Host(host_id=1, name="alpha", os="Debian", last_contact=datetime.now())
+        sub = broker.subscribe()
+        recs = [LoadRecord(record_id=i, timestamp=int(time.time()), load=SysLoad(i, i, i))
+                for i in range(BUFFER_SIZE + 10)]
+        broker.publish(h, recs)
+        events = sub.get(0.1)
+        self.assertEqual(len(events), BUFFER_SIZE)
+        self.assertEqual(sub.dropped, 10)
+        self.assertEqual(json.loads(events[0])["record_id"], 10)
+        broker.unsubscribe(sub)
+
+
+# Local Variables: #
+# python-indent: 4 #
+# End: #
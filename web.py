@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Time-stamp: <2025-06-05 18:58:31 krylon>
+# Time-stamp: <2026-10-19 09:30:45 krylon>
 #
 # /data/code/python/medusa/web.py
 # created on 05. 05. 2025
@@ -19,55 +19,99 @@ medusa.web
 
 import json
 import logging
+import math
 import os
 import pickle
-import re
 import socket
 import threading
 import time
 from datetime import datetime
-from typing import Any, Final, Optional, Union
+from socketserver import ThreadingMixIn
+from typing import Any, Final, Iterable, Iterator, Optional, Union
+from wsgiref.simple_server import WSGIServer
 
 import bottle
 import pygal
 from bottle import request, response, route, run
-from jinja2 import Environment, FileSystemLoader, Template
+from jinja2 import (Environment, FileSystemBytecodeCache, FileSystemLoader,
+                    Template)
 from krylib import fmt_err
 from pygal import Config
 
-from medusa import common, config, data
-from medusa.data import DiskRecord, Host, SensorRecord
-from medusa.database import Database, DatabaseError
+from medusa import (alert, anomaly, assets, cache, codec, common, config,
+                    data, fleet, forecast, liveness, metrics, profiler,
+                    ringbuf, rollup, series, sketch, stream)
+from medusa.data import Host
+from medusa.database import (CHECKPOINT, READERS, Database, DatabaseError,
+                             Pool)
 from medusa.proto import Message, MsgType
 
-mime_types: Final[dict[str, str]] = {
-    ".css":  "text/css",
-    ".map":  "application/json",
-    ".js":   "text/javascript",
-    ".png":  "image/png",
-    ".jpg":  "image/jpeg",
-    ".jpeg": "image/jpeg",
-    ".webp": "image/webp",
-    ".gif":  "image/gif",
-    ".json": "application/json",
-    ".html": "text/html",
-}
-
-suffix_pat: Final[re.Pattern] = re.compile("([.][^.]+)$")
-
 graph_width: Final[int] = 1000
 graph_height: Final[int] = 360
 
+# Static files change only when we deploy a new version, so in production
+# mode browsers may keep them as long as they like.
+static_cache_control: Final[str] = \
+    "no-cache" if common.DEBUG else "public, max-age=31536000, immutable"
+
+# How often (in seconds) we send a comment down an idle event stream, so we
+# notice when the client has gone away.
+keepalive_interval: Final[float] = 15.0
+
+# With more Hosts than this, the Probes page shows percentiles across the
+# fleet rather than one line per Host.
+probe_hosts_max: Final[int] = 12
+
+request_seconds: Final[metrics.Histogram] = metrics.registry.histogram(
+    "medusa_http_request_seconds",
+    "Time spent handling HTTP requests, per route",
+    ("method", "route"))
+reports_ingested: Final[metrics.Counter] = metrics.registry.counter(
+    "medusa_reports_ingested_total",
+    "Reports received from Agents and stored in the database")
+records_ingested: Final[metrics.Counter] = metrics.registry.counter(
+    "medusa_records_ingested_total",
+    "Records received from Agents and stored in the database")
+reports_rejected: Final[metrics.Counter] = metrics.registry.counter(
+    "medusa_reports_rejected_total",
+    "Reports we could not store, e.g. because the Host was unknown")
+stream_subscribers: Final[metrics.Gauge] = metrics.registry.gauge(
+    "medusa_stream_subscribers",
+    "Clients listening to the event stream")
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """A WSGIServer that handles each request in its own thread.
+
+    The default server handles one request at a time, which does not go well
+    with long-lived connections like event streams.
+    """
+
+    daemon_threads = True
+
+
+class TimingPlugin:  # pylint: disable-msg=R0903
+    """TimingPlugin measures how long each route takes to handle a request.
+
+    For routes that return a generator, this only covers the time until the
+    generator is returned, not the time it takes to send the response.
+    """
+
+    name: Final[str] = "timing"
+    api: Final[int] = 2
+
+    def apply(self, callback, rte: bottle.Route):
+        """Wrap the callback of a route."""
+        labels: Final[tuple[str, str]] = (rte.method, rte.rule)
 
-def find_mime_type(path: str) -> str:
-    """Attempt to determine the MIME type for a file."""
-    m = suffix_pat.search(path)
-    if m is None:
-        return "application/octet-stream"
-    suffix = m[1]
-    if suffix in mime_types:
-        return mime_types[suffix]
-    return "application/octet-stream"
+        def wrapper(*args, **kwargs):
+            t0: Final[float] = time.perf_counter()
+            try:
+                return callback(*args, **kwargs)
+            finally:
+                request_seconds.observe(time.perf_counter() - t0, labels)
+
+        return wrapper
 
 
 def fmt_kbytes(n: Union[int, float]) -> str:
@@ -82,8 +126,44 @@ def fmt_kbytes(n: Union[int, float]) -> str:
     return f"{n:.1f} {units[idx]}"
 
 
-class WebUI:
-    """WebUI provides a web interface to the casual observer."""
+def to_ms(points: list[series.Point]) -> list[series.Point]:
+    """Convert the timestamps of a series from seconds to milliseconds, for Date()."""
+    return [(t * 1000, v) for t, v in points]
+
+
+def col_values(win: ringbuf.Window, name: str) -> list[Optional[float]]:
+    """Return one column of a Window for pygal, with gaps as None."""
+    return [None if math.isnan(v) else v for v in win.columns.get(name, ())]
+
+
+def anomaly_values(win: ringbuf.Window, found: list[anomaly.Anomaly],
+                   names: Optional[Iterable[str]] = None) -> list[Optional[float]]:
+    """Return a series for pygal with the anomalous values at their timestamps, gaps elsewhere."""
+    wanted: Final[Optional[set[str]]] = None if names is None else set(names)
+    at: Final[dict[int, float]] = \
+        {a.stamp: a.value for a in found if wanted is None or a.name in wanted}
+    return [at.get(t) for t in win.stamps]
+
+
+def add_anomalies(chart: pygal.Line, values: list[Optional[float]]) -> None:
+    """Mark anomalies on a chart as dots without a line, if there are any."""
+    if any(v is not None for v in values):
+        chart.add("Anomalies", values, stroke=False, dots_size=5)
+
+
+def col_max(win: ringbuf.Window, names: Optional[Iterable[str]] = None) -> float:
+    """Return the largest value in the given columns of a Window, or in all of them."""
+    if names is None:
+        names = win.columns.keys()
+    return max((v for n in names for v in win.columns.get(n, ()) if not math.isnan(v)),
+               default=0)
+
+
+class WebUI:  # pylint: disable-msg=R0904
+    """WebUI provides a web interface to the casual observer.
+
+    Each page and each AJAX endpoint is handled by a method of its own.
+    """
 
     log: logging.Logger
     tmpl_root: str
@@ -91,6 +171,19 @@ class WebUI:
     env: Environment
     host: str
     port: int
+    broker: stream.Broker
+    latest: cache.LatestValues
+    hosts: cache.HostCache
+    static: assets.AssetCache
+    recent: ringbuf.SeriesBuffer
+    alerts: alert.Engine
+    monitor: liveness.Monitor
+    relay: liveness.Relay
+    anomalies: anomaly.Detector
+    forecast: forecast.Forecaster
+    horizon: float
+    roller: rollup.Roller
+    pool: Pool
 
     def __init__(self, root: str = "") -> None:
         self.log = common.get_logger("WebUI")
@@ -99,30 +192,110 @@ class WebUI:
         cfg = config.Config()
         self.host = cfg.get("Web", "Host")
         self.port = cfg.get("Web", "Port")
+        self.broker = stream.Broker()
+        self.latest = cache.LatestValues()
+        self.hosts = cache.HostCache()
+        interval: Final[int] = int(cfg.get("Probe", "Interval", 60))
+        self.alerts = alert.Engine(alert.load_rules(cfg),
+                                   interval,
+                                   liveness.ALERTS.values())
+        self.monitor = liveness.Monitor(float(cfg.get("Liveness", "Stale", 3)) * interval,
+                                        float(cfg.get("Liveness", "Down", 10)) * interval)
+        # Raising Alerts needs the database writer, which the threads that
+        # report contact with a Host may be holding.
+        self.relay = liveness.Relay(self._liveness_changed)
+        self.monitor.subscribe(self.relay)
+        self.anomalies = anomaly.Detector(
+            float(cfg.get("Anomaly", "Alpha", anomaly.ALPHA)),
+            float(cfg.get("Anomaly", "Threshold", anomaly.THRESHOLD)),
+            int(cfg.get("Anomaly", "Warmup", anomaly.WARMUP)))
+        self.forecast = forecast.Forecaster(float(cfg.get("Forecast", "HalfLife", 24)) * 3600)
+        self.horizon = float(cfg.get("Forecast", "Horizon", 30)) * 86400
+        self.roller = rollup.Roller(int(cfg.get("Rollup", "Minutes", 60)) * 60,
+                                    int(cfg.get("Rollup", "Backfill", 7)) * 86400,
+                                    alpha=float(cfg.get("Rollup", "Alpha", 0.01)),
+                                    retention=int(cfg.get("Database", "Retention", 0)) * 86400)
+        self.pool = Pool(
+            size=int(cfg.get("Database", "Readers", READERS)),
+            checkpoint=int(cfg.get("Database", "Checkpoint", CHECKPOINT // 2**20)) * 2**20)
+        db = self.pool.writer()
+        try:
+            self.hosts.load(db)
+            self.latest.load(db)
+            self.alerts.load(db, (r for v in self.latest.get_all().values() for r in v.values()))
+            self.monitor.load(self.hosts.get_all())
+            self.forecast.load(db)
+            # End the Alerts for Hosts that came back while we were not looking.
+            now: Final[int] = int(time.time())
+            for hid, status in self.monitor.get_all().items():
+                for st, name in liveness.ALERTS.items():
+                    if st != status:
+                        self.alerts.notify(db, name, hid, False, now)
+        finally:
+            db.close()
 
         if root == "":
             self.root = os.path.join(".", "web")
         else:
             self.root = root
-        self.env = Environment(loader=FileSystemLoader(os.path.join(self.root, "templates")))
-        self.env.globals = {
-            "dbg": common.DEBUG,
-            "app_string": f"{common.APP_NAME} {common.APP_VERSION}",
-            "hostname": socket.gethostname(),
-        }
+        self.static = assets.AssetCache(os.path.join(self.root, "static"),
+                                        int(cfg.get("Web", "StaticCache", 16) * 2**20))
+        self.recent = ringbuf.SeriesBuffer(int(cfg.get("Web", "SeriesHours", 24)) * 3600,
+                                           int(cfg.get("Web", "SeriesBuffer", 64)) * 2**20)
+        self.env = self._make_env()
 
         bottle.debug(common.DEBUG)
+        if not any(isinstance(p, TimingPlugin) for p in bottle.default_app().plugins):
+            bottle.install(TimingPlugin())
         route("/main", callback=self.main)
         route("/probes", callback=self.handle_probe_view)
+        route("/forecast", callback=self.handle_forecast_view)
         route("/host/<host_id:int>", callback=self.host_details)
         route("/graph/sysload/<host_id:int>", callback=self.host_load_graph)
         route("/graph/sensor/<host_id:int>", callback=self.host_sensor_graph)
         route("/graph/disk/<host_id:int>", callback=self.host_disk_graph)
+        route("/graph/groups/<name>/<source>", callback=self.group_graph)
         route("/ajax/submit_report/<hostname>", 'POST', callback=self.handle_submit_report)
         route("/ajax/register", "POST", callback=self.handle_register_host)
         route("/static/<path>", callback=self.staticfile)
         route("/ajax/beacon", callback=self.handle_beacon)
+        route("/ajax/series/<host_id:int>/<source>", callback=self.handle_series)
+        route("/ajax/probe/<source>", callback=self.handle_probe_series)
+        route("/ajax/fleet/<source>", callback=self.handle_fleet_series)
+        route("/ajax/top/<source>", callback=self.handle_top_hosts)
+        route("/ajax/quantiles/<source>", callback=self.handle_quantiles)
+        route("/ajax/groups", callback=self.handle_groups)
+        route("/ajax/groups/<name>/<source>", callback=self.handle_group_quantiles)
+        route("/ajax/liveness", callback=self.handle_liveness)
+        route("/ajax/forecast", callback=self.handle_forecast)
+        route("/stream/records", callback=self.handle_stream)
         route("/favicon.ico", callback=self.handle_favicon)
+        route("/metrics", callback=self.handle_metrics)
+        route("/admin/profile", callback=self.handle_profile)
+
+    def _make_env(self) -> Environment:
+        """Create the template Environment and compile all templates up front.
+
+        Compiled templates are cached in the base directory, so a restart does
+        not have to compile everything from scratch. Outside of debug mode, we
+        do not check if the templates have changed on disk.
+        """
+        env = Environment(
+            loader=FileSystemLoader(os.path.join(self.root, "templates")),
+            bytecode_cache=FileSystemBytecodeCache(common.path.cache()),
+            auto_reload=common.DEBUG,
+        )
+        env.globals = {
+            "dbg": common.DEBUG,
+            "app_string": f"{common.APP_NAME} {common.APP_VERSION}",
+            "hostname": socket.gethostname(),
+        }
+        env.filters["kbytes"] = fmt_kbytes
+
+        for name in env.list_templates(extensions=["jinja"]):
+            env.get_template(name)
+
+        return env
 
     def _tmpl_vars(self) -> dict:
         """Return a dict with a few default variables filled in already."""
@@ -136,28 +309,50 @@ class WebUI:
 
     def run(self) -> None:
         """Run the web server."""
-        run(host=self.host, port=self.port, debug=common.DEBUG)
+        self.alerts.start(self.pool)
+        self.relay.start()
+        self.monitor.start()
+        self.roller.start(self.pool)
+        run(host=self.host,
+            port=self.port,
+            debug=common.DEBUG,
+            server_class=ThreadingWSGIServer)
 
     def main(self) -> str:
         """Presents the landing page."""
+        response.set_header("Cache-Control", "no-store, max-age=0")
+        tmpl = self.env.get_template("main.jinja")
+        tmpl_vars = self._tmpl_vars()
+        tmpl_vars["title"] = f"{common.APP_NAME} {common.APP_VERSION} - Main"
+        tmpl_vars["year"] = datetime.now().year
+        tmpl_vars["hosts"] = self.hosts.get_all()
+        tmpl_vars["latest"] = self.latest.get_all()
+        tmpl_vars["alerts"] = self.alerts.active_alerts()
+        tmpl_vars["ended"] = self._ended_alerts()
+        tmpl_vars["liveness"] = self.monitor.get_all()
+        tmpl_vars["host_names"] = {h.host_id: h.name for h in tmpl_vars["hosts"]}
+        return tmpl.render(tmpl_vars)
+
+    def _ended_alerts(self) -> list[data.Alert]:
+        """Return the Alerts that were raised during the last day and have ended since."""
+        db: Final[Database] = self.pool.reader()
         try:
-            db: Database = Database()
-            response.set_header("Cache-Control", "no-store, max-age=0")
-            tmpl = self.env.get_template("main.jinja")
-            tmpl_vars = self._tmpl_vars()
-            tmpl_vars["title"] = f"{common.APP_NAME} {common.APP_VERSION} - Main"
-            tmpl_vars["year"] = datetime.now().year
-            tmpl_vars["hosts"] = db.host_get_all()
-            return tmpl.render(tmpl_vars)
+            return [a for a in db.alert_get_recent() if not a.active]
+        except DatabaseError as err:
+            self.log.error("Failed to load recent Alerts: %s", err)
+            return []
         finally:
             db.close()
 
-    def host_details(self, host_id) -> str:
-        """Render a detailed view of the information about a given Host."""
+    def host_details(self, host_id) -> Union[str, Iterator[str]]:
+        """Render a detailed view of the information about a given Host.
+
+        The page can get quite large, so it is sent to the client as it is rendered.
+        """
         try:
-            db: Database = Database()
+            db: Database = self.pool.reader()
             response.set_header("Cache-Control", "no-store, max-age=0")
-            host: Optional[Host] = db.host_get_by_id(host_id)
+            host: Optional[Host] = self.hosts.get_by_id(db, host_id)
             if host is None:
                 response.status = 404
                 return f"Host {host_id} does not exist in the database."
@@ -165,27 +360,27 @@ class WebUI:
             tmpl: Template = self.env.get_template("host.jinja")
             tmpl_vars = self._tmpl_vars()
             tmpl_vars["host"] = host
-            tmpl_vars["hosts"] = db.host_get_all()
-            tmpl_vars["data"] = db.record_get_by_host(host, 1440)
+            tmpl_vars["hosts"] = self.hosts.get_all()
+            tmpl_vars["data"] = db.record_get_by_host(host, 1440, lazy=True)
+            tmpl_vars["current"] = self.latest.get(host.host_id)
+            tmpl_vars["forecast"] = self.forecast.get(host.host_id)
+            tmpl_vars["tags"] = db.tag_get_by_host(host.host_id)
             # ...
 
-            return tmpl.render(tmpl_vars)
+            return tmpl.generate(tmpl_vars)
         finally:
             db.close()
 
     def host_load_graph(self, host_id: int) -> Union[str, bytes]:
         """Render a time series chart of sysload data for the given host."""
         try:
-            db: Database = Database()
-            host: Optional[data.Host] = db.host_get_by_id(host_id)
+            db: Database = self.pool.reader()
+            host: Optional[data.Host] = self.hosts.get_by_id(db, host_id)
             if host is None:
                 response.status = 404
                 return f"Host {host_id} does not exist in the database."
-            records: list = db.record_get_by_host_probe(host, "sysload")
-            max_load: int = 0
-
-            for r in records:
-                max_load = max(max_load, r.load.load1, r.load.load5, r.load.load15)
+            win = self._window(db, host, "sysload")
+            max_load = col_max(win)
 
             cfg = Config()
             cfg.show_minor_x_labels = False
@@ -198,10 +393,11 @@ class WebUI:
             cfg.range = (0, max_load)
 
             chart = pygal.Line(cfg)
-            chart.x_labels = [x.timestamp.strftime(common.TIME_FMT) for x in records]
-            chart.add("Load1", [x.load.load1 for x in records])
-            chart.add("Load5", [x.load.load5 for x in records])
-            chart.add("Load15", [x.load.load15 for x in records])
+            chart.x_labels = common.fmt_stamps(win.stamps)
+            chart.add("Load1", col_values(win, "load1"))
+            chart.add("Load5", col_values(win, "load5"))
+            chart.add("Load15", col_values(win, "load15"))
+            add_anomalies(chart, anomaly_values(win, self._anomalies(host, "sysload", win)))
 
             response.set_header("Content-Type", "image/svg+xml")
             response.set_header("Cache-Control", "no-store, max-age=0")
@@ -212,23 +408,13 @@ class WebUI:
     def host_sensor_graph(self, host_id: int) -> Union[bytes, str]:
         """Render a time series chart of sensor data (i.e. temperature)."""
         try:
-            db = Database()
-            host: Optional[data.Host] = db.host_get_by_id(host_id)
+            db = self.pool.reader()
+            host: Optional[data.Host] = self.hosts.get_by_id(db, host_id)
             if host is None:
                 response.status = 404
                 return f"Host {host_id} does not exist in the database."
-            records = db.record_get_by_host_probe(host, "sensors")
-            max_temp: Union[int, float] = 0
-
-            sdata: dict = {}
-            for r in records:
-                assert isinstance(r, SensorRecord)
-                for k, v in r.sensors.items():
-                    max_temp = max(max_temp, v.value)
-                    if k in sdata:
-                        sdata[k].append(v.value)
-                    else:
-                        sdata[k] = [v.value]
+            win = self._window(db, host, "sensors")
+            max_temp = col_max(win)
 
             cfg = Config()
             cfg.show_minor_x_labels = False
@@ -245,12 +431,13 @@ class WebUI:
                     f"/tmp/sensors_{host.name}_{host.last_contact.strftime(common.TIME_FMT)}"
                 with open(fpath, "w", encoding="utf-8") as fh:
                     # rapidjson.dump(records, fh)
-                    print(records, file=fh)
+                    print(win, file=fh)
 
             chart = pygal.Line(cfg)
-            chart.x_labels = [x.timestamp.strftime(common.TIME_FMT) for x in records]
-            for k, v in sdata.items():
-                chart.add(k, v)
+            chart.x_labels = common.fmt_stamps(win.stamps)
+            for k in win.columns:
+                chart.add(k, col_values(win, k))
+            add_anomalies(chart, anomaly_values(win, self._anomalies(host, "sensors", win)))
             response.set_header("Content-Type", "image/svg+xml")
             response.set_header("Cache-Control", "no-store, max-age=0")
             return chart.render(is_unicode=True)
@@ -267,24 +454,13 @@ class WebUI:
         }
 
         try:
-            db = Database()
-            host: Optional[data.Host] = db.host_get_by_id(host_id)
+            db = self.pool.reader()
+            host: Optional[data.Host] = self.hosts.get_by_id(db, host_id)
             if host is None:
                 response.status = 404
                 return f"Host {host_id} does not exist in the database."
-            records = db.record_get_by_host_probe(host, "disk")
-            max_free: int = 0
-            sdata: dict = {}
-            for r in records:
-                assert isinstance(r, DiskRecord)
-                for path, info in r.disks.items():
-                    if info[3] > max_free:
-                        max_free = info[3]
-                    if path in fs:
-                        if path in sdata:
-                            sdata[path].append(info[3])
-                        else:
-                            sdata[path] = [info[3]]
+            win = self._window(db, host, "disk")
+            max_free = col_max(win)
 
             cfg = Config()
             cfg.show_minor_x_labels = False
@@ -298,74 +474,167 @@ class WebUI:
 
             chart = pygal.Line(cfg)
             chart.value_formatter = fmt_kbytes
-            chart.x_labels = [x.timestamp.strftime(common.TIME_FMT) for x in records]
-            for k, v in sdata.items():
-                chart.add(k, v)
+            chart.x_labels = common.fmt_stamps(win.stamps)
+            for k in win.columns:
+                if k in fs:
+                    chart.add(k, col_values(win, k))
+            add_anomalies(chart, anomaly_values(win, self._anomalies(host, "disk", win), fs))
             response.set_header("Content-Type", "image/svg+xml")
             response.set_header("Cache-Control", "no-store, max-age=0")
             return chart.render(is_unicode=True)
         finally:
             db.close()
 
-    def handle_probe_view(self) -> Union[str, bytes]:
-        """Render graphs of the data from selected Probes for the last 24 hours."""
-        probes = ("sysload", "disk")
+    def group_graph(self, name: str, source: str) -> Union[bytes, str]:
+        """Render a bar chart of the quantiles of one Probe per group of Hosts.
+
+        The groups are the values of the tag name, e.g. os. The quantiles
+        come from the rollups of the last week, or the period given in seconds
+        as the query parameter age.
+        """
         try:
-            db = Database()
-            hlist: list[data.Host] = db.host_get_all()
-            hosts: dict[int, data.Host] = {}
-            for h in hlist:
-                hosts[h.host_id] = h
-            now: int = int(time.time())
-            chart_data = {}
-            for p in probes:
-                records = db.record_get_by_probe(p, now-86400, now)
-                sdata: dict[str, list[data.Record]] = {}
-                for r in records:
-                    host = hosts[r.host_id]
-                    if host.name not in sdata:
-                        sdata[host.name] = []
-                    sdata[host.name].append(r)
-                chart_data[p] = sdata
-
-            tmpl: Template = self.env.get_template("probes.jinja")
-            tmpl_vars = self._tmpl_vars()
-            tmpl_vars["hosts"] = hlist
-            tmpl_vars["hlist"] = hosts
-            tmpl_vars["data"] = chart_data
-            tmpl_vars["probes"] = probes
+            age: Final[int] = int(request.query.get("age", str(7 * 86400)))
+            if age <= 0 or source not in rollup.SOURCES:
+                raise ValueError(f"Cannot chart {source} over {age} seconds")
+        except ValueError as err:
+            response.status = 400
+            return str(err)
+
+        try:
+            db = self.pool.reader()
+            groups = self._group_quantiles(db, name, source, age)
+        finally:
+            db.close()
+
+        qs: Final[tuple[float, ...]] = fleet.quantiles(source)
+        cfg = Config()
+        cfg.x_title = name
+        cfg.title = f"{source} by {name}"
+        cfg.width = graph_width
+        cfg.height = graph_height
+
+        chart = pygal.Bar(cfg)
+        chart.x_labels = [f"{g} ({n})" for g, (n, _) in groups.items()]
+        for q in qs:
+            chart.add(fleet.quantile_name(q), [sk.quantile(q) for _, sk in groups.values()])
+        response.set_header("Content-Type", "image/svg+xml")
+        response.set_header("Cache-Control", "no-store, max-age=0")
+        return chart.render(is_unicode=True)
+
+    def _group_quantiles(self, db: Database, name: str, source: str, age: int) \
+            -> dict[str, tuple[int, sketch.Sketch]]:
+        """Return the merged rollups of the last age seconds per value of a tag, sorted by value."""
+        members: Final[dict[int, str]] = \
+            {hid: tags[name] for hid, tags in db.tag_get_all().items() if name in tags}
+        now: Final[int] = int(time.time())
+        groups = rollup.by_group(db, source, now - age, now, members, width=self.roller.width)
+        return dict(sorted(groups.items()))
+
+    def _window(self, db: Database, host: Host, source: str, age: int = 86400) -> ringbuf.Window:
+        """Return the recent samples from one source on a Host, from memory if possible."""
+        win = self.recent.get(db, host, source, age)
+        if win is None:
+            win = ringbuf.window_from_records(db.record_get_by_host_probe(host, source, age))
+        return win
+
+    def _anomalies(self, host: Host, source: str, win: ringbuf.Window) -> list[anomaly.Anomaly]:
+        """Return the anomalies detected in the period a Window covers."""
+        if len(win.stamps) == 0:
+            return []
+        return self.anomalies.get(host.host_id, source, win.stamps[0])
 
-            return tmpl.render(tmpl_vars)
+    def handle_probe_view(self) -> Union[str, Iterator[str]]:
+        """Render graphs of the data from selected Probes for the last 24 hours.
+
+        The page only contains the scaffolding, the charts fetch their data
+        from /ajax/probe/<source> or /ajax/fleet/<source> once the page has
+        loaded. The query parameter fleet=1 or fleet=0 picks one or the other,
+        by default it depends on the number of Hosts. The Hosts may be limited
+        to a group with tag=name:value, the charts comparing groups show the
+        values of the tag given as by, os by default.
+        """
+        probes = ("sysload", "sensors", "disk")
+        try:
+            tags = self._tag_params()
+        except ValueError as err:
+            response.status = 400
+            return str(err)
+
+        try:
+            db = self.pool.reader()
+            group = self._group(db, tags)
+            groups = db.tag_get_groups()
         finally:
             db.close()
 
+        tmpl: Template = self.env.get_template("probes.jinja")
+        tmpl_vars = self._tmpl_vars()
+        tmpl_vars["hosts"] = self.hosts.get_all()
+        tmpl_vars["probes"] = probes
+        count: Final[int] = len(tmpl_vars["hosts"]) if group is None else len(group)
+        tmpl_vars["fleet"] = request.query.get("fleet", "") == "1" or \
+            (request.query.get("fleet", "") != "0" and count > probe_hosts_max)
+        tmpl_vars["top"] = fleet.DEFAULT_TOP
+        tmpl_vars["tags"] = [f"{n}:{v}" for n, v in tags]
+        tmpl_vars["groups"] = groups
+        tmpl_vars["by"] = request.query.get("by", "os")
+        tmpl_vars["group_sources"] = rollup.SOURCES
+
+        return tmpl.generate(tmpl_vars)
+
+    def handle_forecast_view(self) -> str:
+        """Render a list of the file systems that are about to run out of space."""
+        response.set_header("Cache-Control", "no-store, max-age=0")
+        tmpl: Template = self.env.get_template("forecast.jinja")
+        tmpl_vars = self._tmpl_vars()
+        tmpl_vars["title"] = f"{common.APP_NAME} {common.APP_VERSION} - Disk Forecast"
+        tmpl_vars["hosts"] = self.hosts.get_all()
+        tmpl_vars["host_names"] = {h.host_id: h.name for h in tmpl_vars["hosts"]}
+        tmpl_vars["forecast"] = self.forecast.at_risk(self.horizon)
+        tmpl_vars["horizon"] = self.horizon / 86400
+        return tmpl.render(tmpl_vars)
+
     # Static files
 
-    def handle_favicon(self) -> bytes:
+    def handle_favicon(self) -> Union[bytes, str]:
         """Handle the request for the favicon."""
-        path: Final[str] = os.path.join(self.root, "static", "favicon.ico")
-        with open(path, "rb") as fh:
-            response.set_header("Content-Type", "image/vnd.microsoft.icon")
-            response.set_header("Cache-Control",
-                                "no-store, max-age=0" if common.DEBUG else "max-age=7200")
-            return fh.read()
-
-    def staticfile(self, path) -> bytes:
-        """Return one of the static files."""
-        # TODO Determine MIME type?
-        #      Set caching header?
-        mtype = find_mime_type(path)
-        response.set_header("Content-Type", mtype)
-        response.set_header("Cache-Control",
-                            "no-store, max-age=0" if common.DEBUG else "max-age=7200")
-
-        full_path = os.path.join(self.root, "static", path)
-        if not os.path.isfile(full_path):
+        return self.staticfile("favicon.ico")
+
+    def staticfile(self, path) -> Any:
+        """Return one of the static files.
+
+        Files are served from memory, compressed if the client accepts it.
+        Conditional requests using If-None-Match are answered with 304.
+        """
+        asset: Optional[assets.Asset] = self.static.get(path)
+        if asset is None:
+            if not self.static.cacheable(path) and self.static.path(path) is not None:
+                # Exists, but is too big for the cache, so it comes from the disk.
+                res = bottle.static_file(path,
+                                         root=self.static.root,
+                                         mimetype=assets.find_mime_type(path))
+                # Conditional and range requests get 304, 206 or 416 here.
+                if res.status_code in (200, 304):
+                    res.set_header("Cache-Control", static_cache_control)
+                return res
             self.log.error("Static file %s was not found", path)
             response.status = 404
             return ""
-        with open(full_path, "rb") as fh:
-            return fh.read()
+
+        enc, body = asset.select(request.headers.get("Accept-Encoding", ""))
+        etag: Final[str] = asset.tag(enc)
+        response.set_header("Content-Type", asset.mtype)
+        response.set_header("Cache-Control", static_cache_control)
+        response.set_header("ETag", etag)
+        response.set_header("Vary", "Accept-Encoding")
+
+        if assets.etag_match(request.headers.get("If-None-Match", ""), etag):
+            response.status = 304
+            return b""
+
+        if enc != "":
+            response.set_header("Content-Encoding", enc)
+        return body
 
     # AJAX Handlers
 
@@ -376,16 +645,29 @@ class WebUI:
         self.log.debug("Attempting to register Host: %s",
                        req)
         try:
-            db = Database()
+            db = self.pool.writer()
             host = Host(name=req["name"], os=req["os"], last_contact=datetime.now())
-            ck_host = db.host_get_by_name(req["name"])
+            # Older Agents do not send any tags, but we always know the OS.
+            # Invalid tags must not keep a Host from registering, or every
+            # report it sends afterwards is rejected.
+            tags, problems = data.filter_tags(req.get("tags", {}))
+            for problem in problems:
+                self.log.warning("Host %s sent an invalid tag: %s", host.name, problem)
+            tags["os"] = host.os
+            ck_host = self.hosts.get_by_name(db, req["name"])
 
             if ck_host is None:
                 with db:
                     db.host_add(host)
-                    res.status = MsgType.Success
-                    res.msg = f"Welcome aboard, {host.name}"
+                    db.tag_set(host.host_id, tags)
+                self.hosts.add(host)
+                self.monitor.contact(host.host_id)
+                res.status = MsgType.Success
+                res.msg = f"Welcome aboard, {host.name}"
             else:
+                with db:
+                    db.tag_set(ck_host.host_id, tags)
+                self.monitor.contact(ck_host.host_id)
                 res.status = MsgType.Success
                 res.msg = f"Welcome back, {host.name}"
         except DatabaseError as err:
@@ -408,12 +690,13 @@ class WebUI:
         self.log.debug("Handle report data from %s", hostname)
         try:
             res: Message = Message()
-            db = Database()
-            host = db.host_get_by_name(hostname)
+            db = self.pool.writer()
+            host = self.hosts.get_by_name(db, hostname)
             if host is None:
                 msg: Final[str] = f"Did not find Host {hostname} in database"
                 self.log.error("Cannot handle submitted data: %s",
                                msg)
+                reports_rejected.inc()
                 res.msg = msg
                 res.status = MsgType.UnknownHost
             else:
@@ -423,7 +706,11 @@ class WebUI:
                 with db:
                     for r in report:
                         r.host_id = host.host_id
+                        r.normalize()
                         db.record_add(r)
+                reports_ingested.inc()
+                records_ingested.inc(amount=len(report))
+                self._after_ingest(db, host, report)
                 res.status = MsgType.Success
                 res.msg = "Data was processed successfully."
             xfr = res.json()
@@ -433,6 +720,153 @@ class WebUI:
         finally:
             db.close()
 
+    def _after_ingest(self, db: Database, host: Host, report: list[data.Record]) -> None:
+        """Update our in-memory state and pass freshly stored Records on to whoever is listening.
+
+        This includes checking the Records against the alert rules.
+        """
+        try:
+            self.hosts.touch(host.host_id, datetime.now())
+            self.monitor.contact(host.host_id)
+            self.latest.update(report)
+            self.recent.add(host.host_id, report)
+            self.anomalies.update(host.host_id, report)
+            self.forecast.update(host.host_id, report)
+            self.broker.publish(host, report)
+            self.alerts.evaluate(db, host, report)
+        except Exception as err:  # pylint: disable-msg=W0718
+            self.log.error("%s processing records from %s: %s\n%s\n",
+                           err.__class__.__name__,
+                           host.name,
+                           err,
+                           fmt_err(err))
+
+    def _liveness_changed(self, changes: list[liveness.Transition]) -> None:
+        """Raise or end Alerts as Hosts go quiet or come back."""
+        db = self.pool.writer()
+        try:
+            for tr in changes:
+                if tr.old in liveness.ALERTS:
+                    self.alerts.notify(db, liveness.ALERTS[tr.old], tr.host_id, False, tr.stamp)
+                if tr.new in liveness.ALERTS:
+                    self.alerts.notify(db,
+                                       liveness.ALERTS[tr.new],
+                                       tr.host_id,
+                                       True,
+                                       tr.stamp,
+                                       message=f"Last contact {common.fmt_stamp(tr.last)}",
+                                       value=tr.stamp - tr.last)
+        finally:
+            db.close()
+
+    def handle_stream(self) -> Union[str, Iterator[str]]:
+        """Stream newly arriving Records as Server-Sent Events.
+
+        Clients may restrict the stream to certain Hosts and/or sources by
+        passing one or more host=<id> and source=<name> query parameters.
+        """
+        try:
+            hosts = {int(h) for h in request.query.getall("host")}
+        except ValueError as err:
+            response.status = 400
+            return f"Invalid host ID: {err}"
+        sources = set(request.query.getall("source"))
+
+        try:
+            sub = self.broker.subscribe(hosts, sources)
+        except stream.TooManySubscribersError as err:
+            response.status = 503
+            return str(err)
+
+        response.set_header("Content-Type", "text/event-stream")
+        response.set_header("Cache-Control", "no-store, max-age=0")
+        response.set_header("X-Accel-Buffering", "no")
+
+        def events() -> Iterator[str]:
+            try:
+                yield "retry: 5000\n\n"
+                while True:
+                    batch = sub.get(keepalive_interval)
+                    if sub.closed:
+                        return
+                    if len(batch) == 0:
+                        yield ": keepalive\n\n"
+                        continue
+                    for ev in batch:
+                        yield f"event: record\ndata: {ev}\n\n"
+            finally:
+                self.broker.unsubscribe(sub)
+
+        return events()
+
+    def handle_metrics(self) -> str:
+        """Return our internal metrics in the Prometheus text format."""
+        stream_subscribers.set(self.broker.count())
+        response.set_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        response.set_header("Cache-Control", "no-store, max-age=0")
+        return metrics.registry.render()
+
+    def handle_profile(self) -> str:
+        """Start a profiling run, for as many seconds as the query parameter says.
+
+        Only clients on the same machine may do this.
+        """
+        response.set_header("Content-Type", "application/json")
+        response.set_header("Cache-Control", "no-store, max-age=0")
+        # request.remote_addr prefers X-Forwarded-For, which any client may send.
+        if request.environ.get("REMOTE_ADDR") not in ("127.0.0.1", "::1", "::ffff:127.0.0.1"):
+            response.status = 403
+            return json.dumps({"status": False, "msg": "Forbidden"})
+
+        try:
+            seconds = float(request.query.get("seconds", profiler.DEFAULT_DURATION))
+            path = profiler.profiler.start(seconds)
+        except ValueError as err:
+            response.status = 400
+            return json.dumps({"status": False, "msg": f"Invalid duration: {err}"})
+        except profiler.ProfilerBusyError as err:
+            response.status = 409
+            return json.dumps({"status": False, "msg": str(err)})
+
+        return json.dumps({"status": True, "path": path})
+
+    def handle_liveness(self) -> str:
+        """Return the Status of all Hosts as JSON."""
+        status: Final[dict[int, liveness.Status]] = self.monitor.get_all()
+        res = {
+            "status": True,
+            "hosts": {h.name: status[h.host_id].name
+                      for h in self.hosts.get_all() if h.host_id in status},
+        }
+        response.set_header("Content-Type", "application/json")
+        response.set_header("Cache-Control", "no-store, max-age=0")
+        return json.dumps(res)
+
+    def handle_forecast(self) -> str:
+        """Return the file systems at risk of running out of space as JSON, most urgent first.
+
+        The horizon, in days, may be given as a query parameter.
+        """
+        response.set_header("Content-Type", "application/json")
+        response.set_header("Cache-Control", "no-store, max-age=0")
+        try:
+            horizon: Final[float] = float(request.query.get("days", self.horizon / 86400)) * 86400
+        except ValueError as err:
+            response.status = 400
+            return json.dumps({"status": False, "msg": f"Invalid horizon: {err}"})
+
+        names: Final[dict[int, str]] = {h.host_id: h.name for h in self.hosts.get_all()}
+        res = {
+            "status": True,
+            "filesystems": [{"host": names.get(f.host_id, str(f.host_id)),
+                             "path": f.path,
+                             "free": f.free,
+                             "rate": f.rate,
+                             "eta": f.eta,
+                             "full": f.full_at()} for f in self.forecast.at_risk(horizon)],
+        }
+        return codec.dumps(res)
+
     def handle_beacon(self) -> str:
         """Handle the AJAX call for the beacon."""
         jdata: dict[str, Any] = {
@@ -447,6 +881,358 @@ class WebUI:
 
         return json.dumps(jdata)
 
+    def _series_params(self) -> tuple[int, int, str]:
+        """Extract the time window, point count and downsampling method from the query string.
+
+        Raises ValueError if any of them is invalid.
+        """
+        age: Final[int] = int(request.query.get("age", "86400"))
+        points: Final[int] = int(request.query.get("points", str(series.DEFAULT_POINTS)))
+        method: Final[str] = request.query.get("method", "lttb")
+
+        if age <= 0:
+            raise ValueError(f"age must be positive, not {age}")
+        if points < 3:
+            raise ValueError(f"Need at least 3 points, not {points}")
+        if method not in series.methods:
+            raise ValueError(f"Unknown downsampling method {method}")
+
+        return age, min(points, series.MAX_POINTS), method
+
+    def handle_series(self, host_id: int, source: str) -> str:
+        """Return the values from one Probe on one Host as JSON, downsampled for charting.
+
+        Timestamps are given in milliseconds, so they can be fed to Date() as-is.
+        """
+        response.set_header("Content-Type", "application/json")
+        response.set_header("Cache-Control", "no-store, max-age=0")
+        try:
+            age, points, method = self._series_params()
+        except ValueError as err:
+            response.status = 400
+            return json.dumps({"status": False, "msg": str(err)})
+
+        try:
+            db = self.pool.reader()
+            host: Optional[data.Host] = self.hosts.get_by_id(db, host_id)
+            if host is None:
+                response.status = 404
+                return json.dumps({"status": False,
+                                   "msg": f"Host {host_id} does not exist in the database."})
+            win = self._window(db, host, source, age)
+        finally:
+            db.close()
+
+        res = {
+            "status": True,
+            "host": host.name,
+            "source": source,
+            "series": {k: to_ms(series.downsample(win.points(k), points, method))
+                       for k in win.columns},
+            "anomalies": [{"t": a.stamp * 1000,
+                           "name": a.name,
+                           "value": a.value,
+                           "score": a.score} for a in self._anomalies(host, source, win)],
+        }
+
+        return codec.dumps(res)
+
+    def _tag_params(self) -> list[tuple[str, str]]:
+        """Return the tags given as query parameters, like tag=os:freebsd.
+
+        Raises ValueError if one of them is malformed.
+        """
+        tags: list[tuple[str, str]] = []
+        for t in request.query.getall("tag"):
+            name, sep, value = t.partition(":")
+            if sep == "" or data.tag_name_pat.match(name) is None or value == "":
+                raise ValueError(f"Invalid tag {t!r}, expected name:value")
+            tags.append((name, value))
+        return tags
+
+    def _group(self, db: Database, tags: list[tuple[str, str]]) -> Optional[set[int]]:
+        """Return the IDs of the Hosts that carry all the given tags, None if there are no tags."""
+        group: Optional[set[int]] = None
+        for name, value in tags:
+            ids = {h.host_id for h in db.host_get_by_tag(name, value)}
+            group = ids if group is None else group & ids
+        return group
+
+    def _source_windows(self, db: Database, source: str, age: int,
+                        group: Optional[set[int]] = None) -> dict[int, ringbuf.Window]:
+        """Return the recent samples from one source on all Hosts, from memory if possible.
+
+        If group is given, only those Hosts are included.
+        """
+        hosts = self.hosts.get_all()
+        if group is not None:
+            hosts = [h for h in hosts if h.host_id in group]
+        windows = self.recent.get_source(db, hosts, source, age)
+        if windows is not None:
+            known: Final[set[int]] = {h.host_id for h in hosts}
+            for hid in [hid for hid in windows if hid not in known]:
+                # Hosts added by a different process are missing from our cache.
+                if (group is not None and hid not in group) \
+                        or self.hosts.get_by_id(db, hid) is None:
+                    del windows[hid]
+            return windows
+        now: Final[int] = int(time.time())
+        by_host: dict[int, list[data.AnyRecord]] = {}
+        for r in db.record_get_by_probe(source, now - age, now, lazy=True):
+            if group is not None and r.host_id not in group:
+                continue
+            if r.host_id in by_host:
+                by_host[r.host_id].append(r)
+            else:
+                by_host[r.host_id] = [r]
+        return {hid: ringbuf.window_from_records(recs) for hid, recs in by_host.items()}
+
+    def _host_names(self, db: Database, ids: Iterable[int]) -> dict[int, str]:
+        """Return the names of the given Hosts.
+
+        Hosts registered by a different process may be missing from our cache,
+        so we look them up in the database.
+        """
+        names: Final[dict[int, str]] = {h.host_id: h.name for h in self.hosts.get_all()}
+        for hid in set(ids) - names.keys():
+            h = self.hosts.get_by_id(db, hid)
+            names[hid] = h.name if h is not None else str(hid)
+        return names
+
+    def handle_probe_series(self, source: str) -> str:
+        """Return the scores from one Probe on all Hosts as JSON, downsampled for charting."""
+        response.set_header("Content-Type", "application/json")
+        response.set_header("Cache-Control", "no-store, max-age=0")
+        try:
+            age, points, method = self._series_params()
+            tags = self._tag_params()
+        except ValueError as err:
+            response.status = 400
+            return json.dumps({"status": False, "msg": str(err)})
+
+        raw: dict[str, list[series.Point]] = {}
+        try:
+            db = self.pool.reader()
+            windows = self._source_windows(db, source, age, self._group(db, tags))
+            names = self._host_names(db, windows.keys())
+        finally:
+            db.close()
+
+        for hid, win in windows.items():
+            pts = [(t, v) for t, v in zip(win.stamps, fleet.sample_values(source, win))
+                   if not math.isnan(v)]
+            if len(pts) > 0:
+                raw[names[hid]] = pts
+
+        res = {
+            "status": True,
+            "source": source,
+            "series": {k: to_ms(series.downsample(v, points, method))
+                       for k, v in sorted(raw.items())},
+        }
+
+        return codec.dumps(res)
+
+    def handle_fleet_series(self, source: str) -> str:
+        """Return percentiles of one Probe across all Hosts as JSON, per slice of time.
+
+        The series are named after the quantiles, e.g. p50, p95 and max, and
+        have the same format as those from /ajax/probe. The number of slices
+        may be given as the query parameter buckets.
+        """
+        response.set_header("Content-Type", "application/json")
+        response.set_header("Cache-Control", "no-store, max-age=0")
+        try:
+            age: Final[int] = int(request.query.get("age", "86400"))
+            buckets: Final[int] = int(request.query.get("buckets", str(fleet.DEFAULT_BUCKETS)))
+            if age <= 0 or buckets <= 0:
+                raise ValueError("age and buckets must be positive")
+            if source not in fleet.SOURCES:
+                raise ValueError(f"Cannot aggregate {source}")
+            tags: Final[list[tuple[str, str]]] = self._tag_params()
+        except ValueError as err:
+            response.status = 400
+            return json.dumps({"status": False, "msg": str(err)})
+
+        try:
+            db = self.pool.reader()
+            windows = self._source_windows(db, source, age, self._group(db, tags))
+        finally:
+            db.close()
+
+        qs: Final[tuple[float, ...]] = fleet.quantiles(source)
+        width: Final[int] = max(math.ceil(age / min(buckets, series.MAX_POINTS)), 1)
+        result = fleet.aggregate(windows, source, int(time.time()) - age, width, qs)
+        res = {
+            "status": True,
+            "source": source,
+            "width": width,
+            "hosts": [[b.stamp * 1000, b.hosts] for b in result],
+            "series": {fleet.quantile_name(q): [[b.stamp * 1000, b.values[i]] for b in result]
+                       for i, q in enumerate(qs)},
+        }
+
+        return codec.dumps(res)
+
+    def handle_top_hosts(self, source: str) -> str:
+        """Return the Hosts that look worst for one Probe over a period as JSON, worst first.
+
+        The number of Hosts is given as the query parameter n, the value they
+        are ranked by as stat, which is one of mean, peak or last.
+        """
+        response.set_header("Content-Type", "application/json")
+        response.set_header("Cache-Control", "no-store, max-age=0")
+        try:
+            age: Final[int] = int(request.query.get("age", "86400"))
+            n: Final[int] = int(request.query.get("n", str(fleet.DEFAULT_TOP)))
+            stat: Final[str] = request.query.get("stat", "mean")
+            if age <= 0 or n <= 0:
+                raise ValueError("age and n must be positive")
+            if source not in fleet.SOURCES:
+                raise ValueError(f"Cannot rank Hosts by {source}")
+            if stat not in fleet.STATS:
+                raise ValueError(f"Unknown statistic {stat}")
+            tags: Final[list[tuple[str, str]]] = self._tag_params()
+        except ValueError as err:
+            response.status = 400
+            return json.dumps({"status": False, "msg": str(err)})
+
+        try:
+            db = self.pool.reader()
+            windows = self._source_windows(db, source, age, self._group(db, tags))
+            ranks = fleet.top(windows, source, n, stat)
+            names = self._host_names(db, (r.host_id for r in ranks))
+        finally:
+            db.close()
+
+        res = {
+            "status": True,
+            "source": source,
+            "stat": stat,
+            "hosts": [{"id": r.host_id,
+                       "host": names[r.host_id],
+                       "mean": r.mean,
+                       "peak": r.peak,
+                       "last": r.last,
+                       "samples": r.samples} for r in ranks],
+        }
+
+        return codec.dumps(res)
+
+    def handle_quantiles(self, source: str) -> str:
+        """Return quantiles of one Probe over a period as JSON, from the rollups.
+
+        The quantiles are given as the query parameter q, which may be
+        repeated, the Hosts to include as host or tag, likewise. Without
+        either, all Hosts are included. Besides the quantiles over the whole
+        period, there is a series of them per rollup period, with the same
+        format as those from /ajax/probe.
+        """
+        response.set_header("Content-Type", "application/json")
+        response.set_header("Cache-Control", "no-store, max-age=0")
+        try:
+            age: Final[int] = int(request.query.get("age", str(7 * 86400)))
+            qs: Final[list[float]] = [float(q) for q in request.query.getall("q")] or \
+                [0.5, 0.95, 0.99]
+            hosts: Optional[set[int]] = {int(h) for h in request.query.getall("host")} or None
+            tags: Final[list[tuple[str, str]]] = self._tag_params()
+            if age <= 0:
+                raise ValueError(f"age must be positive, not {age}")
+            if source not in rollup.SOURCES:
+                raise ValueError(f"No rollups for {source}")
+            if any(not 0 <= q <= 1 for q in qs):
+                raise ValueError("Quantiles must be between 0 and 1")
+        except ValueError as err:
+            response.status = 400
+            return json.dumps({"status": False, "msg": str(err)})
+
+        now: Final[int] = int(time.time())
+        try:
+            db = self.pool.reader()
+            group = self._group(db, tags)
+            if group is not None:
+                hosts = group if hosts is None else hosts & group
+            summaries = rollup.query(db, source, now - age, now, hosts, width=self.roller.width)
+        except DatabaseError as err:
+            response.status = 500
+            return json.dumps({"status": False, "msg": str(err)})
+        finally:
+            db.close()
+
+        sk = rollup.total(summaries)
+        res = {
+            "status": True,
+            "source": source,
+            "width": self.roller.width,
+            "count": 0 if sk is None else sk.count,
+            "mean": None if sk is None else sk.mean(),
+            "quantiles": {fleet.quantile_name(q): None if sk is None else sk.quantile(q)
+                          for q in qs},
+            "series": {fleet.quantile_name(q): [[s.start * 1000, s.sketch.quantile(q)]
+                                                for s in summaries]
+                       for q in qs},
+        }
+
+        return codec.dumps(res)
+
+    def handle_groups(self) -> str:
+        """Return the tags in use and the number of Hosts carrying each as JSON."""
+        response.set_header("Content-Type", "application/json")
+        response.set_header("Cache-Control", "no-store, max-age=0")
+        try:
+            db = self.pool.reader()
+            rows = db.tag_get_groups()
+        finally:
+            db.close()
+
+        groups: dict[str, list[dict[str, Any]]] = {}
+        for name, value, cnt in rows:
+            groups.setdefault(name, []).append({"value": value, "hosts": cnt})
+        return json.dumps({"status": True, "groups": groups})
+
+    def handle_group_quantiles(self, name: str, source: str) -> str:
+        """Return quantiles of one Probe per value of a tag as JSON, from the rollups.
+
+        Query parameters are age and q, like for /ajax/quantiles.
+        """
+        response.set_header("Content-Type", "application/json")
+        response.set_header("Cache-Control", "no-store, max-age=0")
+        try:
+            age: Final[int] = int(request.query.get("age", str(7 * 86400)))
+            qs: Final[list[float]] = [float(q) for q in request.query.getall("q")] or \
+                [0.5, 0.95, 0.99]
+            if age <= 0:
+                raise ValueError(f"age must be positive, not {age}")
+            if source not in rollup.SOURCES:
+                raise ValueError(f"No rollups for {source}")
+            if any(not 0 <= q <= 1 for q in qs):
+                raise ValueError("Quantiles must be between 0 and 1")
+        except ValueError as err:
+            response.status = 400
+            return json.dumps({"status": False, "msg": str(err)})
+
+        try:
+            db = self.pool.reader()
+            groups = self._group_quantiles(db, name, source, age)
+        except DatabaseError as err:
+            response.status = 500
+            return json.dumps({"status": False, "msg": str(err)})
+        finally:
+            db.close()
+
+        res = {
+            "status": True,
+            "name": name,
+            "source": source,
+            "groups": {value: {"hosts": n,
+                               "count": sk.count,
+                               "mean": sk.mean(),
+                               "quantiles": {fleet.quantile_name(q): sk.quantile(q) for q in qs}}
+                       for value, (n, sk) in groups.items()},
+        }
+
+        return codec.dumps(res)
+
 
 if __name__ == '__main__':
     ui = WebUI()
@@ -1,4 +1,4 @@
-// Time-stamp: <2025-06-05 18:41:55 krylon>
+// Time-stamp: <2026-10-19 08:41:55 krylon>
 // -*- mode: javascript; coding: utf-8; -*-
 // Copyright 2015-2020 Benjamin Walkenhorst <krylon@gmx.net>
 //
@@ -218,3 +218,103 @@ const formatters = {
     "sysload": fmtNumber,
     "disk": fmtBytes,
 }
+
+const chartBackground = [
+    'rgba(255, 99, 132, 0.2)',
+    'rgba(54, 162, 235, 0.2)',
+    'rgba(255, 206, 86, 0.2)',
+    'rgba(75, 192, 192, 0.2)',
+    'rgba(153, 102, 255, 0.2)',
+    'rgba(255, 159, 64, 0.2)'
+]
+
+const chartBorder = [
+    'rgba(255, 99, 132, 1)',
+    'rgba(54, 162, 235, 1)',
+    'rgba(255, 206, 86, 1)',
+    'rgba(75, 192, 192, 1)',
+    'rgba(153, 102, 255, 1)',
+    'rgba(255, 159, 64, 1)'
+]
+
+// Fetch the (downsampled) data for one Probe across all Hosts and feed
+// it to a chart that has already been created with an empty dataset list.
+// If fleet is true, the chart gets percentiles across Hosts instead of
+// one line per Host. tags limits the Hosts to those carrying all of them,
+// each given as "name:value".
+function loadProbeChart(src, chart, points, fleet = false, tags = []) {
+    const params = new URLSearchParams()
+    params.append(fleet ? 'buckets' : 'points', points)
+    tags.forEach((t) => params.append('tag', t))
+    const url = fleet ? `/ajax/fleet/${src}` : `/ajax/probe/${src}`
+    $.get(`${url}?${params.toString()}`,
+          function (res) {
+              if (!res.status) {
+                  console.log(`Failed to load data for ${src}: ${res.msg}`)
+                  return
+              }
+
+              chart.data.datasets = Object.entries(res.series).map(([host, data], idx) => {
+                  return {
+                      label: host,
+                      data: data.map((p) => { return { timestamp: new Date(p[0]), score: p[1] } }),
+                      backgroundColor: chartBackground[idx % chartBackground.length],
+                      borderColor: chartBorder[idx % chartBorder.length],
+                      borderWidth: 1,
+                      pointRadius: 1,
+                  }
+              })
+              chart.update()
+          },
+          'json'
+         ).fail(function () {
+             console.log(`Error loading data for ${src}`)
+         })
+} // function loadProbeChart(src, chart, points, fleet = false, tags = [])
+
+// Fetch the n Hosts that look worst for one Probe and fill the body of
+// the given table with them. tags works like for loadProbeChart.
+function loadTopHosts(src, tbody, n, tags = []) {
+    const params = new URLSearchParams()
+    params.append('n', n)
+    tags.forEach((t) => params.append('tag', t))
+    $.get(`/ajax/top/${src}?${params.toString()}`,
+          function (res) {
+              if (!res.status) {
+                  console.log(`Failed to load top Hosts for ${src}: ${res.msg}`)
+                  return
+              }
+
+              const rows = res.hosts.map((h) => {
+                  return `<tr>
+<td><a href="/host/${h.id}">${_.escape(h.host)}</a></td>
+<td>${fmtNumber(h.mean, src)}</td>
+<td>${fmtNumber(h.peak, src)}</td>
+<td>${fmtNumber(h.last, src)}</td>
+</tr>`
+              })
+              $(tbody).html(rows.join(""))
+          },
+          'json'
+         ).fail(function () {
+             console.log(`Error loading top Hosts for ${src}`)
+         })
+} // function loadTopHosts(src, tbody, n, tags = [])
+
+// Subscribe to the stream of newly arriving records for the given hosts
+// (an empty list means all hosts) and call handler for each one.
+function streamRecords(hosts, handler, sources = []) {
+    const params = new URLSearchParams()
+    hosts.forEach((h) => params.append('host', h))
+    sources.forEach((s) => params.append('source', s))
+
+    const src = new EventSource(`/stream/records?${params.toString()}`)
+    src.addEventListener('record', (ev) => {
+        handler(JSON.parse(ev.data))
+    })
+    src.onerror = () => {
+        console.log('Lost connection to record stream, the browser will retry')
+    }
+
+    return src
+} // function streamRecords(hosts, handler, sources = [])